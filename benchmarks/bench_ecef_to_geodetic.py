@@ -0,0 +1,77 @@
+# Speed and accuracy of the ecef_to_geodetic methods on a global lat/lon/height grid.
+#
+# Points are generated in geodetic coordinates, converted to ECEF with geodetic_to_ecef_batch and
+# converted back with each method. Errors are reported per height band, with the latitude error
+# converted to meters along the meridian.
+#
+# Usage: python benchmarks/bench_ecef_to_geodetic.py [--json results.json]
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from geopoint.geo_convert import a, geodetic_to_ecef_batch, ecef_to_geodetic_batch, ECEF_TO_GEODETIC_METHODS
+
+HEIGHTS = [-1e3, 0.0, 1e3, 1e4, 1e5, 1e6, 1e7]
+
+
+def global_grid(n_lat, n_lon):
+    lat, lon, h = np.meshgrid(np.linspace(-90, 90, n_lat), np.linspace(-180, 180, n_lon), HEIGHTS, indexing='ij')
+    return np.column_stack([lat.ravel(), lon.ravel(), h.ravel()])
+
+
+def run(n_lat, n_lon, repeat):
+    geodetic = global_grid(n_lat, n_lon)
+    ecef = geodetic_to_ecef_batch(geodetic)
+    out = np.empty_like(ecef)
+    results = []
+    for method in ECEF_TO_GEODETIC_METHODS:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            ecef_to_geodetic_batch(ecef, out=out, method=method)
+            timings.append(time.perf_counter() - start)
+        lat_error = np.abs(out[:, 0] - geodetic[:, 0]) * np.pi / 180 * a
+        height_error = np.abs(out[:, 2] - geodetic[:, 2])
+        bands = {}
+        for height in HEIGHTS:
+            band = geodetic[:, 2] == height
+            bands[str(height)] = {
+                'max_lat_error_m': float(np.nanmax(lat_error[band])),
+                'max_height_error_m': float(np.nanmax(height_error[band])),
+            }
+        results.append({
+            'method': method,
+            'points': len(geodetic),
+            'ns_per_point': min(timings) / len(geodetic) * 1e9,
+            'bands': bands,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Speed and accuracy of the ecef_to_geodetic methods on a global lat/lon/height grid")
+    parser.add_argument('--lat', type=int, default=721, help="grid points along latitude")
+    parser.add_argument('--lon', type=int, default=361, help="grid points along longitude")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help="also write the results to this file")
+    options = parser.parse_args()
+
+    results = run(options.lat, options.lon, options.repeat)
+    for result in results:
+        print(f"{result['method']}: {result['ns_per_point']:.1f} ns/point over {result['points']} points")
+        print(f"  {'height [m]':>12}{'max lat err [m]':>18}{'max h err [m]':>16}")
+        for height, errors in result['bands'].items():
+            print(f"  {float(height):>12.0f}{errors['max_lat_error_m']:>18.2e}{errors['max_height_error_m']:>16.2e}")
+    if options.json:
+        with open(options.json, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
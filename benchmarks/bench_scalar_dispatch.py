@@ -0,0 +1,51 @@
+# Per-call latency of the math (plain float) and NumPy (0-d array) paths of the scalar API.
+#
+# Usage: python benchmarks/bench_scalar_dispatch.py [--number N]
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from geopoint.geo_convert import geodetic_to_ecef, ecef_to_geodetic, ecef_to_enu, enu_to_ecef, geodetic_to_enu
+from geopoint.pan_tilt import cartesian_to_spherical, geodetic_to_pan_tilt_with_offsets
+from geopoint.rotational_matrices import rotate_frame_zyx
+
+ORIGIN = (59.9, 10.7, 40.0)
+TARGET = (59.91, 10.71, 0.0)
+ECEF = geodetic_to_ecef(*TARGET)
+ENU = geodetic_to_enu(*TARGET, *ORIGIN)
+
+CASES = [
+    ('geodetic_to_ecef', geodetic_to_ecef, TARGET),
+    ('ecef_to_geodetic', ecef_to_geodetic, ECEF),
+    ('ecef_to_enu', ecef_to_enu, ECEF + ORIGIN),
+    ('enu_to_ecef', enu_to_ecef, ENU + ORIGIN),
+    ('geodetic_to_enu', geodetic_to_enu, TARGET + ORIGIN),
+    ('rotate_frame_zyx', rotate_frame_zyx, ENU + (90.0, 10.0, 10.0)),
+    ('cartesian_to_spherical', cartesian_to_spherical, ENU),
+    ('geodetic_to_pan_tilt_with_offsets', geodetic_to_pan_tilt_with_offsets, TARGET + ORIGIN + (90.0, 10.0, 10.0)),
+]
+
+
+def per_call_ns(func, args, number):
+    return min(timeit.repeat(lambda: func(*args), number=number, repeat=5)) / number * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=20000, help="calls per timing run")
+    options = parser.parse_args()
+
+    print(f"{'function':<36}{'math [ns]':>12}{'numpy [ns]':>12}{'speedup':>10}")
+    for name, func, args in CASES:
+        math_ns = per_call_ns(func, tuple(float(arg) for arg in args), options.number)
+        numpy_ns = per_call_ns(func, tuple(np.asarray(arg, dtype=float) for arg in args), options.number)
+        print(f"{name:<36}{math_ns:>12.0f}{numpy_ns:>12.0f}{numpy_ns / math_ns:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
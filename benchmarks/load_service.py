@@ -0,0 +1,89 @@
+# Load generator for the micro-batching service (geopoint/service.py).
+#
+# Starts a server in a subprocess (or uses a running one), then runs `--concurrency` client tasks
+# that each send single-target pan/tilt requests back to back for `--duration` seconds, and
+# reports the throughput and the p50/p99 request latency.
+#
+# Usage: python benchmarks/load_service.py [--unix PATH | --port N] [--concurrency 64] [--duration 5] [--window 0.0005]
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+from geopoint.service import PanTiltClient
+
+ORIGIN = (-25.7, 28.2, 1400.0)
+OFFSETS = (90.0, 1.5, -0.5)
+
+
+async def worker(client, seed, deadline, latencies):
+    rng = np.random.default_rng(seed)
+    while time.perf_counter() < deadline:
+        lat, lon, h = rng.uniform(-26.0, -25.4), rng.uniform(27.9, 28.5), rng.uniform(1000.0, 2000.0)
+        start = time.perf_counter()
+        await client.geodetic_to_pan_tilt_with_offsets(lat, lon, h, *ORIGIN, *OFFSETS)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(options, path, port):
+    latencies = []
+    async with PanTiltClient(path, port=port, pool_size=options.pool_size) as client:
+        await client.ecef_to_geodetic(6378137.0, 0.0, 0.0)  # Warm-up, opens the first connection
+        start = time.perf_counter()
+        deadline = start + options.duration
+        await asyncio.gather(*(worker(client, seed, deadline, latencies) for seed in range(options.concurrency)))
+        elapsed = time.perf_counter() - start
+    return np.array(latencies), elapsed
+
+
+def wait_for_server(path, port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async def probe():
+                async with PanTiltClient(path, port=port, pool_size=1) as client:
+                    await client.ecef_to_geodetic(6378137.0, 0.0, 0.0)
+            asyncio.run(probe())
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("the service did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for python -m geopoint serve")
+    parser.add_argument('--unix', metavar='PATH', help="Unix socket of a running server")
+    parser.add_argument('--port', type=int, help="TCP port of a running server on localhost")
+    parser.add_argument('--concurrency', type=int, default=64, help="concurrent client tasks")
+    parser.add_argument('--pool-size', type=int, default=4, help="client connections")
+    parser.add_argument('--duration', type=float, default=5.0, help="seconds")
+    parser.add_argument('--window', type=float, default=0.0005, help="batching window of the server started by this script")
+    options = parser.parse_args()
+
+    path, port, server = options.unix, options.port, None
+    if path is None and port is None:
+        path = os.path.join(tempfile.mkdtemp(), 'geopoint.sock')
+        server = subprocess.Popen([sys.executable, '-m', 'geopoint', 'serve', '--unix', path, '--window', str(options.window)], cwd=ROOT)
+    try:
+        wait_for_server(path, port)
+        latencies, elapsed = asyncio.run(run(options, path, port))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1e3
+    print(f"{len(latencies)} requests in {elapsed:.2f} s: {len(latencies) / elapsed:,.0f} requests/s, "
+          f"p50 {p50:.3f} ms, p99 {p99:.3f} ms (concurrency {options.concurrency}, pool {options.pool_size})")
+
+
+if __name__ == '__main__':
+    main()
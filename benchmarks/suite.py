@@ -0,0 +1,199 @@
+# Benchmark suite of the core transforms, with regression tracking against a stored baseline.
+#
+# For every transform it measures the scalar (plain float) latency, and the throughput and peak
+# memory (traced with tracemalloc) of the vectorized call at several batch sizes. Results are
+# written as JSON; `compare` checks a result file (or a fresh run) against a baseline and exits
+# with status 1 if any timing got slower, or any peak memory grew, by more than the threshold.
+#
+# Usage:
+#   python benchmarks/suite.py run [--sizes 1 1000 1000000] [--json results.json]
+#   python benchmarks/suite.py compare baseline.json [results.json] [--threshold 0.2] [--memory-threshold 0.1]
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from geopoint.geo_convert import geodetic_to_ecef, ecef_to_geodetic, geodetic_to_ecef_batch, ecef_to_geodetic_batch, geodetic_to_sacrs, sacrs_to_geodetic
+from geopoint.pan_tilt import geodetic_to_pan_tilt_with_offsets
+from geopoint.rotational_matrices import rotate_frame_zyx
+
+ORIGIN = (-25.7, 28.2, 1400.0)
+OFFSETS = (90.0, 1.5, -0.5)
+SIZES = [1, 1000, 1000000]
+
+
+def targets(n):
+    rng = np.random.default_rng(0)
+    return rng.uniform(-26.0, -25.4, n), rng.uniform(27.9, 28.5, n), rng.uniform(1000.0, 2000.0, n)
+
+
+def ecef_points(n):
+    return tuple(geodetic_to_ecef_batch(np.column_stack(targets(n))).T.copy())
+
+
+def enu_points(n):
+    rng = np.random.default_rng(1)
+    return rng.uniform(-5e3, 5e3, n), rng.uniform(-5e3, 5e3, n), rng.uniform(-100.0, 100.0, n)
+
+
+def sacrs_points(n):
+    lat, lon, _ = targets(n)
+    x_southing, y_westing = geodetic_to_sacrs(lat, lon)
+    return np.full(n, 29.0), y_westing, x_southing
+
+
+# name -> (function, arguments for n points); arrays of length 1 for n=1, plain floats for the scalar latency
+CASES = {
+    'geodetic_to_ecef': (geodetic_to_ecef, targets),
+    'ecef_to_geodetic': (ecef_to_geodetic, ecef_points),
+    'geodetic_to_ecef_batch': (lambda lat, lon, h: geodetic_to_ecef_batch(lat, lon, h), targets),
+    'ecef_to_geodetic_batch': (lambda x, y, z: ecef_to_geodetic_batch(x, y, z), ecef_points),
+    'geodetic_to_pan_tilt_with_offsets': (lambda lat, lon, h: geodetic_to_pan_tilt_with_offsets(lat, lon, h, *ORIGIN, *OFFSETS), targets),
+    'rotate_frame_zyx': (lambda x, y, z: rotate_frame_zyx(x, y, z, *OFFSETS), enu_points),
+    'geodetic_to_sacrs': (lambda lat, lon, h: geodetic_to_sacrs(lat, lon), targets),
+    'sacrs_to_geodetic': (sacrs_to_geodetic, sacrs_points),
+}
+SCALAR_CASES = ('geodetic_to_ecef', 'ecef_to_geodetic', 'geodetic_to_pan_tilt_with_offsets', 'rotate_frame_zyx', 'geodetic_to_sacrs', 'sacrs_to_geodetic')
+
+
+def best_seconds_per_call(call, repeat=5):
+    timer = timeit.Timer(call)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def peak_bytes(call):
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - start
+
+
+def run(sizes, names=None):
+    results = {}
+    for name, (func, make_args) in CASES.items():
+        if names and name not in names:
+            continue
+        result = results[name] = {}
+        if name in SCALAR_CASES:
+            args = tuple(float(column[0]) for column in make_args(1))
+            result['scalar_ns'] = best_seconds_per_call(lambda: func(*args)) * 1e9
+        result['batch'] = {}
+        for size in sizes:
+            args = make_args(size)
+            seconds = best_seconds_per_call(lambda: func(*args), repeat=3)
+            result['batch'][str(size)] = {
+                'ns_per_point': seconds / size * 1e9,
+                'points_per_s': size / seconds,
+                'peak_bytes': peak_bytes(lambda: func(*args)),
+            }
+    return {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+        },
+        'results': results,
+    }
+
+
+def metrics(report):
+    """
+    Flattens a report to {(function, metric): value}; timings in ns, memory in bytes.
+    """
+    flat = {}
+    for name, result in report['results'].items():
+        if 'scalar_ns' in result:
+            flat[(name, 'scalar_ns')] = result['scalar_ns']
+        for size, batch in result['batch'].items():
+            flat[(name, f'batch[{size}].ns_per_point')] = batch['ns_per_point']
+            flat[(name, f'batch[{size}].peak_bytes')] = batch['peak_bytes']
+    return flat
+
+
+def compare(baseline, current, threshold, memory_threshold):
+    """
+    Lists the metrics present in both reports and the ones that regressed beyond their threshold.
+
+    :returns: (rows of (function, metric, baseline, current, ratio), list of regressed rows)
+    """
+    baseline_metrics = metrics(baseline)
+    rows = []
+    regressions = []
+    for key, value in metrics(current).items():
+        if key not in baseline_metrics:
+            continue
+        base = baseline_metrics[key]
+        ratio = value / base if base > 0 else (1.0 if value <= 0 else float('inf'))
+        row = (*key, base, value, ratio)
+        rows.append(row)
+        limit = memory_threshold if key[1].endswith('peak_bytes') else threshold
+        # Memory peaks of tiny batches are a few hundred bytes of bookkeeping; ignore growth below 4 KiB
+        if ratio > 1.0 + limit and not (key[1].endswith('peak_bytes') and value - base < 4096):
+            regressions.append(row)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite of the geopoint transforms")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help="run the benchmarks")
+    compare_parser = commands.add_parser('compare', help="compare results against a baseline, exit 1 on regressions")
+    compare_parser.add_argument('baseline', help="baseline JSON file")
+    compare_parser.add_argument('current', nargs='?', help="results JSON file (default: run the benchmarks now)")
+    compare_parser.add_argument('--threshold', type=float, default=0.2, help="allowed relative slowdown (default: %(default)s)")
+    compare_parser.add_argument('--memory-threshold', type=float, default=0.1, help="allowed relative peak memory growth (default: %(default)s)")
+    for sub in (run_parser, compare_parser):
+        sub.add_argument('--sizes', type=int, nargs='+', default=SIZES, help="batch sizes (default: %(default)s)")
+        sub.add_argument('--only', nargs='+', choices=tuple(CASES), help="only benchmark these functions")
+        sub.add_argument('--json', help="write the (new) results to this file")
+    options = parser.parse_args()
+
+    if options.command == 'compare' and options.current:
+        with open(options.current) as file:
+            report = json.load(file)
+    else:
+        report = run(options.sizes, options.only)
+    if options.json:
+        with open(options.json, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if options.command == 'run':
+        print(f"{'function':<36}{'scalar [ns]':>12}{'size':>10}{'ns/point':>12}{'points/s':>14}{'peak [B]':>12}")
+        for name, result in report['results'].items():
+            scalar = f"{result['scalar_ns']:.0f}" if 'scalar_ns' in result else '-'
+            for size, batch in result['batch'].items():
+                print(f"{name:<36}{scalar:>12}{size:>10}{batch['ns_per_point']:>12.1f}{batch['points_per_s']:>14.3g}{batch['peak_bytes']:>12}")
+                name = scalar = ''
+        return 0
+
+    with open(options.baseline) as file:
+        baseline = json.load(file)
+    rows, regressions = compare(baseline, report, options.threshold, options.memory_threshold)
+    print(f"{'function':<36}{'metric':<28}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for row in rows:
+        flag = '  REGRESSION' if row in regressions else ''
+        print(f"{row[0]:<36}{row[1]:<28}{row[2]:>12.4g}{row[3]:>12.4g}{row[4]:>8.2f}{flag}")
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond the threshold", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
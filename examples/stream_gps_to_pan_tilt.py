@@ -0,0 +1,22 @@
+import time
+from geopoint.pan_tilt import PanTiltSolver
+from geopoint.streaming import PanTiltStream, TargetFix
+
+# CONSTAINTS
+ORIGIN_LAT, ORIGIN_LON, ORIGIN_H = 0, 0, 0  # Easy position at the equator
+NORTH_OFFSET, PITCH_OFFSET, ROLL_OFFSET = 0, 0, 0
+
+# A simulated high-rate GNSS feed: one target moving east at 10 m/s, sampled at 1 kHz
+def gps_feed(duration=1.0, rate=1000):
+       for i in range(int(duration * rate)):
+              t = i / rate
+              yield TargetFix(t, 'target', 1e-4, t * 10 / 111e3, 10)
+              time.sleep(1 / rate)
+
+solver = PanTiltSolver((ORIGIN_LAT, ORIGIN_LON, ORIGIN_H), NORTH_OFFSET, PITCH_OFFSET, ROLL_OFFSET)
+stream = PanTiltStream(solver, batch_size=64, max_latency=0.01)
+for batch in stream.run(gps_feed()):
+       # Only the latest position in each micro-batch is worth sending to the camera
+       print(f"t: {batch.timestamp[-1]:.3f} s ---> pan: {batch.pan[-1]:.2f}, tilt: {batch.tilt[-1]:.2f}, range: {batch.range[-1]:.1f} m ({len(batch.pan)} fixes)")
+
+print(f"converted {stream.converted} fixes in {stream.batches} batches, dropped {stream.dropped}")
@@ -0,0 +1,83 @@
+# Command line interface: python -m geopoint {convert,serve} ...
+#
+# Example, ECEF survey points in a CSV file to geodetic coordinates, on 8 processes:
+#   python -m geopoint convert points.csv points_geodetic.npy --from ecef --to geodetic --output-format npy --workers 8
+# Example, a micro-batching pan/tilt service for the local processes:
+#   python -m geopoint serve --unix /run/geopoint.sock
+
+import argparse
+import asyncio
+import sys
+from geopoint.bulk import SYSTEM_COLUMNS, FORMATS, convert_file
+from geopoint.service import PanTiltServer
+
+
+def _format_of(path: str, fmt):
+    if fmt is not None:
+        return fmt
+    if path.endswith('.npy'):
+        return 'npy'
+    if path.endswith('.csv') or path.endswith('.txt'):
+        return 'csv'
+    return 'raw'
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m geopoint', description="GeoPoint coordinate tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    convert = commands.add_parser('convert', help="convert a coordinate file between coordinate systems",
+                                  description="Converts a CSV, .npy or raw binary coordinate file chunk by chunk on a process pool. "
+                                              "Columns: " + "; ".join(f"{system}={columns}" for system, columns in SYSTEM_COLUMNS.items()))
+    convert.add_argument('input', help="input file")
+    convert.add_argument('output', help="output file")
+    convert.add_argument('--from', dest='source', required=True, choices=tuple(SYSTEM_COLUMNS), help="coordinate system of the input")
+    convert.add_argument('--to', dest='target', required=True, choices=tuple(SYSTEM_COLUMNS), help="coordinate system of the output")
+    convert.add_argument('--origin', type=float, nargs=3, metavar=('LAT0', 'LON0', 'H0'), help="origin of the ENU frame")
+    convert.add_argument('--input-format', choices=FORMATS, help="default: from the file extension (.csv/.txt, .npy, otherwise raw)")
+    convert.add_argument('--output-format', choices=FORMATS, help="default: from the file extension")
+    convert.add_argument('--chunk-size', type=int, default=65536, help="rows per chunk (default: %(default)s)")
+    convert.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count, 0: no pool)")
+    convert.add_argument('--delimiter', default=',', help="CSV delimiter (default: %(default)r)")
+    convert.add_argument('--skip-header', type=int, default=0, help="CSV input lines to skip (default: %(default)s)")
+    convert.add_argument('--float-format', default='%.12g', help="CSV output format (default: %(default)r)")
+    convert.add_argument('--input-dtype', default='<f8', help="element type of raw input (default: %(default)s)")
+    convert.add_argument('--output-dtype', default='<f8', help="element type of npy/raw output (default: %(default)s)")
+
+    serve = commands.add_parser('serve', help="run the micro-batching conversion service (see geopoint/service.py)")
+    serve.add_argument('--unix', metavar='PATH', help="listen on this Unix domain socket instead of TCP")
+    serve.add_argument('--host', default='127.0.0.1', help="TCP host (default: %(default)s)")
+    serve.add_argument('--port', type=int, default=7707, help="TCP port (default: %(default)s)")
+    serve.add_argument('--window', type=float, default=0.0005, help="batching window in seconds (default: %(default)s)")
+    serve.add_argument('--max-batch', type=int, default=65536, help="rows evaluated at once at most (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        return _serve(args)
+    if 'enu' in (args.source, args.target) and args.origin is None:
+        parser.error("--origin is required for ENU coordinates")
+    report = convert_file(
+        args.input, args.output, args.source, args.target, args.origin,
+        _format_of(args.input, args.input_format), _format_of(args.output, args.output_format),
+        args.chunk_size, args.workers, args.delimiter, args.skip_header, args.float_format,
+        args.input_dtype, args.output_dtype,
+    )
+    print(f"converted {report.rows} rows in {report.chunks} chunks, {report.seconds:.3f} s ({report.rows_per_second:,.0f} rows/s)", file=sys.stderr)
+    return 0
+
+
+def _serve(args) -> int:
+    async def run():
+        server = await PanTiltServer(args.window, args.max_batch).start(args.unix, args.host, args.port)
+        print(f"serving on {server.address}", file=sys.stderr)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
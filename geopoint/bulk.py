@@ -0,0 +1,281 @@
+# Chunked, multi-process bulk conversion of coordinate files.
+#
+# Input is read in fixed-size chunks: CSV text is parsed chunk by chunk, .npy and raw binary
+# files are memory-mapped, so files larger than memory can be converted. Each chunk is copied
+# into a slot of a shared-memory buffer and converted by a worker process in place, with the
+# geo_convert transforms; results are written in input order as chunks complete.
+#
+# Coordinate systems and their columns:
+#   geodetic  lat, lon, h          (degrees, degrees, meters)
+#   ecef      x, y, z              (meters)
+#   enu       east, north, up      (meters, relative to an origin given as (lat0, lon0, h0))
+#   sacrs     lo, y, x, h          (central meridian in degrees, yWesting, xSouthing, height in meters)
+
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import NamedTuple, Optional
+import numpy as np
+from geopoint.geo_convert import (geodetic_to_ecef_batch, ecef_to_geodetic_batch, sacrs_to_geodetic, geodetic_to_sacrs,
+                                  sacrs_central_meridian, LocalTangentFrame)
+
+SYSTEM_COLUMNS = {'geodetic': 3, 'ecef': 3, 'enu': 3, 'sacrs': 4}
+FORMATS = ('csv', 'npy', 'raw')
+
+
+class ConversionReport(NamedTuple):
+    rows: int
+    chunks: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else float('inf')
+
+
+def _to_geodetic(points, source, frame):
+    if source == 'geodetic':
+        return points
+    if source == 'ecef':
+        return ecef_to_geodetic_batch(points)
+    if source == 'enu':
+        return frame.enu_to_geodetic(points)
+    geodetic = np.empty((len(points), 3))
+    geodetic[:, 0], geodetic[:, 1] = sacrs_to_geodetic(points[:, 0], points[:, 1], points[:, 2])
+    geodetic[:, 2] = points[:, 3]
+    return geodetic
+
+
+def _from_geodetic(geodetic, target, frame, out):
+    if target == 'geodetic':
+        out[:] = geodetic
+    elif target == 'ecef':
+        geodetic_to_ecef_batch(geodetic, out=out)
+    elif target == 'enu':
+        frame.geodetic_to_enu(geodetic, out=out)
+    else:
+        lat, lon = geodetic[:, 0], geodetic[:, 1]
+        out[:, 0] = sacrs_central_meridian(lon)
+        out[:, 2], out[:, 1] = geodetic_to_sacrs(lat, lon)
+        out[:, 3] = geodetic[:, 2]
+    return out
+
+
+def convert_points(points: np.ndarray, source: str, target: str, origin=None, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Converts an (N, k) array of points between two coordinate systems (see SYSTEM_COLUMNS).
+    ECEF <-> ENU is done directly, all other pairs go through geodetic coordinates.
+
+    :param points: (N, SYSTEM_COLUMNS[source]) array
+    :param source: coordinate system of `points`
+    :param target: coordinate system of the result
+    :param origin: (lat0, lon0, h0) of the ENU frame, required if either system is 'enu'
+    :param out: optional (N, SYSTEM_COLUMNS[target]) float64 buffer that receives the result
+    :returns: (N, SYSTEM_COLUMNS[target]) array
+    """
+    for system in (source, target):
+        if system not in SYSTEM_COLUMNS:
+            raise ValueError(f"unknown coordinate system {system!r}, expected one of {tuple(SYSTEM_COLUMNS)}")
+    if 'enu' in (source, target) and origin is None:
+        raise ValueError("an origin (lat0, lon0, h0) is required for ENU coordinates")
+    points = np.asarray(points, dtype=float)
+    if points.ndim != 2 or points.shape[1] != SYSTEM_COLUMNS[source]:
+        raise ValueError(f"expected an (N, {SYSTEM_COLUMNS[source]}) array of {source} coordinates, got {points.shape}")
+    if out is None:
+        out = np.empty((len(points), SYSTEM_COLUMNS[target]))
+    frame = LocalTangentFrame(*origin) if origin is not None else None
+
+    if source == 'ecef' and target == 'enu':
+        return frame.to_enu(points, out=out)
+    if source == 'enu' and target == 'ecef':
+        return frame.from_enu(points, out=out)
+    return _from_geodetic(_to_geodetic(points, source, frame), target, frame, out)
+
+
+# Shared-memory worker side. Each worker attaches a slot buffer once and keeps it for the run.
+_attached = {}
+
+def _convert_slot(name: str, slot: int, rows: int, chunk_size: int, source: str, target: str, origin) -> int:
+    shm = _attached.get(name)
+    if shm is None:
+        shm = _attached[name] = shared_memory.SharedMemory(name=name)
+    points, out = _slot_views(shm.buf, slot, chunk_size, source, target)
+    convert_points(points[:rows], source, target, origin, out=out[:rows])
+    return rows
+
+
+def _slot_views(buffer, slot: int, chunk_size: int, source: str, target: str):
+    columns_in, columns_out = SYSTEM_COLUMNS[source], SYSTEM_COLUMNS[target]
+    slot_items = chunk_size * (columns_in + columns_out)
+    slot_array = np.ndarray((slot_items,), dtype=np.float64, buffer=buffer, offset=slot * slot_items * 8)
+    points = slot_array[:chunk_size * columns_in].reshape(chunk_size, columns_in)
+    out = slot_array[chunk_size * columns_in:].reshape(chunk_size, columns_out)
+    return points, out
+
+
+def read_chunks(path, fmt: str, columns: int, chunk_size: int, delimiter: str = ',', skip_header: int = 0, dtype='<f8'):
+    """
+    Generator of (n, columns) float arrays of at most chunk_size rows from a coordinate file.
+
+    :param path: input file
+    :param fmt: 'csv', 'npy' (an (N, columns) array, memory-mapped) or 'raw' (row-major binary of `dtype`, memory-mapped)
+    :param columns: number of columns of the coordinate system
+    :param chunk_size: rows per chunk
+    :param delimiter: CSV delimiter
+    :param skip_header: number of CSV lines to skip
+    :param dtype: element type of raw input
+    """
+    if fmt == 'csv':
+        with open(path) as file:
+            lines = itertools.islice(file, skip_header, None)
+            while True:
+                chunk = list(itertools.islice(lines, chunk_size))
+                if not chunk:
+                    return
+                chunk = np.loadtxt(chunk, delimiter=delimiter, usecols=range(columns), ndmin=2)
+                if len(chunk):
+                    yield chunk
+    if fmt == 'npy':
+        data = np.load(path, mmap_mode='r')
+    elif fmt == 'raw':
+        data = np.memmap(path, dtype=dtype, mode='r')
+        if data.size % columns:
+            raise ValueError(f"{path} holds {data.size} values, which is not a multiple of {columns} columns")
+        data = data.reshape(-1, columns)
+    else:
+        raise ValueError(f"unknown format {fmt!r}, expected one of {FORMATS}")
+    if data.ndim != 2 or data.shape[1] != columns:
+        raise ValueError(f"expected an (N, {columns}) array in {path}, got {data.shape}")
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+def _count_rows(path, fmt: str, columns: int, skip_header: int, dtype) -> int:
+    if fmt == 'csv':
+        with open(path) as file:
+            return sum(1 for line in itertools.islice(file, skip_header, None) if line.strip() and not line.lstrip().startswith('#'))
+    if fmt == 'npy':
+        return len(np.load(path, mmap_mode='r'))
+    return os.path.getsize(path) // (np.dtype(dtype).itemsize * columns)
+
+
+class _Writer:
+    def __init__(self, path, fmt: str, rows: int, columns: int, delimiter: str, float_format: str, dtype):
+        self.fmt = fmt
+        self.delimiter = delimiter
+        self.float_format = float_format
+        self.dtype = np.dtype(dtype)
+        self.position = 0
+        if fmt == 'npy':
+            self.file = None
+            self.array = np.lib.format.open_memmap(path, mode='w+', dtype=self.dtype, shape=(rows, columns))
+        elif fmt in ('csv', 'raw'):
+            self.file = open(path, 'w' if fmt == 'csv' else 'wb')
+        else:
+            raise ValueError(f"unknown format {fmt!r}, expected one of {FORMATS}")
+
+    def write(self, chunk: np.ndarray):
+        if self.fmt == 'csv':
+            np.savetxt(self.file, chunk, fmt=self.float_format, delimiter=self.delimiter)
+        elif self.fmt == 'raw':
+            self.file.write(np.ascontiguousarray(chunk, dtype=self.dtype).tobytes())
+        else:
+            self.array[self.position:self.position + len(chunk)] = chunk
+        self.position += len(chunk)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+        else:
+            self.array.flush()
+            del self.array
+
+
+def convert_file(input_path, output_path, source: str, target: str, origin=None, input_format: str = 'csv', output_format: str = 'csv',
+                 chunk_size: int = 65536, workers: Optional[int] = None, delimiter: str = ',', skip_header: int = 0,
+                 float_format: str = '%.12g', input_dtype='<f8', output_dtype='<f8') -> ConversionReport:
+    """
+    Converts a coordinate file chunk by chunk, on a pool of worker processes.
+
+    Chunks are handed to the workers through shared memory (2 slots per worker, so reading,
+    converting and writing overlap) and written in input order.
+
+    :param input_path: input file, see read_chunks
+    :param output_path: output file
+    :param source: coordinate system of the input, see SYSTEM_COLUMNS
+    :param target: coordinate system of the output
+    :param origin: (lat0, lon0, h0) of the ENU frame, if either system is 'enu'
+    :param input_format: 'csv', 'npy' or 'raw'
+    :param output_format: 'csv', 'npy' or 'raw'
+    :param chunk_size: rows per chunk
+    :param workers: number of worker processes, default os.cpu_count(); 0 converts in this process
+    :param delimiter: CSV delimiter, for input and output
+    :param skip_header: number of CSV lines to skip in the input
+    :param float_format: printf-style format of CSV output values
+    :param input_dtype: element type of raw input
+    :param output_dtype: element type of npy and raw output
+    :returns: ConversionReport
+    """
+    # Validates the systems and the origin before any file is touched
+    convert_points(np.empty((0, SYSTEM_COLUMNS.get(source, 0))), source, target, origin)
+    origin = tuple(float(value) for value in origin) if origin is not None else None
+    columns_in, columns_out = SYSTEM_COLUMNS[source], SYSTEM_COLUMNS[target]
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    start_time = time.perf_counter()
+    rows = _count_rows(input_path, input_format, columns_in, skip_header, input_dtype) if output_format == 'npy' else 0
+    chunks = read_chunks(input_path, input_format, columns_in, chunk_size, delimiter, skip_header, input_dtype)
+    writer = _Writer(output_path, output_format, rows, columns_out, delimiter, float_format, output_dtype)
+    converted = 0
+    count = 0
+    try:
+        if workers == 0:
+            for chunk in chunks:
+                writer.write(convert_points(chunk, source, target, origin))
+                converted += len(chunk)
+                count += 1
+        else:
+            converted, count = _convert_chunks_in_pool(chunks, writer, source, target, origin, chunk_size, workers)
+    finally:
+        writer.close()
+    return ConversionReport(converted, count, time.perf_counter() - start_time)
+
+
+def _convert_chunks_in_pool(chunks, writer, source, target, origin, chunk_size, workers):
+    slots = 2 * workers
+    slot_bytes = chunk_size * (SYSTEM_COLUMNS[source] + SYSTEM_COLUMNS[target]) * 8
+    shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+    converted = 0
+    count = 0
+    try:
+        with ProcessPoolExecutor(workers) as pool:
+            pending = []  # (future, slot) in input order
+            free_slots = list(range(slots))
+
+            def write_oldest():
+                nonlocal converted
+                future, slot = pending.pop(0)
+                rows = future.result()
+                _, out = _slot_views(shm.buf, slot, chunk_size, source, target)
+                writer.write(out[:rows])
+                converted += rows
+                free_slots.append(slot)
+
+            for chunk in chunks:
+                if not free_slots:
+                    write_oldest()
+                slot = free_slots.pop()
+                points, _ = _slot_views(shm.buf, slot, chunk_size, source, target)
+                points[:len(chunk)] = chunk
+                pending.append((pool.submit(_convert_slot, shm.name, slot, len(chunk), chunk_size, source, target, origin), slot))
+                count += 1
+                del points
+            while pending:
+                write_oldest()
+    finally:
+        shm.close()
+        shm.unlink()
+    return converted, count
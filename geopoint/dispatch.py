@@ -0,0 +1,45 @@
+# Scalar/array dispatch for the coordinate transforms.
+#
+# NumPy ufuncs cost around a microsecond each on Python floats, while the math module
+# takes tens of nanoseconds. The transforms are therefore written against an "ops"
+# namespace: the math module for plain int/float inputs (giving plain float results),
+# and an equivalent namespace of NumPy ufuncs for anything else (arrays, 0-d arrays, lists).
+
+import math
+from types import SimpleNamespace
+import numpy as np
+
+numpy_ops = SimpleNamespace(
+    sqrt=np.sqrt,
+    sin=np.sin,
+    cos=np.cos,
+    tan=np.tan,
+    atan2=np.arctan2,
+    hypot=np.hypot,
+    radians=np.deg2rad,
+    degrees=np.rad2deg,
+)
+
+scalar_ops = math
+
+_SCALAR_TYPES = (int, float)  # numpy.float64 is a subclass of float
+
+
+def is_scalar(*values) -> bool:
+    """
+    True if every value is a plain Python int/float (or numpy.float64).
+    """
+    for value in values:
+        if not isinstance(value, _SCALAR_TYPES):
+            return False
+    return True
+
+
+def ops_for(*values):
+    """
+    Returns the math module if all values are scalars, otherwise the NumPy namespace.
+    """
+    for value in values:
+        if not isinstance(value, _SCALAR_TYPES):
+            return numpy_ops
+    return scalar_ops
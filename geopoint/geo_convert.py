@@ -8,9 +8,15 @@
 # "The basic reference for this paper is J.Farrell & M.Barth 'The Global Positioning System & Inertial Navigation'"
 # Also helpful is Wikipedia: http:#en.wikipedia.org/wiki/Geodetic_datum
 # Also helpful are the guidance notes here: http:#www.epsg.org/Guidancenotes.aspx
+#
+# The scalar functions evaluate with the math module when given plain floats (returning floats)
+# and with NumPy ufuncs when given arrays; see geopoint/dispatch.py.
 
-from typing import Tuple
+import math
+from typing import Optional, Tuple
+import numpy as np
 from numpy import sqrt, sin, cos, tan, arctan2, deg2rad, rad2deg, sign
+from geopoint.dispatch import ops_for, is_scalar, numpy_ops, scalar_ops
 
 '''
 Alternative notation for the nested .dot()-notation
@@ -39,16 +45,17 @@ def geodetic_to_ecef(lat:float, lon:float, height:float) -> Tuple[float, float,
     :param height: meters
     :returns: (x, y, z) in [meters, meters, meters]
     """
+    ops = ops_for(lat, lon, height)
     # (lat, lon) in WSG-84 degrees
-    lambd = deg2rad(lat)
-    phi = deg2rad(lon)
-    s = sin(lambd)
-    N = a / sqrt(1 - e_sq * s * s)
+    lambd = ops.radians(lat)
+    phi = ops.radians(lon)
+    s = ops.sin(lambd)
+    N = a / ops.sqrt(1 - e_sq * s * s)
 
-    sin_lambda = sin(lambd)
-    cos_lambda = cos(lambd)
-    cos_phi = cos(phi)
-    sin_phi = sin(phi)
+    sin_lambda = ops.sin(lambd)
+    cos_lambda = ops.cos(lambd)
+    cos_phi = ops.cos(phi)
+    sin_phi = ops.sin(phi)
 
     x = (height + N) * cos_lambda * cos_phi
     y = (height + N) * cos_lambda * sin_phi
@@ -57,33 +64,112 @@ def geodetic_to_ecef(lat:float, lon:float, height:float) -> Tuple[float, float,
     return x, y, z
 
 
-def ecef_to_geodetic(x:float, y:float, z:float) -> Tuple[float, float, float]:
+def ecef_to_geodetic(x:float, y:float, z:float, method: str = 'bowring', tol: float = 1e-12, max_iter: int = 10) -> Tuple[float, float, float]:
     """
     Converts Earth-Centered Earth-Fixed (ECEF) coordinates (x, y, z) to the WGS-84 Geodetic point (lat, lon, height)
-    
+
+    Available methods:
+    - 'bowring': a single non-iterative Bowring step. Fast, and accurate to well below a millimeter near
+      the Earth's surface, but the height is ill-conditioned near the poles and the error grows with height.
+    - 'iterative': fixed-point iteration on the latitude until it changes by less than `tol` radians
+      (or `max_iter` iterations), with a height formula that is well-conditioned everywhere.
+    - 'heikkinen': Heikkinen's exact closed-form solution. No iterations, accurate at all heights.
+
     :param x: meters
     :param y: meters
     :param z: meters
+    :param method: 'bowring', 'iterative' or 'heikkinen'
+    :param tol: convergence tolerance on the latitude in radians ('iterative' only)
+    :param max_iter: maximum number of iterations ('iterative' only)
     :returns: (lat, lon, height) in [degrees, degrees, meters]
     """
-    eps = e_sq / (1.0 - e_sq)
-    p = sqrt(x * x + y * y)
-    q = arctan2((z * a), (p * b))
-    sin_q = sin(q)
-    cos_q = cos(q)
-    sin_q_3 = sin_q * sin_q * sin_q
-    cos_q_3 = cos_q * cos_q * cos_q
-    phi = arctan2((z + eps * b * sin_q_3), (p - e_sq * a * cos_q_3))
-    lambd = arctan2(y, x)
-    v = a / sqrt(1.0 - e_sq * sin(phi) * sin(phi))
-    height = (p / cos(phi)) - v
+    ops = ops_for(x, y, z)
+    p = ops.sqrt(x * x + y * y)
+    phi, height = _latitude_and_height(ops, p, z, method, tol, max_iter)
+    lambd = ops.atan2(y, x)
 
-    lat = rad2deg(phi)
-    lon = rad2deg(lambd)
+    lat = ops.degrees(phi)
+    lon = ops.degrees(lambd)
 
     return lat, lon, height
 
 
+def _latitude_and_height(ops, p, z, method, tol, max_iter):
+    """
+    Returns the geodetic latitude (radians) and height of points at distance p from the Z-axis and height z above the equatorial plane.
+    """
+    if method == 'bowring':
+        return _bowring(ops, p, z)
+    if method == 'iterative':
+        return _iterative(ops, p, z, tol, max_iter)
+    if method == 'heikkinen':
+        return _heikkinen(ops, p, z)
+    raise ValueError(f"unknown method {method!r}, expected one of {ECEF_TO_GEODETIC_METHODS}")
+
+
+ECEF_TO_GEODETIC_METHODS = ('bowring', 'iterative', 'heikkinen')
+
+ep_sq = (a_sq - b_sq) / b_sq  # Square of second eccentricity
+
+
+def _bowring(ops, p, z):
+    eps = e_sq / (1.0 - e_sq)
+    q = ops.atan2((z * a), (p * b))
+    sin_q = ops.sin(q)
+    cos_q = ops.cos(q)
+    sin_q_3 = sin_q * sin_q * sin_q
+    cos_q_3 = cos_q * cos_q * cos_q
+    phi = ops.atan2((z + eps * b * sin_q_3), (p - e_sq * a * cos_q_3))
+    sin_phi = ops.sin(phi)
+    v = a / ops.sqrt(1.0 - e_sq * sin_phi * sin_phi)
+    height = (p / ops.cos(phi)) - v
+    return phi, height
+
+
+def _iterative(ops, p, z, tol, max_iter):
+    # Start from the latitude of the point projected along the Z-axis onto a zero-height ellipsoid
+    phi = ops.atan2(z, p * (1.0 - e_sq))
+    for _ in range(max_iter):
+        sin_phi = ops.sin(phi)
+        cos_phi = ops.cos(phi)
+        N = a / ops.sqrt(1.0 - e_sq * sin_phi * sin_phi)
+        height = p * cos_phi + z * sin_phi - a * a / N
+        phi_next = ops.atan2(z, p * (1.0 - e_sq * N / (N + height)))
+        change = abs(phi_next - phi) if ops is scalar_ops else np.max(np.abs(phi_next - phi), initial=0.0)
+        phi = phi_next
+        if change <= tol:
+            break
+    sin_phi = ops.sin(phi)
+    N = a / ops.sqrt(1.0 - e_sq * sin_phi * sin_phi)
+    height = p * ops.cos(phi) + z * sin_phi - a * a / N
+    return phi, height
+
+
+def _heikkinen(ops, p, z):
+    # Heikkinen (1982), as given in J. Zhu, "Conversion of Earth-centered Earth-fixed coordinates
+    # to geodetic coordinates", IEEE Transactions on Aerospace and Electronic Systems, 1994.
+    p_sq = p * p
+    z_sq = z * z
+    F = 54.0 * b_sq * z_sq
+    G = p_sq + (1.0 - e_sq) * z_sq - e_sq * (a_sq - b_sq)
+    c = e_sq * e_sq * F * p_sq / (G * G * G)
+    s = (1.0 + c + ops.sqrt(c * c + 2.0 * c)) ** (1.0 / 3.0)
+    k = s + 1.0 + 1.0 / s
+    P = F / (3.0 * k * k * G * G)
+    Q = ops.sqrt(1.0 + 2.0 * e_sq * e_sq * P)
+    radicand = 0.5 * a_sq * (1.0 + 1.0 / Q) - P * (1.0 - e_sq) * z_sq / (Q * (1.0 + Q)) - 0.5 * P * p_sq
+    # On the Z-axis the radicand is zero, but may round to a tiny negative number
+    radicand = max(radicand, 0.0) if ops is scalar_ops else np.maximum(radicand, 0.0)
+    r0 = -P * e_sq * p / (1.0 + Q) + ops.sqrt(radicand)
+    p_e = p - e_sq * r0
+    U = ops.sqrt(p_e * p_e + z_sq)
+    V = ops.sqrt(p_e * p_e + (1.0 - e_sq) * z_sq)
+    z0 = b_sq * z / (a * V)
+    height = U * (1.0 - b_sq / (a * V))
+    phi = ops.atan2(z + ep_sq * z0, p)
+    return phi, height
+
+
 def ecef_to_enu(x:float, y:float, z:float, lat0:float, lon0:float, h0:float) -> Tuple[float, float, float]:
     """
     Converts the Earth-Centered Earth-Fixed (ECEF) coordinates (x, y, z) to 
@@ -98,15 +184,16 @@ def ecef_to_enu(x:float, y:float, z:float, lat0:float, lon0:float, h0:float) ->
     :param height0: meters
     :returns: (xEast, yNorth, zUp) in [meters, meters, meters]
     """
-    lamb = deg2rad(lat0)
-    phi = deg2rad(lon0)
-    s = sin(lamb)
-    N = a / sqrt(1 - e_sq * s * s)
+    ops = ops_for(x, y, z, lat0, lon0, h0)
+    lamb = ops.radians(lat0)
+    phi = ops.radians(lon0)
+    s = ops.sin(lamb)
+    N = a / ops.sqrt(1 - e_sq * s * s)
 
-    sin_lambda = sin(lamb)
-    cos_lambda = cos(lamb)
-    sin_phi = sin(phi)
-    cos_phi = cos(phi)
+    sin_lambda = ops.sin(lamb)
+    cos_lambda = ops.cos(lamb)
+    sin_phi = ops.sin(phi)
+    cos_phi = ops.cos(phi)
 
     x0 = (h0 + N) * cos_lambda * cos_phi
     y0 = (h0 + N) * cos_lambda * sin_phi
@@ -137,15 +224,16 @@ def enu_to_ecef(xEast:float, yNorth:float, zUp:float, lat0:float, lon0:float, h0
     :param height0: meters
     :returns: (x, y, z) in [meters, meters, meters]
     """
-    lambd = deg2rad(lat0)
-    phi = deg2rad(lon0)
-    s = sin(lambd)
-    N = a / sqrt(1 - e_sq * s * s)
+    ops = ops_for(xEast, yNorth, zUp, lat0, lon0, h0)
+    lambd = ops.radians(lat0)
+    phi = ops.radians(lon0)
+    s = ops.sin(lambd)
+    N = a / ops.sqrt(1 - e_sq * s * s)
 
-    sin_lambda = sin(lambd)
-    cos_lambda = cos(lambd)
-    cos_phi = cos(phi)
-    sin_phi = sin(phi)
+    sin_lambda = ops.sin(lambd)
+    cos_lambda = ops.cos(lambd)
+    cos_phi = ops.cos(phi)
+    sin_phi = ops.sin(phi)
 
     x0 = (h0 + N) * cos_lambda * cos_phi
     y0 = (h0 + N) * cos_lambda * sin_phi
@@ -182,101 +270,501 @@ def geodetic_to_enu(lat:float, lon:float, h:float, lat0:float, lon0:float, h0:fl
     return xEast, yNorth, zUp
 
 
+################################################
+# Batch (array) versions                       #
+################################################
+# The *_batch functions below accept either three broadcastable arrays (e.g. N-length
+# columns) or a single (..., 3) array as their first argument. Origins may be scalars
+# or per-row arrays. Results are returned as a C-contiguous (..., 3) float64 array, or
+# written into the caller-supplied `out` buffer of the same shape.
+
+def _as_points(points) -> np.ndarray:
+    """
+    Returns `points` as a float array, checking that its last axis has length 3.
+    """
+    points = np.asarray(points, dtype=float)
+    if points.ndim == 0 or points.shape[-1] != 3:
+        raise ValueError(f"expected an array of shape (..., 3), got {points.shape}")
+    return points
+
+
+def _split_columns(c0, c1, c2):
+    """
+    Returns three float arrays from either three array-likes or one (..., 3) array-like.
+    """
+    if c1 is None and c2 is None:
+        points = _as_points(c0)
+        return points[..., 0], points[..., 1], points[..., 2]
+    if c1 is None or c2 is None:
+        raise ValueError("either pass all three coordinate arrays or a single (..., 3) array")
+    return np.asarray(c0, dtype=float), np.asarray(c1, dtype=float), np.asarray(c2, dtype=float)
+
+
+def _output_buffer(out: Optional[np.ndarray], *arrays) -> np.ndarray:
+    """
+    Returns `out` (after validating its shape) or a new (..., 3) array matching the broadcast shape of `arrays`.
+    """
+    shape = np.broadcast_shapes(*(np.shape(arr) for arr in arrays)) + (3,)
+    if out is None:
+        return np.empty(shape)
+    if out.shape != shape:
+        raise ValueError(f"out has shape {out.shape}, expected {shape}")
+    return out
+
+
+def geodetic_to_ecef_batch(lat, lon=None, height=None, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Array version of geodetic_to_ecef.
+
+    :param lat: latitudes in degrees, or an (N, 3) array of (lat, lon, height)
+    :param lon: longitudes in degrees
+    :param height: meters
+    :param out: optional (N, 3) float64 buffer that receives the result
+    :returns: (N, 3) array of (x, y, z) in [meters, meters, meters]
+    """
+    lat, lon, height = _split_columns(lat, lon, height)
+    out = _output_buffer(out, lat, lon, height)
+
+    lambd = deg2rad(lat)
+    phi = deg2rad(lon)
+    sin_lambda = sin(lambd)
+    cos_lambda = cos(lambd)
+    cos_phi = cos(phi)
+    sin_phi = sin(phi)
+    N = a / sqrt(1 - e_sq * sin_lambda * sin_lambda)
+
+    hN_cos_lambda = (height + N) * cos_lambda
+    np.multiply(hN_cos_lambda, cos_phi, out=out[..., 0])
+    np.multiply(hN_cos_lambda, sin_phi, out=out[..., 1])
+    np.multiply(height + (1 - e_sq) * N, sin_lambda, out=out[..., 2])
+
+    return out
+
+
+def ecef_to_geodetic_batch(x, y=None, z=None, out: Optional[np.ndarray] = None, method: str = 'bowring', tol: float = 1e-12, max_iter: int = 10) -> np.ndarray:
+    """
+    Array version of ecef_to_geodetic.
+
+    :param x: meters, or an (N, 3) array of (x, y, z)
+    :param y: meters
+    :param z: meters
+    :param out: optional (N, 3) float64 buffer that receives the result
+    :param method: 'bowring', 'iterative' or 'heikkinen', see ecef_to_geodetic
+    :param tol: convergence tolerance on the latitude in radians ('iterative' only)
+    :param max_iter: maximum number of iterations ('iterative' only)
+    :returns: (N, 3) array of (lat, lon, height) in [degrees, degrees, meters]
+    """
+    x, y, z = _split_columns(x, y, z)
+    out = _output_buffer(out, x, y, z)
+
+    p = sqrt(x * x + y * y)
+    phi, height = _latitude_and_height(numpy_ops, p, z, method, tol, max_iter)
+
+    rad2deg(phi, out=out[..., 0])
+    rad2deg(arctan2(y, x), out=out[..., 1])
+    out[..., 2] = height
+
+    return out
+
+
+def _enu_origin_terms(lat0, lon0, h0):
+    """
+    Returns the trig terms and ECEF position of the ENU origin(s) (lat0, lon0, h0).
+    """
+    lambd = deg2rad(np.asarray(lat0, dtype=float))
+    phi = deg2rad(np.asarray(lon0, dtype=float))
+    sin_lambda = sin(lambd)
+    cos_lambda = cos(lambd)
+    sin_phi = sin(phi)
+    cos_phi = cos(phi)
+    N = a / sqrt(1 - e_sq * sin_lambda * sin_lambda)
+
+    x0 = (h0 + N) * cos_lambda * cos_phi
+    y0 = (h0 + N) * cos_lambda * sin_phi
+    z0 = (h0 + (1 - e_sq) * N) * sin_lambda
+
+    return sin_lambda, cos_lambda, sin_phi, cos_phi, x0, y0, z0
+
+
+def ecef_to_enu_batch(x, y=None, z=None, *, lat0, lon0, h0, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Array version of ecef_to_enu. The origin (lat0, lon0, h0) may be scalars or per-row arrays.
+
+    :param x: meters, or an (N, 3) array of (x, y, z)
+    :param y: meters
+    :param z: meters
+    :param lat0: latitude in degrees
+    :param lon0: longitude in degrees
+    :param h0: meters
+    :param out: optional (N, 3) float64 buffer that receives the result
+    :returns: (N, 3) array of (xEast, yNorth, zUp) in [meters, meters, meters]
+    """
+    x, y, z = _split_columns(x, y, z)
+    sin_lambda, cos_lambda, sin_phi, cos_phi, x0, y0, z0 = _enu_origin_terms(lat0, lon0, h0)
+    out = _output_buffer(out, x, y, z, x0)
+
+    xd = x - x0
+    yd = y - y0
+    zd = z - z0
+
+    np.add(-sin_phi * xd, cos_phi * yd, out=out[..., 0])
+    np.add(-cos_phi * sin_lambda * xd - sin_lambda * sin_phi * yd, cos_lambda * zd, out=out[..., 1])
+    np.add(cos_lambda * cos_phi * xd + cos_lambda * sin_phi * yd, sin_lambda * zd, out=out[..., 2])
+
+    return out
+
+
+def enu_to_ecef_batch(xEast, yNorth=None, zUp=None, *, lat0, lon0, h0, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Array version of enu_to_ecef. The origin (lat0, lon0, h0) may be scalars or per-row arrays.
+
+    :param xEast: meters, or an (N, 3) array of (xEast, yNorth, zUp)
+    :param yNorth: meters
+    :param zUp: meters
+    :param lat0: latitude in degrees
+    :param lon0: longitude in degrees
+    :param h0: meters
+    :param out: optional (N, 3) float64 buffer that receives the result
+    :returns: (N, 3) array of (x, y, z) in [meters, meters, meters]
+    """
+    xEast, yNorth, zUp = _split_columns(xEast, yNorth, zUp)
+    sin_lambda, cos_lambda, sin_phi, cos_phi, x0, y0, z0 = _enu_origin_terms(lat0, lon0, h0)
+    out = _output_buffer(out, xEast, yNorth, zUp, x0)
+
+    xd = -sin_phi * xEast - cos_phi * sin_lambda * yNorth + cos_lambda * cos_phi * zUp
+    yd = cos_phi * xEast - sin_lambda * sin_phi * yNorth + cos_lambda * sin_phi * zUp
+    zd = cos_lambda * yNorth + sin_lambda * zUp
+
+    np.add(xd, x0, out=out[..., 0])
+    np.add(yd, y0, out=out[..., 1])
+    np.add(zd, z0, out=out[..., 2])
+
+    return out
+
+
+def geodetic_to_enu_batch(lat, lon=None, h=None, *, lat0, lon0, h0, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Array version of geodetic_to_enu. The origin (lat0, lon0, h0) may be scalars or per-row arrays.
+
+    :param lat: latitude of targets in degrees, or an (N, 3) array of (lat, lon, h)
+    :param lon: longitude of targets in degrees
+    :param h: height of targets in meters
+    :param lat0: latitude of origin in degrees
+    :param lon0: longitude of origin in degrees
+    :param h0: height of origin in meters
+    :param out: optional (N, 3) float64 buffer that receives the result
+    :returns: (N, 3) array of (xEast, yNorth, zUp) in [meters, meters, meters]
+    """
+    ecef = geodetic_to_ecef_batch(lat, lon, h)
+    return ecef_to_enu_batch(ecef, lat0=lat0, lon0=lon0, h0=h0, out=out)
+
+
+def enu_frames_batch(lat0, lon0, h0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    ECEF positions and ECEF->ENU rotation matrices of many Local Tangent Plane origins at once,
+    such that enu = rotations[i] @ (ecef - origins[i]).
+
+    :param lat0: latitudes in degrees
+    :param lon0: longitudes in degrees
+    :param h0: meters
+    :returns: ((M, 3) origins in meters, (M, 3, 3) rotation matrices)
+    """
+    sin_lambda, cos_lambda, sin_phi, cos_phi, x0, y0, z0 = _enu_origin_terms(lat0, lon0, h0)
+    shape = np.broadcast_shapes(np.shape(x0), np.shape(y0), np.shape(z0))
+    origins = np.empty(shape + (3,))
+    origins[..., 0] = x0
+    origins[..., 1] = y0
+    origins[..., 2] = z0
+
+    rotations = np.empty(shape + (3, 3))
+    rotations[..., 0, 0] = -sin_phi
+    rotations[..., 0, 1] = cos_phi
+    rotations[..., 0, 2] = 0.0
+    rotations[..., 1, 0] = -sin_lambda * cos_phi
+    rotations[..., 1, 1] = -sin_lambda * sin_phi
+    rotations[..., 1, 2] = cos_lambda
+    rotations[..., 2, 0] = cos_lambda * cos_phi
+    rotations[..., 2, 1] = cos_lambda * sin_phi
+    rotations[..., 2, 2] = sin_lambda
+
+    return origins, rotations
+
+
+class LocalTangentFrame:
+    """
+    East-North-Up Local Tangent Plane centered at the (WGS-84) Geodetic point (lat0, lon0, h0).
+
+    The origin's ECEF position and the 3x3 ECEF->ENU rotation matrix are computed once on
+    construction, so repeated conversions against a fixed origin (e.g. a camera mast) skip
+    the trig and prime-vertical radius work done by ecef_to_enu/enu_to_ecef on every call.
+
+    All methods accept either three scalars, returning a tuple of floats, or arrays in the
+    same layout as the *_batch functions, returning a (..., 3) array.
+    """
+    __slots__ = ('lat0', 'lon0', 'h0', 'origin', 'rotation', '_coeffs')
+
+    def __init__(self, lat0: float, lon0: float, h0: float):
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self.h0 = h0
+
+        lambd = math.radians(lat0)
+        phi = math.radians(lon0)
+        sin_lambda = math.sin(lambd)
+        cos_lambda = math.cos(lambd)
+        sin_phi = math.sin(phi)
+        cos_phi = math.cos(phi)
+        N = a / math.sqrt(1 - e_sq * sin_lambda * sin_lambda)
+
+        x0 = (h0 + N) * cos_lambda * cos_phi
+        y0 = (h0 + N) * cos_lambda * sin_phi
+        z0 = (h0 + (1 - e_sq) * N) * sin_lambda
+
+        # Rows are the East, North and Up unit vectors expressed in ECEF
+        coeffs = (x0, y0, z0,
+                  -sin_phi, cos_phi, 0.0,
+                  -sin_lambda * cos_phi, -sin_lambda * sin_phi, cos_lambda,
+                  cos_lambda * cos_phi, cos_lambda * sin_phi, sin_lambda)
+        self._coeffs = coeffs
+        self.origin = np.array(coeffs[:3])
+        self.rotation = np.array(coeffs[3:]).reshape(3, 3)
+
+    def __repr__(self):
+        return f"LocalTangentFrame({self.lat0!r}, {self.lon0!r}, {self.h0!r})"
+
+    def to_enu(self, x, y=None, z=None, out: Optional[np.ndarray] = None):
+        """
+        Converts ECEF coordinates (x, y, z) to ENU coordinates in this frame.
+
+        :param x: meters, or an (N, 3) array of (x, y, z)
+        :param y: meters
+        :param z: meters
+        :param out: optional (N, 3) float64 buffer that receives the result (array inputs only)
+        :returns: (xEast, yNorth, zUp) in [meters, meters, meters]
+        """
+        if _is_scalar_triple(x, y, z):
+            x0, y0, z0, e0, e1, e2, n0, n1, n2, u0, u1, u2 = self._coeffs
+            xd = x - x0
+            yd = y - y0
+            zd = z - z0
+            return (e0 * xd + e1 * yd + e2 * zd,
+                    n0 * xd + n1 * yd + n2 * zd,
+                    u0 * xd + u1 * yd + u2 * zd)
+
+        points = _stack_columns(x, y, z)
+        out = _output_buffer(out, points[..., 0])
+        return np.matmul(points - self.origin, self.rotation.T, out=out)
+
+    def from_enu(self, xEast, yNorth=None, zUp=None, out: Optional[np.ndarray] = None):
+        """
+        Converts ENU coordinates (xEast, yNorth, zUp) in this frame to ECEF coordinates.
+
+        :param xEast: meters, or an (N, 3) array of (xEast, yNorth, zUp)
+        :param yNorth: meters
+        :param zUp: meters
+        :param out: optional (N, 3) float64 buffer that receives the result (array inputs only)
+        :returns: (x, y, z) in [meters, meters, meters]
+        """
+        if _is_scalar_triple(xEast, yNorth, zUp):
+            x0, y0, z0, e0, e1, e2, n0, n1, n2, u0, u1, u2 = self._coeffs
+            return (e0 * xEast + n0 * yNorth + u0 * zUp + x0,
+                    e1 * xEast + n1 * yNorth + u1 * zUp + y0,
+                    e2 * xEast + n2 * yNorth + u2 * zUp + z0)
+
+        points = _stack_columns(xEast, yNorth, zUp)
+        out = _output_buffer(out, points[..., 0])
+        np.matmul(points, self.rotation, out=out)
+        out += self.origin
+        return out
+
+    def geodetic_to_enu(self, lat, lon=None, h=None, out: Optional[np.ndarray] = None):
+        """
+        Converts geodetic WGS-84 coordinates (lat, lon, h) to ENU coordinates in this frame.
+
+        :param lat: latitude in degrees, or an (N, 3) array of (lat, lon, h)
+        :param lon: longitude in degrees
+        :param h: meters
+        :param out: optional (N, 3) float64 buffer that receives the result (array inputs only)
+        :returns: (xEast, yNorth, zUp) in [meters, meters, meters]
+        """
+        if _is_scalar_triple(lat, lon, h):
+            return self.to_enu(*geodetic_to_ecef(lat, lon, h))
+        return self.to_enu(geodetic_to_ecef_batch(lat, lon, h), out=out)
+
+    def enu_to_geodetic(self, xEast, yNorth=None, zUp=None, out: Optional[np.ndarray] = None):
+        """
+        Converts ENU coordinates (xEast, yNorth, zUp) in this frame to geodetic WGS-84 coordinates.
+
+        :param xEast: meters, or an (N, 3) array of (xEast, yNorth, zUp)
+        :param yNorth: meters
+        :param zUp: meters
+        :param out: optional (N, 3) float64 buffer that receives the result (array inputs only)
+        :returns: (lat, lon, height) in [degrees, degrees, meters]
+        """
+        if _is_scalar_triple(xEast, yNorth, zUp):
+            return ecef_to_geodetic(*self.from_enu(xEast, yNorth, zUp))
+        return ecef_to_geodetic_batch(self.from_enu(xEast, yNorth, zUp), out=out)
+
+
+def _is_scalar_triple(c0, c1, c2) -> bool:
+    return c1 is not None and c2 is not None and np.ndim(c0) == 0 and np.ndim(c1) == 0 and np.ndim(c2) == 0
+
+
+def _stack_columns(c0, c1, c2) -> np.ndarray:
+    """
+    Returns a (..., 3) float array from either three array-likes or one (..., 3) array-like.
+    """
+    if c1 is None and c2 is None:
+        return _as_points(c0)
+    return np.stack(np.broadcast_arrays(*(np.asarray(c, dtype=float) for c in (c0, c1, c2))), axis=-1)
+
+
 def sacrs_to_geodetic(loMeridian: int, yWesting: int, xSouthing: int) -> Tuple[float, float]:
     """
     South African Coordinate Reference System (Hartebeesthoek94) to Geodetic
     From "CDNGI Coordinate Conversion Utility v1 Sep 2009.xls".
     CM = central meridian
+    Accepts scalars or arrays (each point may have its own central meridian).
 
     :param loMeridian: central meridian (Lo.) degrees
     :param yWesting: coordinates measured in meters from the CM of the respective zone, increasing from the CM (where Y=0) in a westerly direction. Y is +ve west of the CM and -ve east of the CM.
     :param xSouthing: coordinates measured in meters southwards from the equator, increasing from the equator (where X = 0m) towards the South Pole.
     :returns: (lat, lon) in [degree, degree]
     """
-    loMeridianRadians = deg2rad(loMeridian)
-    ec_sq = (a_sq - b_sq) / a_sq   # e^2   in "CDNGI Coordinate Conversion Utility v1 Sep 2009.xls"
-    ep_sq = (a_sq - b_sq) / b_sq   # e'^2
-    n = (a - b) / (a + b)
-    n_2 = n * n
-    n_3 = n_2 * n
-    n_4 = n_2 * n_2
-    n_5 = n_2 * n_3
-    p2 = 3.0 / 2.0 * n - 27.0 / 32.0 * n_3 + 269.0 / 512.0 * n_5
-    p4 = 21.0 / 16.0 * n_2 - 55.0 / 32.0 * n_4
-    p6 = 151.0 / 96.0 * n_3 - 417.0 / 128.0 * n_5
-    p8 = 1097.0 / 512.0 * n_4
-    p10 = 8011.0 / 2560.0 * n_5
-    a0 = 1.0 / (n + 1.0) * (1.0 + 1.0 / 4.0 * n_2 + 1.0 / 64.0 * n_4)
-    footBar = xSouthing / (a * a0)
-    foot = footBar + p2 * sin(2.0 * footBar) + p4 * sin(4.0 * footBar) + p6 * sin(6.0 * footBar) + p8 * sin(8.0 * footBar) + p10 * sin(10.0 * footBar)
-    Nf = a / sqrt(1.0 - ec_sq * sin(foot)**2)
-
-    b1 = 1.0 / (Nf * cos(foot))
-    b2 = tan(foot) / (2.0 * Nf * Nf * cos(foot))
-    b3 = (1.0 + 2.0 * tan(foot)**2 + ep_sq * cos(foot)**2) / (6.0 * Nf**3 * cos(foot))
-    b4 = (tan(foot) * (5.0 + 6.0 * tan(foot)**2 + ep_sq * cos(foot)**2)) / (24.0 * Nf**4 * cos(foot))
-    b5 = (5.0 + 28.0 * tan(foot)**2 + 24.0 * tan(foot)**4) / (120.0 * Nf**5 * cos(foot))
-    d1 = cos(foot) * (1.0 + ep_sq * cos(foot)**2)
-    d2 = -1.0 / 2.0 * cos(foot)**2 * tan(foot) * (1.0 + 4.0 * ep_sq * cos(foot)**2)
-
-    latRadians = -(foot - b2 * d1 * yWesting**2 + (b4 * d1 + b2 * b2 * d2) * yWesting**4)
-    lonRadians = loMeridianRadians - (b1 * yWesting - b3 * yWesting**3 + b5 * yWesting**5)
-    lat = rad2deg(latRadians)
-    lon = rad2deg(lonRadians)
+    ops = ops_for(loMeridian, yWesting, xSouthing)
+    loMeridianRadians = ops.radians(loMeridian)
+    ep_sq = _SACRS_EP_SQ
+
+    footBar = xSouthing / (a * _SACRS_A0)
+    foot = footBar + _sin_series(ops, _SACRS_FOOT_COEFFS, footBar)
+    sin_foot = ops.sin(foot)
+    cos_foot = ops.cos(foot)
+    tan_foot = sin_foot / cos_foot
+    cos_foot_2 = cos_foot * cos_foot
+    tan_foot_2 = tan_foot * tan_foot
+    Nf = a / ops.sqrt(1.0 - _SACRS_EC_SQ * sin_foot * sin_foot)
+    Nf_cos_foot = Nf * cos_foot
+    Nf_2 = Nf * Nf
+
+    b1 = 1.0 / Nf_cos_foot
+    b2 = tan_foot / (2.0 * Nf * Nf_cos_foot)
+    b3 = (1.0 + 2.0 * tan_foot_2 + ep_sq * cos_foot_2) / (6.0 * Nf_2 * Nf_cos_foot)
+    b4 = (tan_foot * (5.0 + 6.0 * tan_foot_2 + ep_sq * cos_foot_2)) / (24.0 * Nf_2 * Nf * Nf_cos_foot)
+    b5 = (5.0 + tan_foot_2 * (28.0 + 24.0 * tan_foot_2)) / (120.0 * Nf_2 * Nf_2 * Nf_cos_foot)
+    d1 = cos_foot * (1.0 + ep_sq * cos_foot_2)
+    d2 = -1.0 / 2.0 * cos_foot_2 * tan_foot * (1.0 + 4.0 * ep_sq * cos_foot_2)
+
+    # Horner form of the series in yWesting
+    y_2 = yWesting * yWesting
+    latRadians = -(foot + y_2 * (-b2 * d1 + y_2 * (b4 * d1 + b2 * b2 * d2)))
+    lonRadians = loMeridianRadians - yWesting * (b1 + y_2 * (-b3 + y_2 * b5))
+    lat = ops.degrees(latRadians)
+    lon = ops.degrees(lonRadians)
 
     return lat, lon
 
 
-def geodetic_to_sacrs(lat: float, lon: float) -> Tuple[float, float, float]:
+def geodetic_to_sacrs(lat: float, lon: float, loMeridian=None) -> Tuple[float, float]:
     """
-    South African Coordinate Reference System (Hartebeesthoek94) to Geodetic
+    Geodetic to South African Coordinate Reference System (Hartebeesthoek94)
     From "CDNGI Coordinate Conversion Utility v1 Sep 2009.xls"
+    Accepts scalars or arrays; the central meridian (Lo.) is chosen per point unless given.
 
     :param lat: latitude in degrees
     :param lon: longitude in degrees
-    :returns: (loMeridian, yWesting, xSouthing) in [degree, meters, meters]
+    :param loMeridian: central meridian (Lo.) degrees; default: sacrs_central_meridian(lon)
+    :returns: (xSouthing, yWesting) in [meters, meters], relative to the central meridian
     """
-    # longitude of origin
-    loMeridian = 2 * int(lon/2) + sign(lon)  # Take integer part of lon, rounded up to nearest odd number (or down if negative), so =ODD(TRUNC(lon))
-    loMeridianRadians = deg2rad(loMeridian)
-    ec_sq = (a_sq - b_sq) / a_sq   # e^2   in "CDNGI Coordinate Conversion Utility v1 Sep 2009.xls"
-    ep_sq = (a_sq - b_sq) / b_sq   # e'^2
-    n = (a - b) / (a + b)
-    n_2 = n * n
-    n_3 = n_2 * n
-    n_4 = n_2 * n_2
-    n_5 = n_2 * n_3
-    A0 = 1.0 / (n + 1.0) * (1.0 + 1.0 / 4.0 * n_2 + 1.0 / 64.0 * n_4)
-    A2 = -1.0 / (n + 1.0) * (3.0 / 2.0 * n - 3.0 / 16.0 * n_3 - 3.0 / 128.0 * n_5)
-    A4 = 1.0 / (n + 1.0) * (15.0 / 16.0 * n_2 - 15.0 / 64.0 * n_4)
-    A6 = -1.0 / (n + 1.0) * (35.0 / 48.0 * n_3 - 175.0 / 768.0 * n_5)
-    A8 = 1.0 / (n + 1.0) * (315.0 / 512.0 * n_4)
-    A10 = 1.0 / (n + 1.0) * (693.0 / 1280.0 * n_5)
-
-    latRadians = deg2rad(-lat)
-    lonRadians = deg2rad(lon)
-    G = a * (A0 * latRadians + A2 * sin(2 * latRadians) + A4 * sin(4 * latRadians) + A6 * sin(6 * latRadians) + A8 * sin(8 * latRadians) + A10 * sin(10 * latRadians))
-    N = a / sqrt(1.0 - ec_sq * sin(latRadians) * sin(latRadians))
-
-    latCos = cos(latRadians)
+    ops = ops_for(lat, lon)
+    if loMeridian is None:
+        loMeridian = sacrs_central_meridian(lon)
+    loMeridianRadians = ops.radians(loMeridian)
+    ep_sq = _SACRS_EP_SQ
+
+    latRadians = ops.radians(-lat)
+    lonRadians = ops.radians(lon)
+    G = a * (_SACRS_A0 * latRadians + _sin_series(ops, _SACRS_MERIDIAN_COEFFS, latRadians))
+    latSin = ops.sin(latRadians)
+    N = a / ops.sqrt(1.0 - _SACRS_EC_SQ * latSin * latSin)
+
+    latCos = ops.cos(latRadians)
     latCos_2 = latCos * latCos
-    latCos_3 = latCos_2 * latCos
     latCos_4 = latCos_2 * latCos_2
-    latCos_5 = latCos_4 * latCos
-    latTan = tan(latRadians)
+    latTan = latSin / latCos
     latTan_2 = latTan * latTan
-    latTan_4 = latTan_2 * latTan_2
-    a1 = N * latCos
-    a2 = -1.0 / 2.0 * N * latCos_2 * latTan
-    a3 = -1.0 / 6.0 * N * latCos_3 * (1.0 - latTan_2 + ep_sq * latCos_2)
-    a4 = 1.0 / 24.0 * N * latCos_4 * latTan * (5 - latTan_2 + 9.0 * ep_sq * latCos_2)
-    a5 = 1.0 / 120.0 * N * latCos_5 * (5.0 - 18.0 * latTan_2 + latTan_4)
+    N_latCos = N * latCos
+    a1 = N_latCos
+    a2 = -1.0 / 2.0 * N_latCos * latSin
+    a3 = -1.0 / 6.0 * N_latCos * latCos_2 * (1.0 - latTan_2 + ep_sq * latCos_2)
+    a4 = 1.0 / 24.0 * N_latCos * latCos_2 * latSin * (5 - latTan_2 + 9.0 * ep_sq * latCos_2)
+    a5 = 1.0 / 120.0 * N_latCos * latCos_4 * (5.0 + latTan_2 * (-18.0 + latTan_2))
+
+    # Horner form of the series in l
     l = lonRadians - loMeridianRadians
     l_2 = l * l
-    l_3 = l * l_2
-    l_4 = l_2 * l_2
-    l_5 = l_2 * l_3
-    xSouthing = G - a2 * l_2 + a4 * l_4
-    yWesting = -(a1 * l - a3 * l_3 + a5 * l_5)
+    xSouthing = G + l_2 * (-a2 + l_2 * a4)
+    yWesting = -l * (a1 + l_2 * (-a3 + l_2 * a5))
 
     return xSouthing, yWesting
+
+
+def sacrs_central_meridian(lon):
+    """
+    Central meridian (Lo.) of the SACRS zone containing `lon`: the integer part of lon,
+    rounded up to the nearest odd number (or down if negative), so =ODD(TRUNC(lon)).
+
+    :param lon: longitude in degrees, scalar or array
+    :returns: central meridian in degrees
+    """
+    if is_scalar(lon):
+        return 2 * int(lon / 2) + (lon > 0) - (lon < 0)
+    lon = np.asarray(lon, dtype=float)
+    return 2 * np.trunc(lon / 2) + sign(lon)
+
+
+def _sin_series(ops, coeffs, x):
+    """
+    Evaluates sum(coeffs[k-1] * sin(2k * x) for k = 1..len(coeffs)) with Clenshaw's recurrence,
+    which needs one sin and one cos instead of one sin per term.
+    """
+    theta = 2.0 * x
+    two_cos_theta = 2.0 * ops.cos(theta)
+    b_1 = 0.0
+    b_2 = 0.0
+    for coeff in reversed(coeffs):
+        b_1, b_2 = coeff + two_cos_theta * b_1 - b_2, b_1
+    return b_1 * ops.sin(theta)
+
+
+def _sacrs_coefficients():
+    """
+    Ellipsoid-dependent coefficients of the SACRS (Gauss conform) series, computed once at import.
+    """
+    n = (a - b) / (a + b)
+    n_2 = n * n
+    n_3 = n_2 * n
+    n_4 = n_2 * n_2
+    n_5 = n_2 * n_3
+    # Foot-point latitude series (p2, p4, ..., p10)
+    foot_coeffs = (
+        3.0 / 2.0 * n - 27.0 / 32.0 * n_3 + 269.0 / 512.0 * n_5,
+        21.0 / 16.0 * n_2 - 55.0 / 32.0 * n_4,
+        151.0 / 96.0 * n_3 - 417.0 / 128.0 * n_5,
+        1097.0 / 512.0 * n_4,
+        8011.0 / 2560.0 * n_5,
+    )
+    # Meridian arc series (A0; A2, A4, ..., A10)
+    A0 = 1.0 / (n + 1.0) * (1.0 + 1.0 / 4.0 * n_2 + 1.0 / 64.0 * n_4)
+    meridian_coeffs = (
+        -1.0 / (n + 1.0) * (3.0 / 2.0 * n - 3.0 / 16.0 * n_3 - 3.0 / 128.0 * n_5),
+        1.0 / (n + 1.0) * (15.0 / 16.0 * n_2 - 15.0 / 64.0 * n_4),
+        -1.0 / (n + 1.0) * (35.0 / 48.0 * n_3 - 175.0 / 768.0 * n_5),
+        1.0 / (n + 1.0) * (315.0 / 512.0 * n_4),
+        1.0 / (n + 1.0) * (693.0 / 1280.0 * n_5),
+    )
+    return foot_coeffs, A0, meridian_coeffs
+
+
+_SACRS_EC_SQ = (a_sq - b_sq) / a_sq   # e^2   in "CDNGI Coordinate Conversion Utility v1 Sep 2009.xls"
+_SACRS_EP_SQ = (a_sq - b_sq) / b_sq   # e'^2
+_SACRS_FOOT_COEFFS, _SACRS_A0, _SACRS_MERIDIAN_COEFFS = _sacrs_coefficients()
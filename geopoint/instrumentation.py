@@ -0,0 +1,244 @@
+# Opt-in instrumentation of the public conversion and pan/tilt functions.
+#
+# enable() replaces the public functions of geo_convert, pan_tilt and rotational_matrices (and
+# the public methods of their classes) with timing wrappers, everywhere they are referenced from
+# the loaded geopoint modules; disable() puts the originals back, so when instrumentation is off
+# the hot paths run exactly the uninstrumented code. Modules imported after enable() keep the
+# original functions in their own namespace.
+#
+# Every thread records into its own counters (no locks on the hot path): call counts, points
+# processed, cumulative and maximum latency, and a log-linear latency histogram (8 buckets per
+# power of two, so percentiles are accurate to about 10%). snapshot() merges the threads.
+# Latencies are inclusive: geodetic_to_pan_tilt_with_offsets also counts the geodetic_to_enu
+# call it makes.
+
+import functools
+import inspect
+import sys
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+
+MODULES = ('geopoint.geo_convert', 'geopoint.pan_tilt', 'geopoint.rotational_matrices')
+PERCENTILES = (50, 90, 99)
+
+_SUB_BUCKETS = 8
+_BUCKETS = 64 * _SUB_BUCKETS
+
+_local = threading.local()
+_thread_stats = []            # the stats dicts of all threads that recorded something
+_registry_lock = threading.Lock()
+_patched = []                 # (owner, attribute, original) to restore on disable()
+_enabled = False
+
+
+class CallStats:
+    """
+    Counters of one function in one thread.
+    """
+    __slots__ = ('calls', 'points', 'total_ns', 'max_ns', 'histogram')
+
+    def __init__(self):
+        self.calls = 0
+        self.points = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.histogram = [0] * _BUCKETS
+
+
+def _bucket(ns: int) -> int:
+    bits = ns.bit_length()
+    if bits <= 3:
+        return ns
+    return (bits - 3) * _SUB_BUCKETS + ((ns >> (bits - 4)) & (_SUB_BUCKETS - 1))
+
+
+def _bucket_upper_ns(bucket: int) -> float:
+    if bucket < _SUB_BUCKETS:
+        return bucket + 1.0
+    octave, sub = divmod(bucket, _SUB_BUCKETS)
+    return float((_SUB_BUCKETS + sub + 1) << (octave - 1))
+
+
+def _points(value) -> int:
+    shape = np.shape(value) if isinstance(value, (np.ndarray, list, tuple)) else ()
+    return shape[0] if shape else 1
+
+
+def _stats_of_thread() -> dict:
+    try:
+        return _local.stats
+    except AttributeError:
+        stats = _local.stats = {}
+        with _registry_lock:
+            _thread_stats.append(stats)
+        return stats
+
+
+def _record(name: str, elapsed_ns: int, points: int):
+    stats = _stats_of_thread()
+    entry = stats.get(name)
+    if entry is None:
+        entry = stats[name] = CallStats()
+    entry.calls += 1
+    entry.points += points
+    entry.total_ns += elapsed_ns
+    if elapsed_ns > entry.max_ns:
+        entry.max_ns = elapsed_ns
+    entry.histogram[min(_bucket(elapsed_ns), _BUCKETS - 1)] += 1
+
+
+def _instrument(name: str, func, first_point_argument: int):
+    clock = time.perf_counter_ns
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = clock() - start
+            _record(name, elapsed, _points(args[first_point_argument]) if len(args) > first_point_argument else 1)
+
+    return wrapper
+
+
+def _public_callables(module):
+    """
+    Yields (owner, attribute, name, function, first point argument) of the public functions of
+    `module` and the public methods of its classes.
+    """
+    for attribute, value in vars(module).items():
+        if attribute.startswith('_') or getattr(value, '__module__', None) != module.__name__:
+            continue
+        if inspect.isfunction(value):
+            yield module, attribute, f"{module.__name__}.{attribute}", value, 0
+        elif inspect.isclass(value):
+            for method_name, method in vars(value).items():
+                if not method_name.startswith('_') and inspect.isfunction(method):
+                    yield value, method_name, f"{module.__name__}.{attribute}.{method_name}", method, 1
+
+
+def enable():
+    """
+    Turns instrumentation on. Does nothing if it is already on.
+    """
+    global _enabled
+    if _enabled:
+        return
+    loaded = [sys.modules[name] for name in MODULES if name in sys.modules]
+    geopoint_modules = [module for name, module in list(sys.modules.items()) if name.startswith('geopoint.') and module is not None]
+    wrappers = {}
+    for module in loaded:
+        for owner, attribute, name, func, first_point_argument in _public_callables(module):
+            wrapper = _instrument(name, func, first_point_argument)
+            wrappers[id(func)] = (func, wrapper)
+            setattr(owner, attribute, wrapper)
+            _patched.append((owner, attribute, func))
+
+    # Functions imported by name into other modules, e.g. geodetic_to_enu in pan_tilt
+    for module in geopoint_modules:
+        if module.__name__ == __name__:
+            continue
+        for attribute, value in list(vars(module).items()):
+            replacement = wrappers.get(id(value))
+            if replacement is not None and replacement[0] is value:
+                setattr(module, attribute, replacement[1])
+                _patched.append((module, attribute, value))
+    _enabled = True
+
+
+def disable():
+    """
+    Restores the original functions. The recorded counters are kept.
+    """
+    global _enabled
+    while _patched:
+        owner, attribute, original = _patched.pop()
+        setattr(owner, attribute, original)
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    """
+    Clears the counters of all threads.
+    """
+    with _registry_lock:
+        for stats in _thread_stats:
+            stats.clear()
+
+
+def snapshot() -> dict:
+    """
+    Counters of all threads, merged per function.
+
+    :returns: {function name: {'calls', 'points', 'total_s', 'mean_s', 'max_s', 'p50_s', 'p90_s', 'p99_s'}}
+    """
+    merged = {}
+    with _registry_lock:
+        thread_stats = [dict(stats) for stats in _thread_stats]
+    for stats in thread_stats:
+        for name, entry in stats.items():
+            total = merged.get(name)
+            if total is None:
+                total = merged[name] = CallStats()
+            total.calls += entry.calls
+            total.points += entry.points
+            total.total_ns += entry.total_ns
+            total.max_ns = max(total.max_ns, entry.max_ns)
+            total.histogram = [a + b for a, b in zip(total.histogram, entry.histogram)]
+
+    result = {}
+    for name, total in sorted(merged.items()):
+        if total.calls == 0:
+            continue
+        summary = {
+            'calls': total.calls,
+            'points': total.points,
+            'total_s': total.total_ns * 1e-9,
+            'mean_s': total.total_ns * 1e-9 / total.calls,
+            'max_s': total.max_ns * 1e-9,
+        }
+        cumulative = np.cumsum(total.histogram)
+        for percentile in PERCENTILES:
+            bucket = int(np.searchsorted(cumulative, percentile / 100.0 * total.calls))
+            summary[f'p{percentile}_s'] = min(_bucket_upper_ns(bucket), total.max_ns) * 1e-9
+        result[name] = summary
+    return result
+
+
+class Profile:
+    """
+    Result of a profiling() block; `stats` holds the snapshot taken when the block ended.
+    """
+    __slots__ = ('stats',)
+
+    def __init__(self):
+        self.stats = {}
+
+
+@contextmanager
+def profiling():
+    """
+    Scoped profiling: resets the counters, enables instrumentation for the block (restoring the
+    previous state afterwards) and stores the snapshot in the yielded Profile.
+
+        with profiling() as profile:
+            tracker_tick()
+        export(profile.stats)
+    """
+    was_enabled = _enabled
+    reset()
+    enable()
+    profile = Profile()
+    try:
+        yield profile
+    finally:
+        profile.stats = snapshot()
+        if not was_enabled:
+            disable()
@@ -0,0 +1,162 @@
+# Pan/tilt for pointing units (PU) on moving platforms, e.g. vehicle- or vessel-mounted cameras.
+#
+# Every target sample comes with its own origin pose (lat, lon, h, north, pitch, roll). The
+# ECEF->ENU rotation of the origin only depends on its latitude and longitude and changes by at
+# most the angle the platform moved over the earth's surface, so consecutive origins that stay
+# within `max_frame_error` degrees of each other share one rotation (computed once per run of
+# samples); only the translation (the origin's ECEF position) is updated per sample.
+# Trajectories sampled at their own rate (e.g. an INS at 50 Hz) are interpolated to the target
+# timestamps with PlatformTrajectory.
+
+from typing import NamedTuple
+import numpy as np
+from geopoint.geo_convert import geodetic_to_ecef_batch, enu_frames_batch
+from geopoint.rotational_matrices import rotation_matrices_zyx
+
+
+class PlatformPose(NamedTuple):
+    lat: np.ndarray
+    lon: np.ndarray
+    h: np.ndarray
+    north: np.ndarray
+    pitch: np.ndarray
+    roll: np.ndarray
+
+
+def frame_keys(origin_lat, origin_lon, max_frame_error: float = 1e-5) -> np.ndarray:
+    """
+    Groups consecutive origins into runs that can share one ECEF->ENU rotation.
+
+    A run is cut whenever the angular path length travelled since its first origin reaches
+    max_frame_error (measured as hypot(dlat, dlon), which bounds the rotation between the frames),
+    so the rotation of the run's first origin is within max_frame_error degrees of the exact
+    rotation of every origin in the run.
+
+    :param origin_lat: (N,) latitudes in degrees, in sample order
+    :param origin_lon: (N,) longitudes in degrees, in sample order
+    :param max_frame_error: degrees, 0 to give every origin its own frame
+    :returns: (N,) index of the origin whose frame each sample uses (non-decreasing)
+    """
+    origin_lat = np.atleast_1d(np.asarray(origin_lat, dtype=float))
+    origin_lon = np.atleast_1d(np.asarray(origin_lon, dtype=float))
+    count = len(origin_lat)
+    if count == 0 or max_frame_error <= 0:
+        return np.arange(count)
+
+    step = np.hypot(np.diff(origin_lat), (np.diff(origin_lon) + 180.0) % 360.0 - 180.0)
+    path = np.concatenate(([0.0], np.cumsum(step)))
+    # Cells of max_frame_error along the path; a new run starts at the first sample of each cell,
+    # so the path length from a run's first sample to any of its samples is below max_frame_error
+    cell = np.floor(path / max_frame_error)
+    new_run = np.concatenate(([True], cell[1:] != cell[:-1]))
+    return np.flatnonzero(new_run)[np.cumsum(new_run) - 1]
+
+
+def moving_platform_pan_tilt(target_lat, target_lon, target_h, origin_lat, origin_lon, origin_h, north_offset=0, pitch_offset=0, roll_offset=0, max_frame_error: float = 1e-5):
+    """
+    Pan/tilt angles and range from a moving PU to its targets, one origin pose per target sample.
+
+    All arguments are (N,) arrays aligned with each other (or scalars, broadcast to N samples).
+    Gives the same angles as PanTiltSolver((origin_lat[i], origin_lon[i], origin_h[i]),
+    north_offset[i], pitch_offset[i], roll_offset[i]).solve(...) for every sample, to within
+    max_frame_error degrees.
+
+    :param target_lat: degrees
+    :param target_lon: degrees
+    :param target_h: meters
+    :param origin_lat: degrees
+    :param origin_lon: degrees
+    :param origin_h: meters
+    :param north_offset: degrees
+    :param pitch_offset: degrees
+    :param roll_offset: degrees
+    :param max_frame_error: largest rotation in degrees between an origin's exact ENU frame and the frame it reuses
+    :returns: (pan, tilt, range) as (N,) arrays in [degrees, degrees, meters]
+    """
+    columns = np.broadcast_arrays(*(np.atleast_1d(np.asarray(c, dtype=float)) for c in
+                                    (target_lat, target_lon, target_h, origin_lat, origin_lon, origin_h, north_offset, pitch_offset, roll_offset)))
+    target_lat, target_lon, target_h, origin_lat, origin_lon, origin_h, north_offset, pitch_offset, roll_offset = columns
+
+    keys = frame_keys(origin_lat, origin_lon, max_frame_error)
+    unique_keys, run = np.unique(keys, return_inverse=True)
+    _, enu_rotations = enu_frames_batch(origin_lat[unique_keys], origin_lon[unique_keys], 0.0)
+
+    # Per-sample translation, per-run ECEF->ENU rotation, per-sample attitude
+    delta = geodetic_to_ecef_batch(target_lat, target_lon, target_h) - geodetic_to_ecef_batch(origin_lat, origin_lon, origin_h)
+    enu = np.einsum('nij,nj->ni', enu_rotations[run], delta)
+    body_from_enu = rotation_matrices_zyx(north_offset, pitch_offset, roll_offset)
+    body = np.einsum('nij,nj->ni', np.broadcast_to(body_from_enu, (len(enu), 3, 3)), enu)
+
+    x, y, z = body[:, 0], body[:, 1], body[:, 2]
+    horizontal = np.hypot(x, y)
+    return np.rad2deg(np.arctan2(y, x)), np.rad2deg(np.arctan2(z, horizontal)), np.hypot(horizontal, z)
+
+
+class PlatformTrajectory:
+    """
+    Time-stamped pose samples of a moving platform, interpolated linearly to arbitrary times.
+
+    Longitudes and north offsets are unwrapped before interpolating, so trajectories crossing the
+    antimeridian and headings crossing +-180 degrees interpolate the short way round. Times outside
+    the sampled interval get the first or last pose.
+
+    :param times: (M,) increasing sample times in seconds
+    :param lat: (M,) degrees
+    :param lon: (M,) degrees
+    :param h: (M,) meters
+    :param north: (M,) north offset (heading) in degrees, or a scalar
+    :param pitch: (M,) pitch offset in degrees, or a scalar
+    :param roll: (M,) roll offset in degrees, or a scalar
+    """
+
+    def __init__(self, times, lat, lon, h, north=0, pitch=0, roll=0):
+        times = np.asarray(times, dtype=float)
+        if times.ndim != 1 or len(times) == 0:
+            raise ValueError("times must be a non-empty 1D array")
+        if np.any(np.diff(times) <= 0):
+            raise ValueError("times must be strictly increasing")
+        columns = [np.broadcast_to(np.asarray(c, dtype=float), times.shape) for c in (lat, lon, h, north, pitch, roll)]
+        self.times = times
+        self.lat, self.lon, self.h, self.north, self.pitch, self.roll = columns
+        self._lon_unwrapped = np.unwrap(self.lon, period=360.0)
+        self._north_unwrapped = np.unwrap(self.north, period=360.0)
+
+    def __len__(self):
+        return len(self.times)
+
+    def interpolate(self, at_times) -> PlatformPose:
+        """
+        Poses of the platform at the given times.
+
+        :param at_times: (N,) times in seconds
+        :returns: PlatformPose of (N,) arrays
+        """
+        at_times = np.asarray(at_times, dtype=float)
+        times = self.times
+
+        def interp(values):
+            return np.interp(at_times, times, values)
+
+        return PlatformPose(
+            interp(self.lat),
+            (interp(self._lon_unwrapped) + 180.0) % 360.0 - 180.0,
+            interp(self.h),
+            (interp(self._north_unwrapped) + 180.0) % 360.0 - 180.0,
+            interp(self.pitch),
+            interp(self.roll),
+        )
+
+    def pan_tilt(self, timestamps, lat, lon, h, max_frame_error: float = 1e-5):
+        """
+        Pan/tilt angles and range to targets observed at `timestamps`, from the platform's
+        interpolated pose at those times. See moving_platform_pan_tilt.
+
+        :param timestamps: (N,) seconds
+        :param lat: (N,) target latitudes in degrees
+        :param lon: (N,) target longitudes in degrees
+        :param h: (N,) target heights in meters
+        :param max_frame_error: degrees
+        :returns: (pan, tilt, range) as (N,) arrays in [degrees, degrees, meters]
+        """
+        pose = self.interpolate(timestamps)
+        return moving_platform_pan_tilt(lat, lon, h, pose.lat, pose.lon, pose.h, pose.north, pose.pitch, pose.roll, max_frame_error)
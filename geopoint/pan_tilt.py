@@ -1,28 +1,33 @@
+import math
 import numpy as np
-from geopoint.geo_convert import geodetic_to_enu
-from geopoint.rotational_matrices import offset_north_pitch_roll
+from geopoint.geo_convert import a, b, e_sq, geodetic_to_enu, geodetic_to_ecef, geodetic_to_ecef_batch, ecef_to_geodetic_batch, enu_frames_batch, LocalTangentFrame
+from geopoint.rotational_matrices import offset_north_pitch_roll, rotation_matrices_zyx, Rx, Ry, Rz
+from geopoint.dispatch import ops_for, is_scalar
 
 # Decompose pan tilt angles from a cartesian coordinate system
+# (plain floats are evaluated with the math module, arrays with NumPy; see geopoint/dispatch.py)
 def cartesian_to_spherical(x, y, z):
+    ops = ops_for(x, y, z)
     # pan = tan^-1( y/x )
-    azimuth = np.rad2deg(
-        np.arctan2(y, x)
+    azimuth = ops.degrees(
+        ops.atan2(y, x)
     )
     # tilt = tan^-1( sqrt(x^2 + y^2) )
-    elevation = np.rad2deg(
-        np.arctan2(z, np.sqrt(x**2 + y**2))
+    elevation = ops.degrees(
+        ops.atan2(z, ops.sqrt(x**2 + y**2))
     )
     # radius = sqrt(x^2 + y^2 + z^2)
-    r = np.sqrt(x**2 + y**2 + z**2)
+    r = ops.sqrt(x**2 + y**2 + z**2)
     
     return azimuth, elevation, r
 
 def spherical_to_cartesian(azimuth, elevation, r):
-    azimuth = np.deg2rad(azimuth)
-    elevation = np.deg2rad(elevation)
-    x = r * np.cos(elevation) * np.cos(azimuth)
-    y = r * np.cos(elevation) * np.sin(azimuth)
-    z = r * np.sin(elevation)
+    ops = ops_for(azimuth, elevation, r)
+    azimuth = ops.radians(azimuth)
+    elevation = ops.radians(elevation)
+    x = r * ops.cos(elevation) * ops.cos(azimuth)
+    y = r * ops.cos(elevation) * ops.sin(azimuth)
+    z = r * ops.sin(elevation)
     return x, y, z
 
 def xyz_to_pan_tilt(x, y, z):
@@ -44,14 +49,370 @@ def geodetic_to_pan_tilt_with_offsets(target_lat, target_lon, target_h, origin_l
 def geodetic_to_pan_tilt(target_lat, target_lon, target_h, origin_lat, origin_lon, origin_h, north_offset):
     return geodetic_to_pan_tilt_with_offsets(target_lat, target_lon, target_h, origin_lat, origin_lon, origin_h, north_offset, 0, 0)
 
-def pan_tilt_to_target_geodetic(pan, tilt, dist, max_view_distance):
+# Scratch bytes per (camera, target) pair: ECEF difference (3 floats), body coordinates (3) and horizontal range (1)
+_PAIRWISE_BYTES_PER_PAIR = 7 * 8
+
+def geodetic_to_pan_tilt_pairwise(target_lat, target_lon, target_h, origin_lat, origin_lon, origin_h, north_offset, pitch_offset, roll_offset, memory_budget=64 * 2**20):
+    """
+    Calculates pan/tilt angles and ranges from each of M pointing units to each of N targets.
+
+    The targets are converted to ECEF once and every PU gets a single fused ECEF->body matrix.
+    The (M, N, 3) intermediates are processed in blocks of cameras x targets so that the scratch
+    memory stays within `memory_budget` bytes (the (M, N) results themselves are not counted).
+
+    :param target_lat: (N,) latitudes of the targets in degrees
+    :param target_lon: (N,) longitudes of the targets in degrees
+    :param target_h: (N,) heights of the targets in meters
+    :param origin_lat: (M,) latitudes of the PUs in degrees
+    :param origin_lon: (M,) longitudes of the PUs in degrees
+    :param origin_h: (M,) heights of the PUs in meters
+    :param north_offset: (M,) or scalar north offsets in degrees
+    :param pitch_offset: (M,) or scalar pitch offsets in degrees
+    :param roll_offset: (M,) or scalar roll offsets in degrees
+    :param memory_budget: maximum number of bytes used for intermediates
+    :returns: (pan, tilt, range) as (M, N) arrays in [degrees, degrees, meters]
+    """
+    targets = geodetic_to_ecef_batch(np.atleast_1d(target_lat), np.atleast_1d(target_lon), np.atleast_1d(target_h))
+    origins, enu_rotations = enu_frames_batch(np.atleast_1d(origin_lat), np.atleast_1d(origin_lon), np.atleast_1d(origin_h))
+    n_cameras, n_targets = len(origins), len(targets)
+    body_rotations = np.broadcast_to(rotation_matrices_zyx(north_offset, pitch_offset, roll_offset), enu_rotations.shape)
+    matrices = np.matmul(body_rotations, enu_rotations)
+
+    pan = np.empty((n_cameras, n_targets))
+    tilt = np.empty((n_cameras, n_targets))
+    r = np.empty((n_cameras, n_targets))
+
+    max_pairs = max(1, memory_budget // _PAIRWISE_BYTES_PER_PAIR)
+    target_block = max(1, min(n_targets, max_pairs))
+    camera_block = max(1, min(n_cameras, max_pairs // target_block))
+    diff_buffer = np.empty((camera_block, target_block, 3))
+    body_buffer = np.empty((camera_block, target_block, 3))
+    horizontal_buffer = np.empty((camera_block, target_block))
+
+    for m0 in range(0, n_cameras, camera_block):
+        m1 = min(m0 + camera_block, n_cameras)
+        for n0 in range(0, n_targets, target_block):
+            n1 = min(n0 + target_block, n_targets)
+            diff = diff_buffer[:m1 - m0, :n1 - n0]
+            body = body_buffer[:m1 - m0, :n1 - n0]
+            horizontal = horizontal_buffer[:m1 - m0, :n1 - n0]
+
+            np.subtract(targets[None, n0:n1, :], origins[m0:m1, None, :], out=diff)
+            np.einsum('mij,mnj->mni', matrices[m0:m1], diff, out=body)
+            x_body, y_body, z_body = body[..., 0], body[..., 1], body[..., 2]
+
+            np.hypot(x_body, y_body, out=horizontal)
+            np.rad2deg(np.arctan2(y_body, x_body, out=pan[m0:m1, n0:n1]), out=pan[m0:m1, n0:n1])
+            np.rad2deg(np.arctan2(z_body, horizontal, out=tilt[m0:m1, n0:n1]), out=tilt[m0:m1, n0:n1])
+            np.hypot(horizontal, z_body, out=r[m0:m1, n0:n1])
+
+    return pan, tilt, r
+
+def pan_tilt_to_target_geodetic(pan, tilt, dist, max_view_distance, origin_lat, origin_lon, origin_h, north_offset=0, pitch_offset=0, roll_offset=0, terrain_height=0.0, terrain=None):
     """
-    NOT IMPLEMENTED!
-    The function should construct a dome around the PU with radius=max_view_distances.
-    The target (lat,lon,h) is then calculated as the intersection between the ray given by
-    the pan/tilt angle and on of the following:
-    a. earth's surfce
+    Geolocates the point a pointing unit (PU) is looking at, e.g. when clicking in the camera view.
+
+    A dome with radius=max_view_distance is constructed around the PU. The target (lat, lon, h)
+    is then calculated as the nearest intersection between the ray given by the pan/tilt angle
+    and one of the following:
+    a. earth's surface (the WGS-84 ellipsoid raised by terrain_height, or the elevation model `terrain`)
     b. the dome's surface
-    c. The dist parameter
+    c. the dist parameter (None to ignore it, or NaN for individual rays)
+
+    Accepts scalars or arrays of (pan, tilt), e.g. a whole grid of rays for a video frame.
+    Rays that hit nothing within the limits (e.g. pointing to the sky with max_view_distance=inf)
+    give NaN coordinates.
+
+    :param pan: pan angles in degrees
+    :param tilt: tilt angles in degrees
+    :param dist: distance to the target along the ray in meters, or None
+    :param max_view_distance: radius of the dome in meters
+    :param origin_lat: latitude of the PU in degrees
+    :param origin_lon: longitude of the PU in degrees
+    :param origin_h: height of the PU in meters
+    :param north_offset: degrees
+    :param pitch_offset: degrees
+    :param roll_offset: degrees
+    :param terrain_height: height of the ground above the ellipsoid in meters
+    :param terrain: optional geopoint.terrain.ElevationModel to cast the rays against instead of the raised ellipsoid
+    :returns: (lat, lon, h) in [degrees, degrees, meters]
+    """
+    solver = PanTiltSolver((origin_lat, origin_lon, origin_h), north_offset, pitch_offset, roll_offset)
+    return solver.pan_tilt_to_geodetic(pan, tilt, dist, max_view_distance, terrain_height, terrain)
+
+def ray_ellipsoid_distance(origins, directions, height=0.0):
+    """
+    Distance along unit `directions` from ECEF `origins` to the first intersection with the WGS-84
+    ellipsoid raised by `height` (approximated by adding `height` to both semi-axes).
+    Rays that miss the ellipsoid, or only intersect it behind the origin, give inf.
+
+    :param origins: (..., 3) ECEF positions in meters
+    :param directions: (..., 3) ECEF unit vectors
+    :param height: meters, scalar or broadcastable to the rays
+    :returns: (...) distances in meters
+    """
+    height = np.asarray(height, dtype=float)
+    semi_major = a + height
+    semi_minor = b + height
+    scale = np.stack(np.broadcast_arrays(semi_major, semi_major, semi_minor), axis=-1)
+    w = origins / scale
+    u = directions / scale
+
+    # |u|^2 t^2 + 2 (u.w) t + (|w|^2 - 1) = 0, solved in the numerically stable form
+    uu = np.einsum('...i,...i->...', u, u)
+    uw = np.einsum('...i,...i->...', u, w)
+    c = np.einsum('...i,...i->...', w, w) - 1.0
+    discriminant = uw * uw - uu * c
+    hit = discriminant >= 0
+    q = -(uw + np.copysign(np.sqrt(np.where(hit, discriminant, 0.0)), uw))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t1 = q / uu
+        t2 = c / q
+    near = np.fmin(t1, t2)
+    far = np.fmax(t1, t2)
+    distance = np.where(near > 0, near, np.where(far > 0, far, np.inf))
+    return np.where(hit, distance, np.inf)
+
+class PanTiltSolver:
+    """
+    Pan/tilt solver for a pointing unit (PU) at a fixed position with fixed north, pitch and roll offsets.
+
+    The ECEF->ENU rotation of the origin and the Rz(north+90), Ry(pitch) and Rx(roll) rotations
+    are fused into a single 3x3 ECEF->body matrix on construction, so solving a target is one
+    ECEF conversion, one matrix product and one atan2 pass. Gives the same angles as
+    geodetic_to_pan_tilt_with_offsets(target..., origin..., north, pitch, roll).
+
+    :param origin: (lat, lon, h) of the PU in [degrees, degrees, meters]
+    :param north: north offset in degrees
+    :param pitch: pitch offset in degrees
+    :param roll: roll offset in degrees
+    """
+    __slots__ = ('frame', 'north', 'pitch', 'roll', 'matrix', '_coeffs')
+
+    def __init__(self, origin, north: float = 0, pitch: float = 0, roll: float = 0):
+        self.frame = LocalTangentFrame(*origin)
+        self.matrix = np.empty((3, 3))
+        self.set_offsets(north, pitch, roll)
+
+    def __repr__(self):
+        frame = self.frame
+        return f"PanTiltSolver(({frame.lat0!r}, {frame.lon0!r}, {frame.h0!r}), {self.north!r}, {self.pitch!r}, {self.roll!r})"
+
+    def set_offsets(self, north: float = None, pitch: float = None, roll: float = None):
+        """
+        Updates the offsets in place (e.g. after recalibrating the PU). Offsets given as None are kept.
+        """
+        if north is not None:
+            self.north = north
+        if pitch is not None:
+            self.pitch = pitch
+        if roll is not None:
+            self.roll = roll
+        body_from_enu = Rx(self.roll) @ Ry(self.pitch) @ Rz(self.north + 90)
+        np.matmul(body_from_enu, self.frame.rotation, out=self.matrix)
+        self._coeffs = tuple(self.matrix.ravel().tolist())
+
+    def ecef_to_body(self, x, y=None, z=None):
+        """
+        Converts ECEF coordinates to the PU's body coordinates.
+
+        :param x: meters, or an (N, 3) array of (x, y, z)
+        :param y: meters
+        :param z: meters
+        :returns: (x, y, z) body coordinates for scalars, or an (N, 3) array
+        """
+        if y is not None and z is not None and np.ndim(x) == 0 and np.ndim(y) == 0 and np.ndim(z) == 0:
+            x0, y0, z0 = self.frame._coeffs[:3]
+            m00, m01, m02, m10, m11, m12, m20, m21, m22 = self._coeffs
+            xd = x - x0
+            yd = y - y0
+            zd = z - z0
+            return (m00 * xd + m01 * yd + m02 * zd,
+                    m10 * xd + m11 * yd + m12 * zd,
+                    m20 * xd + m21 * yd + m22 * zd)
+
+        if y is None and z is None:
+            points = np.asarray(x, dtype=float)
+        else:
+            points = np.stack(np.broadcast_arrays(*(np.asarray(c, dtype=float) for c in (x, y, z))), axis=-1)
+        return (points - self.frame.origin) @ self.matrix.T
+
+    def solve_ecef(self, x, y=None, z=None):
+        """
+        Calculates the pan/tilt angles and range to targets given in ECEF coordinates.
+
+        :param x: meters, or an (N, 3) array of (x, y, z)
+        :param y: meters
+        :param z: meters
+        :returns: (pan, tilt, range) in [degrees, degrees, meters]
+        """
+        body = self.ecef_to_body(x, y, z)
+        if isinstance(body, tuple):
+            x_body, y_body, z_body = body
+            horizontal = math.hypot(x_body, y_body)
+            return (math.degrees(math.atan2(y_body, x_body)),
+                    math.degrees(math.atan2(z_body, horizontal)),
+                    math.hypot(horizontal, z_body))
+        x_body, y_body, z_body = body[..., 0], body[..., 1], body[..., 2]
+        horizontal = np.hypot(x_body, y_body)
+        return (np.rad2deg(np.arctan2(y_body, x_body)),
+                np.rad2deg(np.arctan2(z_body, horizontal)),
+                np.hypot(horizontal, z_body))
+
+    def solve(self, lat, lon=None, h=None):
+        """
+        Calculates the pan/tilt angles needed to look at targets given in geodetic WGS-84 coordinates.
+
+        :param lat: latitude in degrees, or an (N, 3) array of (lat, lon, h)
+        :param lon: longitude in degrees
+        :param h: meters
+        :returns: (pan, tilt) in [degrees, degrees]
+        """
+        pan, tilt, _ = self.solve_with_range(lat, lon, h)
+        return pan, tilt
+
+    def solve_with_range(self, lat, lon=None, h=None):
+        """
+        Same as solve, but also returns the range to the targets.
+
+        :returns: (pan, tilt, range) in [degrees, degrees, meters]
+        """
+        if lon is not None and h is not None and np.ndim(lat) == 0 and np.ndim(lon) == 0 and np.ndim(h) == 0:
+            return self.solve_ecef(*geodetic_to_ecef(lat, lon, h))
+        return self.solve_ecef(geodetic_to_ecef_batch(lat, lon, h))
+
+    def pan_tilt_to_ecef_direction(self, pan, tilt):
+        """
+        ECEF unit vectors of the rays leaving the PU at the given pan/tilt angles.
+
+        :param pan: degrees, scalar or array
+        :param tilt: degrees, scalar or array
+        :returns: (..., 3) array of ECEF unit vectors
+        """
+        x_body, y_body, z_body = spherical_to_cartesian(np.asarray(pan, dtype=float), np.asarray(tilt, dtype=float), 1.0)
+        body = np.stack(np.broadcast_arrays(x_body, y_body, z_body), axis=-1)
+        # The matrix is orthonormal, so body->ECEF is its transpose
+        return body @ self.matrix
+
+    def pan_tilt_to_geodetic(self, pan, tilt, dist=None, max_view_distance=np.inf, terrain_height=0.0, terrain=None):
+        """
+        Geolocates the nearest of: the ground (ellipsoid raised by terrain_height, or the elevation
+        model `terrain`), the dome of radius max_view_distance, or the point at distance dist, along
+        the rays at (pan, tilt). See pan_tilt_to_target_geodetic.
+
+        :returns: (lat, lon, h) in [degrees, degrees, meters]
+        """
+        scalar = is_scalar(pan, tilt) and (dist is None or is_scalar(dist))
+        directions = self.pan_tilt_to_ecef_direction(pan, tilt)
+        limit = np.fmin(max_view_distance, np.inf if dist is None else dist)
+        if terrain is None:
+            distance = ray_ellipsoid_distance(self.frame.origin, directions, terrain_height)
+        else:
+            distance = terrain.cast_rays(self.frame.origin, directions, limit)
+        distance = np.fmin(distance, limit)
+        distance = np.where(np.isfinite(distance), distance, np.nan)
+
+        points = self.frame.origin + directions * distance[..., None]
+        with np.errstate(invalid='ignore'):
+            geodetic = ecef_to_geodetic_batch(points)
+        if scalar:
+            return tuple(geodetic.tolist())
+        return geodetic[..., 0], geodetic[..., 1], geodetic[..., 2]
+
+
+class IncrementalPanTilt:
     """
-    pass
+    Incremental pan/tilt updates for one slowly moving target, by local linearization.
+
+    The Jacobian of (pan, tilt) with respect to the target's (lat, lon, h) is cached at an anchor
+    point, and later positions are answered with a first-order update from the anchor. The
+    linearization error is bounded by 0.5 * (d / (rho - d))^2 radians, where d is the distance
+    moved from the anchor and rho the anchor's horizontal range in the body frame (the second
+    derivatives of pan and tilt are at most 1/rho^2). When the bound exceeds `tolerance`, the
+    pan/tilt is solved exactly and the target is re-anchored at its new position.
+
+    :param solver: PanTiltSolver of the pointing unit
+    :param tolerance: maximum linearization error in degrees
+    """
+    __slots__ = ('solver', 'tolerance', 'hits', 'reanchors', '_anchor', '_pan_tilt', '_jacobian', '_metric', '_max_distance_sq')
+
+    def __init__(self, solver, tolerance: float = 0.01):
+        self.solver = solver
+        self.tolerance = tolerance
+        self.hits = 0
+        self.reanchors = 0
+        self._anchor = None
+
+    def __call__(self, lat: float, lon: float, h: float):
+        """
+        Pan/tilt angles needed to look at the target at (lat, lon, h).
+
+        :returns: (pan, tilt) in [degrees, degrees]
+        """
+        anchor = self._anchor
+        if anchor is not None:
+            dlat = lat - anchor[0]
+            dlon = lon - anchor[1]
+            dh = h - anchor[2]
+            m_lat, m_lon = self._metric
+            if (m_lat * dlat) ** 2 + (m_lon * dlon) ** 2 + dh * dh <= self._max_distance_sq:
+                self.hits += 1
+                j00, j01, j02, j10, j11, j12 = self._jacobian
+                pan0, tilt0 = self._pan_tilt
+                pan = pan0 + j00 * dlat + j01 * dlon + j02 * dh
+                if pan > 180.0:
+                    pan -= 360.0
+                elif pan <= -180.0:
+                    pan += 360.0
+                return pan, tilt0 + j10 * dlat + j11 * dlon + j12 * dh
+        return self.reanchor(lat, lon, h)
+
+    def reanchor(self, lat: float, lon: float, h: float):
+        """
+        Solves (lat, lon, h) exactly and makes it the new anchor.
+
+        :returns: (pan, tilt) in [degrees, degrees]
+        """
+        self.reanchors += 1
+        lat, lon, h = float(lat), float(lon), float(h)
+        x, y, z = self.solver.ecef_to_body(*geodetic_to_ecef(lat, lon, h))
+        rho_sq = x * x + y * y
+        rho = math.sqrt(rho_sq)
+        r_sq = rho_sq + z * z
+        pan = math.degrees(math.atan2(y, x))
+        tilt = math.degrees(math.atan2(z, rho))
+
+        # d(ECEF)/d(lat, lon, h), with lat/lon in degrees
+        phi = math.radians(lat)
+        lambd = math.radians(lon)
+        sin_phi, cos_phi = math.sin(phi), math.cos(phi)
+        sin_lambda, cos_lambda = math.sin(lambd), math.cos(lambd)
+        w_sq = 1.0 - e_sq * sin_phi * sin_phi
+        N = a / math.sqrt(w_sq)
+        M = a * (1.0 - e_sq) / (w_sq * math.sqrt(w_sq))  # Meridian radius of curvature
+        m_lat = math.radians(M + h)
+        m_lon = math.radians((N + h) * cos_phi)
+        d_ecef = ((-m_lat * sin_phi * cos_lambda, -m_lon * sin_lambda, cos_phi * cos_lambda),
+                  (-m_lat * sin_phi * sin_lambda, m_lon * cos_lambda, cos_phi * sin_lambda),
+                  (m_lat * cos_phi, 0.0, sin_phi))
+
+        # d(pan, tilt)/d(body) in degrees per meter, chained through the ECEF->body matrix
+        if rho > 0:
+            d_pan = (-y / rho_sq, x / rho_sq, 0.0)
+            d_tilt = (-x * z / (rho * r_sq), -y * z / (rho * r_sq), rho / r_sq)
+        else:
+            d_pan = d_tilt = (0.0, 0.0, 0.0)
+        m = self.solver._coeffs
+        jacobian = []
+        for d_angle in (d_pan, d_tilt):
+            d_angle_ecef = [math.degrees(d_angle[0] * m[col] + d_angle[1] * m[3 + col] + d_angle[2] * m[6 + col]) for col in range(3)]
+            jacobian.extend(sum(d_angle_ecef[row] * d_ecef[row][col] for row in range(3)) for col in range(3))
+
+        # Largest move d from the anchor with 0.5 * (d / (rho - d))^2 <= tolerance (in radians)
+        k = math.sqrt(2.0 * math.radians(self.tolerance))
+        self._max_distance_sq = (rho * k / (1.0 + k)) ** 2
+        self._anchor = (lat, lon, h)
+        self._pan_tilt = (pan, tilt)
+        self._jacobian = tuple(jacobian)
+        self._metric = (m_lat, m_lon)
+        return pan, tilt
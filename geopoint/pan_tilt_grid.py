@@ -0,0 +1,182 @@
+# Precomputed pan/tilt lookup grids for fixed pointing units (PU).
+#
+# A fixed camera watching a bounded area (a port, a perimeter) solves the same geometry over and
+# over. A PanTiltGrid samples pan, tilt and range on a regular grid over the area (geodetic
+# lat/lon or ENU east/north, at a fixed target height) once, stores them as float32, and answers
+# queries by bilinear interpolation. The interpolation error is measured against the exact
+# solution at every cell center and edge midpoint when the grid is built. Grids are saved as a
+# .npy table plus a small .json sidecar, and memory-mapped on load.
+
+import json
+from pathlib import Path
+import numpy as np
+
+GEODETIC = 'geodetic'
+ENU = 'enu'
+
+
+class PanTiltGrid:
+    """
+    Pan/tilt/range of a PU sampled on a regular grid, interpolated bilinearly.
+
+    Row 0 is the northern edge and column 0 the western edge; the outer samples lie exactly on
+    the bounds. For geodetic grids the bounds are latitudes/longitudes in degrees and queries
+    are (lat, lon); for ENU grids they are north/east coordinates in meters in the PU's ENU frame
+    and queries are (east, north). Queries outside the bounds give NaN.
+
+    Pan is interpolated the short way round between neighbouring samples, so grids may span the
+    +-180 degree pan seam. Close to the PU, where the angles change fast, the error grows; see
+    max_error.
+
+    :param table: (3, rows, cols) float32 array of pan, tilt (degrees) and range (meters), e.g. memory-mapped
+    :param frame: 'geodetic' or 'enu'
+    :param south: southern edge, degrees or meters
+    :param west: western edge, degrees or meters
+    :param north: northern edge, degrees or meters
+    :param east: eastern edge, degrees or meters
+    :param height: target height the grid was built for, meters above the ellipsoid (geodetic) or ENU up
+    :param max_error: {'pan', 'tilt', 'range'} maximum interpolation errors measured at the cell centers and edge midpoints
+    :param pose: (lat, lon, h, north, pitch, roll) of the PU, for reference
+    """
+    __slots__ = ('table', 'frame', 'south', 'west', 'north', 'east', 'height', 'max_error', 'pose', 'y_step', 'x_step')
+
+    def __init__(self, table: np.ndarray, frame: str, south: float, west: float, north: float, east: float, height: float = 0.0, max_error=None, pose=None):
+        if frame not in (GEODETIC, ENU):
+            raise ValueError(f"unknown frame {frame!r}, expected {GEODETIC!r} or {ENU!r}")
+        if table.ndim != 3 or table.shape[0] != 3 or table.shape[1] < 2 or table.shape[2] < 2:
+            raise ValueError(f"expected a (3, rows, cols) table of at least 2x2 samples, got {table.shape}")
+        self.table = table
+        self.frame = frame
+        self.south = south
+        self.west = west
+        self.north = north
+        self.east = east
+        self.height = height
+        self.max_error = max_error
+        self.pose = pose
+        self.y_step = (north - south) / (table.shape[1] - 1)
+        self.x_step = (east - west) / (table.shape[2] - 1)
+
+    def __repr__(self):
+        return f"PanTiltGrid({self.frame!r}, {self.table.shape[1]}x{self.table.shape[2]}, bounds=({self.south}, {self.west}, {self.north}, {self.east}), max_error={self.max_error})"
+
+    @classmethod
+    def build(cls, solver, south: float, west: float, north: float, east: float, resolution: float, frame: str = GEODETIC, height: float = 0.0, block_rows: int = 256):
+        """
+        Samples the pan/tilt/range of `solver` over the bounds and measures the interpolation error.
+
+        :param solver: PanTiltSolver of the PU
+        :param south: southern edge, degrees (geodetic) or meters north of the PU (ENU)
+        :param west: western edge, degrees or meters east of the PU
+        :param north: northern edge
+        :param east: eastern edge
+        :param resolution: largest sample spacing, degrees or meters
+        :param frame: 'geodetic' or 'enu'
+        :param height: target height, meters above the ellipsoid (geodetic) or ENU up
+        :param block_rows: grid rows solved at once, bounds the memory used while building
+        :returns: PanTiltGrid
+        """
+        if north <= south or east <= west:
+            raise ValueError("the bounds must have north > south and east > west")
+        rows = int(np.ceil((north - south) / resolution)) + 1
+        cols = int(np.ceil((east - west) / resolution)) + 1
+        table = np.empty((3, rows, cols), dtype=np.float32)
+        origin = solver.frame
+        pose = (origin.lat0, origin.lon0, origin.h0, solver.north, solver.pitch, solver.roll)
+        grid = cls(table, frame, south, west, north, east, height, pose=pose)
+
+        ys = np.linspace(north, south, rows)
+        xs = np.linspace(west, east, cols)
+        for start in range(0, rows, block_rows):
+            table[:, start:start + block_rows] = grid._solve(solver, *np.meshgrid(ys[start:start + block_rows], xs, indexing='ij'))
+
+        # The bilinear error peaks at the cell centers or, for harmonic functions such as the pan
+        # angle (atan2), at the edge midpoints; check both on the half-step lattice
+        error = np.zeros(3)
+        y_half = np.linspace(north, south, 2 * rows - 1)
+        x_half = np.linspace(west, east, 2 * cols - 1)
+        for start in range(0, len(y_half), block_rows):
+            y, x = np.meshgrid(y_half[start:start + block_rows], x_half, indexing='ij')
+            difference = np.abs(grid._interpolate(y, x) - grid._solve(solver, y, x))
+            difference[0] = np.abs((difference[0] + 180.0) % 360.0 - 180.0)
+            error = np.maximum(error, np.nanmax(difference.reshape(3, -1), axis=1))
+        grid.max_error = dict(zip(('pan', 'tilt', 'range'), error.tolist()))
+        return grid
+
+    def _solve(self, solver, y, x):
+        if self.frame == GEODETIC:
+            lat, lon, h = y, x, np.full_like(y, self.height)
+        else:
+            geodetic = solver.frame.enu_to_geodetic(x, y, np.full_like(y, self.height))
+            lat, lon, h = geodetic[..., 0], geodetic[..., 1], geodetic[..., 2]
+        return np.stack(solver.solve_with_range(lat, lon, h))
+
+    def _interpolate(self, y, x):
+        rows, cols = self.table.shape[1:]
+        fy = (self.north - y) / self.y_step
+        fx = (x - self.west) / self.x_step
+        inside = (fy >= 0) & (fy <= rows - 1) & (fx >= 0) & (fx <= cols - 1)
+        i = np.clip(np.floor(np.where(inside, fy, 0)).astype(np.intp), 0, rows - 2)
+        j = np.clip(np.floor(np.where(inside, fx, 0)).astype(np.intp), 0, cols - 2)
+        di = fy - i
+        dj = fx - j
+
+        table = self.table
+        corners = np.stack([table[:, i, j], table[:, i, j + 1], table[:, i + 1, j], table[:, i + 1, j + 1]]).astype(float)
+        # Bring the pans of the corners within 180 degrees of the first one
+        pan = corners[:, 0]
+        pan -= 360.0 * np.round((pan - pan[0]) / 360.0)
+        top = corners[0] * (1 - dj) + corners[1] * dj
+        bottom = corners[2] * (1 - dj) + corners[3] * dj
+        values = top * (1 - di) + bottom * di
+        values[0] = (values[0] + 180.0) % 360.0 - 180.0
+        return np.where(inside, values, np.nan)
+
+    def pan_tilt_range(self, c0, c1):
+        """
+        Interpolated pan/tilt angles and range.
+
+        :param c0: latitudes in degrees (geodetic grids) or east coordinates in meters (ENU grids)
+        :param c1: longitudes in degrees (geodetic grids) or north coordinates in meters (ENU grids)
+        :returns: (pan, tilt, range) in [degrees, degrees, meters], NaN outside the grid
+        """
+        c0 = np.asarray(c0, dtype=float)
+        c1 = np.asarray(c1, dtype=float)
+        y, x = (c0, c1) if self.frame == GEODETIC else (c1, c0)
+        pan, tilt, r = self._interpolate(y, x)
+        return pan, tilt, r
+
+    def pan_tilt(self, c0, c1):
+        """
+        Interpolated pan/tilt angles, see pan_tilt_range.
+
+        :returns: (pan, tilt) in [degrees, degrees]
+        """
+        pan, tilt, _ = self.pan_tilt_range(c0, c1)
+        return pan, tilt
+
+    def save(self, path):
+        """
+        Saves the table to `path` (.npy) and the bounds and metadata to the same path with a .json suffix.
+        """
+        path = Path(path).with_suffix('.npy')
+        np.save(path, self.table)
+        metadata = {
+            'frame': self.frame,
+            'bounds': [self.south, self.west, self.north, self.east],
+            'height': self.height,
+            'max_error': self.max_error,
+            'pose': self.pose,
+        }
+        path.with_suffix('.json').write_text(json.dumps(metadata, indent=2))
+
+    @classmethod
+    def load(cls, path, mmap_mode: str = 'r'):
+        """
+        Loads a grid saved with save(), memory-mapping its table.
+        """
+        path = Path(path).with_suffix('.npy')
+        metadata = json.loads(path.with_suffix('.json').read_text())
+        table = np.load(path, mmap_mode=mmap_mode)
+        pose = tuple(metadata['pose']) if metadata['pose'] is not None else None
+        return cls(table, metadata['frame'], *metadata['bounds'], metadata['height'], metadata['max_error'], pose)
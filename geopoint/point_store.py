@@ -0,0 +1,218 @@
+# Compact storage of large point histories.
+#
+# A float64 ECEF triple takes 24 bytes, and float32 ECEF coordinates (~6.4e6 m) are only good to
+# half a meter. The PointStore cuts ECEF space into cubic tiles of tile_size meters and stores
+# each point as a float32 East-North-Up offset from the center of its tile plus an int32 tile
+# number: 16 bytes per point. The tile frames come from enu_frames_batch, the same rotation as
+# ecef_to_enu, and are created automatically as points arrive.
+#
+# Error bound: within a tile the offsets are at most sqrt(3)/2 * tile_size long. Rounding to
+# float32 moves each coordinate by at most half a unit in the last place at that magnitude, and
+# the decoding is done in float64, so a decoded point is off by at most
+#     max_error = sqrt(3) * 2 ** (floor(log2(sqrt(3)/2 * tile_size)) - 24)
+# which is 3.4 mm (1.95 mm per ENU axis) for the default 65536 m tiles.
+
+import json
+import math
+from pathlib import Path
+import numpy as np
+from geopoint.geo_convert import geodetic_to_ecef_batch, ecef_to_geodetic_batch, enu_frames_batch, _stack_columns, _output_buffer
+
+RECORD = np.dtype([('offset', '<f4', (3,)), ('tile', '<i4')])
+
+# Points converted at once; bounds the scratch memory of the per-point tile rotations
+_CHUNK = 65536
+
+
+class PointStore:
+    """
+    Growable array of points stored as float32 ENU offsets from per-tile origins.
+
+    Indexing with a slice, an integer array or a boolean mask returns a PointStore of the selected
+    points (a view for slices); an integer selects a store of one point.
+
+    :param tile_size: edge length of the tiles in meters
+    :param capacity: initial number of point slots (grows as needed)
+    """
+
+    def __init__(self, tile_size: float = 65536.0, capacity: int = 1024):
+        self.tile_size = float(tile_size)
+        self.records = np.zeros(capacity, dtype=RECORD)
+        self.size = 0
+        self.tile_keys = np.empty((0, 3), dtype=np.int64)
+        self.origins = np.empty((0, 3))
+        self.rotations = np.empty((0, 3, 3))
+        self._tile_index = {}   # (i, j, k) -> tile number; None in views until they append
+
+    def __len__(self):
+        return self.size
+
+    def __repr__(self):
+        return f"<PointStore of {self.size} points in {len(self.tile_keys)} tiles of {self.tile_size:g} m>"
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """
+        (N, 3) float32 ENU offsets of the points from their tile origins, in meters.
+        """
+        return self.records['offset'][:self.size]
+
+    @property
+    def tiles(self) -> np.ndarray:
+        """
+        (N,) tile number of each point, indexing tile_keys, origins and rotations.
+        """
+        return self.records['tile'][:self.size]
+
+    @property
+    def max_error(self) -> float:
+        """
+        Upper bound of the distance between a stored point and the one that was appended, in meters.
+        """
+        half_diagonal = math.sqrt(3.0) / 2.0 * self.tile_size
+        return math.sqrt(3.0) * 2.0 ** (math.floor(math.log2(half_diagonal)) - 24)
+
+    @property
+    def nbytes(self) -> int:
+        return self.size * RECORD.itemsize
+
+    def _reserve(self, size: int):
+        capacity = len(self.records)
+        if size <= capacity:
+            return
+        records = np.zeros(max(size, 2 * capacity), dtype=RECORD)
+        records[:self.size] = self.records[:self.size]
+        self.records = records
+
+    def _tiles_for(self, ecef: np.ndarray) -> np.ndarray:
+        """
+        Tile numbers of ECEF points, creating the tiles that do not exist yet.
+        """
+        keys = np.floor(ecef / self.tile_size).astype(np.int64)
+        if self._tile_index is None:
+            self._tile_index = {key: tile for tile, key in enumerate(map(tuple, self.tile_keys.tolist()))}
+        unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+        tile_numbers = np.empty(len(unique_keys), dtype=np.int32)
+        new_keys = []
+        for index, key in enumerate(map(tuple, unique_keys.tolist())):
+            tile = self._tile_index.get(key)
+            if tile is None:
+                tile = self._tile_index[key] = len(self.tile_keys) + len(new_keys)
+                new_keys.append(key)
+            tile_numbers[index] = tile
+        if new_keys:
+            self._add_tiles(np.array(new_keys, dtype=np.int64))
+        return tile_numbers[inverse.ravel()]
+
+    def _add_tiles(self, keys: np.ndarray):
+        # Origins at the tile centers; enu_frames_batch recomputes their ECEF position from the
+        # geodetic coordinates, which may differ from the centers by a few nanometers
+        lat, lon, h = ecef_to_geodetic_batch((keys + 0.5) * self.tile_size).T
+        origins, rotations = enu_frames_batch(lat, lon, h)
+        self.tile_keys = np.concatenate([self.tile_keys, keys])
+        self.origins = np.concatenate([self.origins, origins])
+        self.rotations = np.concatenate([self.rotations, rotations])
+
+    def append_ecef(self, x, y=None, z=None) -> int:
+        """
+        Appends points given in ECEF coordinates.
+
+        :param x: meters, or an (N, 3) array of (x, y, z)
+        :param y: meters
+        :param z: meters
+        :returns: index of the first appended point
+        """
+        ecef = _stack_columns(x, y, z).reshape(-1, 3)
+        start = self.size
+        self._reserve(start + len(ecef))
+        for begin in range(0, len(ecef), _CHUNK):
+            chunk = ecef[begin:begin + _CHUNK]
+            tiles = self._tiles_for(chunk)
+            records = self.records[start + begin:start + begin + len(chunk)]
+            records['offset'] = np.einsum('nij,nj->ni', self.rotations[tiles], chunk - self.origins[tiles])
+            records['tile'] = tiles
+        self.size = start + len(ecef)
+        return start
+
+    def append_geodetic(self, lat, lon=None, h=None) -> int:
+        """
+        Appends points given in geodetic WGS-84 coordinates.
+
+        :param lat: latitude in degrees, or an (N, 3) array of (lat, lon, h)
+        :param lon: longitude in degrees
+        :param h: meters
+        :returns: index of the first appended point
+        """
+        return self.append_ecef(geodetic_to_ecef_batch(_stack_columns(lat, lon, h).reshape(-1, 3)))
+
+    def to_ecef(self, out: np.ndarray = None) -> np.ndarray:
+        """
+        :param out: optional (N, 3) float64 buffer that receives the result
+        :returns: (N, 3) array of ECEF (x, y, z) in meters
+        """
+        out = _output_buffer(out, self.tiles)
+        offsets, tiles = self.offsets, self.tiles
+        for begin in range(0, self.size, _CHUNK):
+            chunk = slice(begin, begin + _CHUNK)
+            chunk_tiles = tiles[chunk]
+            # ENU -> ECEF is the transposed rotation
+            np.einsum('nji,nj->ni', self.rotations[chunk_tiles], offsets[chunk].astype(float), out=out[chunk])
+            out[chunk] += self.origins[chunk_tiles]
+        return out
+
+    def to_geodetic(self, out: np.ndarray = None) -> np.ndarray:
+        """
+        :param out: optional (N, 3) float64 buffer that receives the result
+        :returns: (N, 3) array of (lat, lon, h) in [degrees, degrees, meters]
+        """
+        out = self.to_ecef(out)
+        for begin in range(0, self.size, _CHUNK):
+            chunk = out[begin:begin + _CHUNK]
+            ecef_to_geodetic_batch(chunk.copy(), out=chunk)
+        return out
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            position = range(self.size)[index]
+            index = slice(position, position + 1)
+        view = PointStore.__new__(PointStore)
+        view.tile_size = self.tile_size
+        view.records = self.records[:self.size][index]
+        view.size = len(view.records)
+        view.tile_keys = self.tile_keys
+        view.origins = self.origins
+        view.rotations = self.rotations
+        # Built on the first append, which gives the view its own tiles
+        view._tile_index = None
+        return view
+
+    def save(self, path):
+        """
+        Saves the points to `path` (.npy, one record per point) and the tiles to the same path with a .json suffix.
+        """
+        path = Path(path).with_suffix('.npy')
+        np.save(path, self.records[:self.size])
+        metadata = {
+            'tile_size': self.tile_size,
+            'tile_keys': self.tile_keys.tolist(),
+        }
+        path.with_suffix('.json').write_text(json.dumps(metadata))
+
+    @classmethod
+    def load(cls, path, mmap_mode: str = 'r'):
+        """
+        Loads points saved with save(), memory-mapping them. Appending copies the points to memory.
+        """
+        path = Path(path).with_suffix('.npy')
+        metadata = json.loads(path.with_suffix('.json').read_text())
+        records = np.load(path, mmap_mode=mmap_mode)
+        if records.dtype != RECORD:
+            raise ValueError(f"{path} has records of type {records.dtype}, expected {RECORD}")
+        store = cls(metadata['tile_size'], capacity=0)
+        keys = np.array(metadata['tile_keys'], dtype=np.int64).reshape(-1, 3)
+        if len(keys):
+            store._add_tiles(keys)
+            store._tile_index = {key: tile for tile, key in enumerate(map(tuple, keys.tolist()))}
+        store.records = records
+        store.size = len(records)
+        return store
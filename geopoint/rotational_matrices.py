@@ -2,26 +2,29 @@
 # https://ocw.mit.edu/courses/mechanical-engineering/2-017j-design-of-electromechanical-robotic-systems-fall-2009/course-text/MIT2_017JF09_ch09.pdf
 
 import numpy as np
-from functools import reduce
+from geopoint.dispatch import is_scalar, scalar_ops, numpy_ops
 
 # Rotational matrices for rotating the coordinate system
 def Rx(deg):
-    sin_x = np.sin(np.deg2rad(deg))
-    cos_x = np.cos(np.deg2rad(deg))
+    rad = np.deg2rad(deg)
+    sin_x = np.sin(rad)
+    cos_x = np.cos(rad)
     return np.array([[1,      0,     0],
                      [0,  cos_x, sin_x],
                      [0, -sin_x, cos_x]])
 
 def Ry(deg):
-    sin_x = np.sin(np.deg2rad(deg))
-    cos_x = np.cos(np.deg2rad(deg))
+    rad = np.deg2rad(deg)
+    sin_x = np.sin(rad)
+    cos_x = np.cos(rad)
     return np.array([[cos_x, 0, -sin_x],
                      [    0, 1,      0],
                      [sin_x, 0,  cos_x]])
 
 def Rz(deg):
-    sin_x = np.sin(np.deg2rad(deg))
-    cos_x = np.cos(np.deg2rad(deg))
+    rad = np.deg2rad(deg)
+    sin_x = np.sin(rad)
+    cos_x = np.cos(rad)
     return np.array([[ cos_x, sin_x, 0],
                      [-sin_x, cos_x, 0],
                      [     0,     0, 1]])
@@ -30,12 +33,83 @@ def rotate_frame_zyx(x, y, z, z_offset, y_offset, x_offset):
     """
     Rotates the coordinate system along the Z-, Y-, and X-axis,
     and returns the new coordinates of (x,y,z) expressed in this
-    new, shifted coordiante system
+    new, shifted coordiante system.
+    Plain float inputs are evaluated with the math module, anything else element-wise with NumPy.
     """
-    vector = np.array([[x],[y],[z]])
-    vector_offset = reduce(np.dot, [Rx(x_offset), Ry(y_offset), Rz(z_offset+90), vector])
-    x_new, y_new, z_new = (vector_offset[i,0] for i in range(3))
-    return x_new, y_new, z_new
+    if is_scalar(x, y, z, z_offset, y_offset, x_offset):
+        m00, m01, m02, m10, m11, m12, m20, m21, m22 = _zyx_terms(scalar_ops, z_offset, y_offset, x_offset)
+        x_new = m00 * x + m01 * y + m02 * z
+        y_new = m10 * x + m11 * y + m12 * z
+        z_new = m20 * x + m21 * y + m22 * z
+        return x_new, y_new, z_new
+
+    vectors = np.stack(np.broadcast_arrays(*(np.asarray(c, dtype=float) for c in (x, y, z))), axis=-1)
+    vector_offset = rotate_frame_zyx_batch(vectors, z_offset, y_offset, x_offset)
+    return vector_offset[..., 0], vector_offset[..., 1], vector_offset[..., 2]
 
 def offset_north_pitch_roll(x, y, z, north_offset, pitch_offset, roll_offset):
-    return rotate_frame_zyx(x, y, z, north_offset, pitch_offset, roll_offset)
\ No newline at end of file
+    return rotate_frame_zyx(x, y, z, north_offset, pitch_offset, roll_offset)
+
+# Batched versions, for per-sample offsets (e.g. IMU-stabilised units reporting pitch and roll per frame)
+def rotation_matrices_zyx(z_offset, y_offset, x_offset, out=None):
+    """
+    Builds the stack of frame rotations Rx(x_offset) . Ry(y_offset) . Rz(z_offset+90)
+    used by rotate_frame_zyx, one per (broadcast) set of offsets, without a Python loop.
+
+    :param z_offset: degrees, scalar or (N,) array
+    :param y_offset: degrees, scalar or (N,) array
+    :param x_offset: degrees, scalar or (N,) array
+    :param out: optional (N, 3, 3) buffer that receives the matrices
+    :returns: (N, 3, 3) array of rotation matrices
+    """
+    terms = _zyx_terms(numpy_ops, np.asarray(z_offset, dtype=float), np.asarray(y_offset, dtype=float), np.asarray(x_offset, dtype=float))
+    shape = np.broadcast_shapes(*(np.shape(term) for term in terms)) + (3, 3)
+    if out is None:
+        out = np.empty(shape)
+    elif out.shape != shape:
+        raise ValueError(f"out has shape {out.shape}, expected {shape}")
+
+    for index, term in enumerate(terms):
+        out[..., index // 3, index % 3] = term
+    return out
+
+def _zyx_terms(ops, z_offset, y_offset, x_offset):
+    """
+    Closed form of Rx(x_offset) . Ry(y_offset) . Rz(z_offset+90), as its 9 terms in row-major order.
+    """
+    z_rad = ops.radians(z_offset + 90)
+    y_rad = ops.radians(y_offset)
+    x_rad = ops.radians(x_offset)
+    sin_z, cos_z = ops.sin(z_rad), ops.cos(z_rad)
+    sin_y, cos_y = ops.sin(y_rad), ops.cos(y_rad)
+    sin_x, cos_x = ops.sin(x_rad), ops.cos(x_rad)
+    sin_y_cos_z = sin_y * cos_z
+    sin_y_sin_z = sin_y * sin_z
+
+    return (cos_y * cos_z, cos_y * sin_z, -sin_y,
+            sin_x * sin_y_cos_z - cos_x * sin_z, sin_x * sin_y_sin_z + cos_x * cos_z, sin_x * cos_y,
+            cos_x * sin_y_cos_z + sin_x * sin_z, cos_x * sin_y_sin_z - sin_x * cos_z, cos_x * cos_y)
+
+def rotate_frame_zyx_batch(vectors, z_offset, y_offset, x_offset, out=None):
+    """
+    Batched version of rotate_frame_zyx: rotates N vectors, each with its own (or broadcast)
+    z/y/x offsets, and returns their coordinates in the shifted coordinate systems.
+
+    :param vectors: (N, 3) array of (x, y, z)
+    :param z_offset: degrees, scalar or (N,) array
+    :param y_offset: degrees, scalar or (N,) array
+    :param x_offset: degrees, scalar or (N,) array
+    :param out: optional (N, 3) buffer that receives the rotated vectors
+    :returns: (N, 3) array of (x_new, y_new, z_new)
+    """
+    vectors = np.asarray(vectors, dtype=float)
+    if vectors.ndim == 0 or vectors.shape[-1] != 3:
+        raise ValueError(f"expected vectors of shape (..., 3), got {vectors.shape}")
+    matrices = rotation_matrices_zyx(z_offset, y_offset, x_offset)
+    shape = np.broadcast_shapes(matrices.shape[:-1], vectors.shape)
+    if out is None:
+        out = np.empty(shape)
+    return np.einsum('...ij,...j->...i', matrices, vectors, out=out)
+
+def offset_north_pitch_roll_batch(vectors, north_offset, pitch_offset, roll_offset, out=None):
+    return rotate_frame_zyx_batch(vectors, north_offset, pitch_offset, roll_offset, out=out)
@@ -0,0 +1,368 @@
+# Slew-time-aware visiting order for one pointing unit (PU) and many targets.
+#
+# Both axes of the PU move at the same time, each with a trapezoidal velocity profile (accelerate
+# at max_acceleration up to max_rate, coast, decelerate), so a move takes as long as the slower
+# axis. Pan takes the short way round through +-180 unless the unit has end stops. The scheduler
+# keeps the slew-time matrix of all targets and only recomputes the rows and columns of targets
+# that move, then re-plans the patrol cycle from the previous one: removed targets are dropped,
+# new targets are inserted where they cost least, and 2-opt moves around the moved, inserted and
+# removed targets are applied until none improves. A cycle is built from scratch (nearest
+# neighbour, then 2-opt over all moves) only when most of the targets are new. Each target is
+# refreshed once per cycle, so the cycle time is the refresh period.
+
+from typing import NamedTuple
+import numpy as np
+
+_NO_SLOTS = np.empty(0, dtype=np.intp)
+
+
+class SlewPlan(NamedTuple):
+    order: list            # target ids in visiting order
+    slew_times: np.ndarray  # seconds of the slew into each target of `order`
+    cycle_time: float      # seconds to visit all targets and return to the first, including the dwells
+
+
+def axis_move_time(distance, max_rate, max_acceleration):
+    """
+    Time of a rest-to-rest move with a trapezoidal (or, for short moves, triangular) velocity profile.
+
+    :param distance: degrees, scalar or array
+    :param max_rate: degrees/s
+    :param max_acceleration: degrees/s^2
+    :returns: seconds
+    """
+    distance = np.abs(distance)
+    # Moves shorter than the distance covered while accelerating to max_rate and braking back to
+    # rest never reach max_rate
+    ramp_distance = max_rate * max_rate / max_acceleration
+    triangular = np.sqrt(distance * (4.0 / max_acceleration))
+    trapezoidal = distance * (1.0 / max_rate)
+    trapezoidal += max_rate / max_acceleration
+    return np.where(distance < ramp_distance, triangular, trapezoidal)
+
+
+def pan_distance(pan_from, pan_to, continuous_pan: bool = True):
+    """
+    Angle in degrees the pan axis turns from pan_from to pan_to (both in [-180, 180]), through
+    +-180 when that is shorter and the unit can turn continuously.
+    """
+    distance = np.abs(np.subtract(pan_to, pan_from))
+    if continuous_pan:
+        distance = np.minimum(distance, 360.0 - distance)
+    return distance
+
+
+def slew_times(pan_from, tilt_from, pan_to, tilt_to, pan_rate, tilt_rate, pan_acceleration, tilt_acceleration, continuous_pan: bool = True):
+    """
+    Slew times between pan/tilt positions, broadcasting like NumPy; e.g. pan[:, None] and pan[None, :]
+    give the pairwise matrix.
+
+    :param pan_rate: maximum pan rate in degrees/s
+    :param tilt_rate: maximum tilt rate in degrees/s
+    :param pan_acceleration: pan acceleration in degrees/s^2
+    :param tilt_acceleration: tilt acceleration in degrees/s^2
+    :param continuous_pan: whether pan can turn through +-180
+    :returns: seconds
+    """
+    pan_time = axis_move_time(pan_distance(pan_from, pan_to, continuous_pan), pan_rate, pan_acceleration)
+    tilt_time = axis_move_time(np.subtract(tilt_to, tilt_from), tilt_rate, tilt_acceleration)
+    return np.maximum(pan_time, tilt_time, out=pan_time)
+
+
+def nearest_neighbour_cycle(times: np.ndarray, start: int = 0) -> np.ndarray:
+    """
+    Visiting order that always slews to the closest unvisited target.
+
+    :param times: (N, N) slew-time matrix
+    :param start: index of the first target
+    :returns: (N,) permutation of range(N)
+    """
+    n = len(times)
+    order = np.empty(n, dtype=np.intp)
+    visited = np.zeros(n, dtype=bool)
+    current = start
+    for position in range(n):
+        order[position] = current
+        visited[current] = True
+        if position + 1 < n:
+            current = int(np.argmin(np.where(visited, np.inf, times[current])))
+    return order
+
+
+def two_opt(times: np.ndarray, order: np.ndarray, max_moves: int = 10000, changed: np.ndarray = None) -> np.ndarray:
+    """
+    Improves a cycle with 2-opt moves on a symmetric time matrix. Every iteration evaluates the
+    moves of the cycle at once and applies the best ones that do not overlap.
+
+    Without `changed` all the moves are evaluated, O(n^2) per iteration. To re-plan a cycle that
+    was 2-opt optimal before a few of its targets moved or were inserted, pass them as `changed`:
+    only the moves that replace an edge of a changed target, or of a target touched by an earlier
+    move, are evaluated, O(k n) per iteration for k such targets. The result is then only
+    optimal with respect to those moves.
+
+    :param times: (N, N) symmetric slew-time matrix
+    :param order: (n,) cycle of indices into times
+    :param max_moves: stop after this many moves
+    :param changed: optional (N,) boolean mask of the indices whose edges changed
+    :returns: the improved cycle (a new array)
+    """
+    return _two_opt(times, order, max_moves, changed)[0]
+
+
+def _two_opt(times, order, max_moves, changed):
+    """
+    two_opt, also returning the number of moves whose gain was evaluated.
+    """
+    order = np.array(order, dtype=np.intp)
+    n = len(order)
+    if n < 4:
+        return order, 0
+    # Move (i, j), i + 1 < j, replaces the edges (i, i+1) and (j, j+1) by (i, j) and (i+1, j+1), by
+    # reversing positions i+1..j. For i = 0, j = n - 1 the two edges are adjacent.
+    allowed = np.triu(np.ones((n, n)), k=2)
+    allowed[0, n - 1] = 0.0
+    active = None if changed is None else np.array(changed, dtype=bool)
+    positions = np.arange(n)
+    moves = evaluated = 0
+    while moves < max_moves:
+        closed = np.append(order, order[0])
+        edges = times[closed[:-1], closed[1:]]
+        # Ignore rounding-level gains, which could make moves cycle
+        threshold = -1e-9 * max(edges.sum(), 1.0)
+        if active is None:
+            cycle = times[np.ix_(closed, closed)]
+            gain = cycle[:-1, :-1] + cycle[1:, 1:]
+            gain -= edges[:, None]
+            gain -= edges
+            gain *= allowed
+            evaluated += n * n
+            candidates = np.flatnonzero(gain < threshold)
+            gains = gain.flat[candidates]
+        else:
+            # Rows of the gain matrix for the edges of active targets; the matrix is symmetric, so
+            # (row, column) is stored as the move (min, max)
+            rows = np.flatnonzero(active[closed[:-1]] | active[closed[1:]])
+            if not len(rows):
+                break
+            gain = times[np.ix_(closed[rows], closed[:-1])] + times[np.ix_(closed[rows + 1], closed[1:])]
+            gain -= edges[rows, None]
+            gain -= edges
+            evaluated += gain.size
+            first = np.minimum(rows[:, None], positions)
+            last = np.maximum(rows[:, None], positions)
+            gain[(last - first < 2) | ((first == 0) & (last == n - 1))] = 0.0
+            improving = gain < threshold
+            candidates, unique = np.unique(first[improving] * n + last[improving], return_index=True)
+            gains = gain[improving][unique]
+            active[:] = False
+        if not len(candidates):
+            break
+        if len(candidates) > n:
+            best = np.argpartition(gains, n)[:n]
+            candidates, gains = candidates[best], gains[best]
+        candidates = candidates[np.argsort(gains)]
+
+        # Moves on disjoint ranges of positions replace different edges, so their gains add up
+        used = np.zeros(n, dtype=bool)
+        for best in candidates.tolist():
+            i, j = divmod(best, n)
+            if active is not None:
+                # The targets of improving moves, applied or not, are searched again
+                active[closed[[i, i + 1, j, j + 1]]] = True
+            if used[i:j + 1].any():
+                continue
+            used[i:j + 1] = True
+            order[i + 1:j + 1] = order[i + 1:j + 1][::-1].copy()
+            moves += 1
+            if moves == max_moves:
+                break
+    return order, evaluated
+
+
+class SlewScheduler:
+    """
+    Patrol planner for one PU: keeps the slew times between the targets up to date and orders the
+    targets to minimize the time of a full cycle.
+
+    :param solver: PanTiltSolver of the PU
+    :param pan_rate: maximum pan rate in degrees/s
+    :param tilt_rate: maximum tilt rate in degrees/s
+    :param pan_acceleration: pan acceleration in degrees/s^2
+    :param tilt_acceleration: tilt acceleration in degrees/s^2
+    :param dwell: default seconds spent on each target
+    :param continuous_pan: whether pan can turn through +-180 (False for units with end stops)
+    :param capacity: initial number of target slots (grows as needed)
+    """
+
+    def __init__(self, solver, pan_rate: float, tilt_rate: float, pan_acceleration: float, tilt_acceleration: float,
+                 dwell: float = 0.0, continuous_pan: bool = True, capacity: int = 64):
+        self.solver = solver
+        self.pan_rate = pan_rate
+        self.tilt_rate = tilt_rate
+        self.pan_acceleration = pan_acceleration
+        self.tilt_acceleration = tilt_acceleration
+        self.dwell = dwell
+        self.continuous_pan = continuous_pan
+
+        self.slots = {}           # target id -> slot
+        self.ids = []             # slot -> target id (None when free)
+        self.free = []
+        self.pan = np.zeros(capacity)
+        self.tilt = np.zeros(capacity)
+        self.dwells = np.zeros(capacity)
+        self.times = np.zeros((capacity, capacity))
+        self.cycle = _NO_SLOTS    # slots in the order of the last plan
+        self.changed = np.zeros(capacity, dtype=bool)  # slots whose edges changed since the last plan
+        self.evaluated = 0        # 2-opt moves evaluated so far
+
+    def __len__(self):
+        return len(self.slots)
+
+    def _reserve(self, size: int):
+        capacity = len(self.pan)
+        if size <= capacity:
+            return
+        new_capacity = max(size, 2 * capacity)
+        for name, dtype in (('pan', float), ('tilt', float), ('dwells', float), ('changed', bool)):
+            new = np.zeros(new_capacity, dtype=dtype)
+            new[:capacity] = getattr(self, name)
+            setattr(self, name, new)
+        times = np.zeros((new_capacity, new_capacity))
+        times[:capacity, :capacity] = self.times
+        self.times = times
+
+    def _slots_for(self, target_ids) -> np.ndarray:
+        slots = np.empty(len(target_ids), dtype=np.intp)
+        for index, target in enumerate(target_ids):
+            slot = self.slots.get(target)
+            if slot is None:
+                if self.free:
+                    slot = self.free.pop()
+                    self.ids[slot] = target
+                else:
+                    slot = len(self.ids)
+                    self.ids.append(target)
+                self.slots[target] = slot
+            slots[index] = slot
+        self._reserve(len(self.ids))
+        return slots
+
+    def update(self, target_ids, lat, lon, h, dwell=None):
+        """
+        Inserts or moves targets and updates their slew times.
+
+        :param target_ids: sequence of unique hashable target ids
+        :param lat: degrees
+        :param lon: degrees
+        :param h: meters
+        :param dwell: seconds on each of these targets, scalar or per target; default: the scheduler's
+                      dwell for new targets, unchanged for known ones
+        """
+        target_ids = list(target_ids)
+        if len(set(target_ids)) != len(target_ids):
+            raise ValueError("each target can only be updated once per call")
+        new = np.array([target not in self.slots for target in target_ids], dtype=bool)
+        slots = self._slots_for(target_ids)
+        pan, tilt = self.solver.solve(np.atleast_1d(lat), np.atleast_1d(lon), np.atleast_1d(h))
+        self.pan[slots] = pan
+        self.tilt[slots] = tilt
+        if dwell is not None:
+            self.dwells[slots] = dwell
+        else:
+            self.dwells[slots[new]] = self.dwell
+
+        # Only the rows and columns of the moved targets change
+        used = len(self.ids)
+        rows = slew_times(self.pan[slots, None], self.tilt[slots, None], self.pan[None, :used], self.tilt[None, :used],
+                          self.pan_rate, self.tilt_rate, self.pan_acceleration, self.tilt_acceleration, self.continuous_pan)
+        self.times[slots, :used] = rows
+        self.times[:used, slots] = rows.T
+        self.changed[slots] = True
+
+    def remove(self, target_ids):
+        """
+        Forgets targets. Unknown ids are ignored.
+        """
+        removed = []
+        for target in target_ids:
+            slot = self.slots.pop(target, None)
+            if slot is not None:
+                self.ids[slot] = None
+                self.free.append(slot)
+                removed.append(slot)
+        if removed:
+            # The slots may be reused by new targets, which have no place in the cycle yet. The
+            # neighbours of the removed targets get a new edge.
+            removed = np.isin(self.cycle, removed)
+            self.changed[np.roll(self.cycle, 1)[removed]] = True
+            self.changed[np.roll(self.cycle, -1)[removed]] = True
+            self.cycle = self.cycle[~removed]
+
+    def slew_time_matrix(self):
+        """
+        :returns: (target ids, (N, N) slew times in seconds between them)
+        """
+        slots = np.fromiter(self.slots.values(), dtype=np.intp, count=len(self.slots))
+        return list(self.slots), self.times[np.ix_(slots, slots)]
+
+    def plan(self, pan: float = None, tilt: float = None, max_moves: int = 10000) -> SlewPlan:
+        """
+        Re-plans the patrol cycle, starting from the previous plan.
+
+        :param pan: current pan of the PU in degrees; with tilt, the plan starts at the target
+                    closest to the current pointing direction
+        :param tilt: current tilt of the PU in degrees
+        :param max_moves: upper bound on 2-opt moves
+        :returns: SlewPlan
+        """
+        if not self.slots:
+            self.cycle = _NO_SLOTS
+            return SlewPlan([], np.empty(0), 0.0)
+
+        active = np.zeros(len(self.ids), dtype=bool)
+        active[list(self.slots.values())] = True
+        cycle = self.cycle
+        in_cycle = np.zeros(len(self.ids), dtype=bool)
+        in_cycle[cycle] = True
+        missing = np.flatnonzero(active & ~in_cycle)
+
+        if len(missing) > len(cycle):
+            slots = np.flatnonzero(active)
+            cycle = slots[nearest_neighbour_cycle(self.times[np.ix_(slots, slots)])]
+            changed = None
+        else:
+            cycle = self._insert(cycle, missing)
+            changed = self.changed
+        cycle, evaluated = _two_opt(self.times, cycle, max_moves, changed)
+        self.evaluated += evaluated
+        self.changed[:] = False
+
+        start_time = None
+        if pan is not None and tilt is not None:
+            start_times = slew_times(pan, tilt, self.pan[cycle], self.tilt[cycle], self.pan_rate, self.tilt_rate,
+                                     self.pan_acceleration, self.tilt_acceleration, self.continuous_pan)
+            start = int(np.argmin(start_times))
+            cycle = np.roll(cycle, -start)
+            start_time = start_times[start]
+        self.cycle = cycle
+
+        legs = self.times[np.roll(cycle, 1), cycle]
+        cycle_time = float(legs.sum() + self.dwells[cycle].sum())
+        if start_time is not None:
+            legs[0] = start_time
+        return SlewPlan([self.ids[slot] for slot in cycle.tolist()], legs, cycle_time)
+
+    def _insert(self, cycle: np.ndarray, slots: np.ndarray) -> np.ndarray:
+        """
+        Cheapest insertion of `slots` into `cycle`, one at a time.
+        """
+        cycle = list(cycle.tolist())
+        for slot in slots.tolist():
+            if len(cycle) < 2:
+                cycle.append(slot)
+                continue
+            here = np.array(cycle, dtype=np.intp)
+            after = np.roll(here, -1)
+            cost = self.times[here, slot] + self.times[slot, after] - self.times[here, after]
+            cycle.insert(int(np.argmin(cost)) + 1, slot)
+        return np.array(cycle, dtype=np.intp)
@@ -0,0 +1,336 @@
+# Local micro-batching conversion service.
+#
+# Processes that each make small pan/tilt or conversion calls cannot batch on their own. The
+# PanTiltServer accepts requests from many clients over a Unix domain socket or TCP localhost,
+# coalesces the requests for the same operation that arrive within `window` seconds into one
+# vectorized call, and sends every client its own slice of the results. If the coalesced call
+# raises, the requests are evaluated one by one, so that only the failing ones get an error.
+#
+# Binary framing, little-endian, one frame per request/response:
+#   request:  uint32 request_id, uint16 op, uint16 reserved, uint32 rows, rows x inputs float64 (row-major)
+#   response: uint32 request_id, uint16 status, uint16 reserved, uint32 n, then
+#             status 0: n x outputs float64 (row-major); otherwise: n bytes of UTF-8 error message
+# The number of inputs and outputs per row is fixed by the op, see OPERATIONS.
+
+import asyncio
+import itertools
+import struct
+from typing import NamedTuple
+import numpy as np
+from geopoint.geo_convert import geodetic_to_enu, ecef_to_geodetic
+from geopoint.pan_tilt import geodetic_to_pan_tilt_with_offsets
+
+HEADER = struct.Struct('<IHHI')
+MAX_ROWS = 1 << 20
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+
+class Operation(NamedTuple):
+    name: str
+    inputs: int
+    outputs: int
+    function: object
+
+
+# op code -> Operation; the inputs are the positional arguments of the function, in order
+OPERATIONS = {
+    1: Operation('geodetic_to_pan_tilt_with_offsets', 9, 2, geodetic_to_pan_tilt_with_offsets),
+    2: Operation('geodetic_to_enu', 6, 3, geodetic_to_enu),
+    3: Operation('ecef_to_geodetic', 3, 3, ecef_to_geodetic),
+}
+OP_CODES = {operation.name: code for code, operation in OPERATIONS.items()}
+
+
+class _Batcher:
+    """
+    Collects the requests for one operation and evaluates them in one vectorized call.
+    """
+
+    def __init__(self, operation: Operation, window: float, max_rows: int):
+        self.operation = operation
+        self.window = window
+        self.max_rows = max_rows
+        self.pending = []
+        self.rows = 0
+        self.timer = None
+        self.calls = 0
+
+    def submit(self, inputs: np.ndarray) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((inputs, future))
+        self.rows += len(inputs)
+        if self.rows >= self.max_rows:
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.window, self.flush)
+        return future
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        pending, self.pending, self.rows = self.pending, [], 0
+        if not pending:
+            return
+        self.calls += 1
+        try:
+            outputs = self._evaluate(np.concatenate([request for request, _ in pending]))
+        except Exception:
+            # Evaluate the requests one by one, so that only the bad ones get an error
+            for request, future in pending:
+                try:
+                    result = self._evaluate(request)
+                except Exception as error:
+                    if not future.done():
+                        future.set_exception(error)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+            return
+        start = 0
+        for request, future in pending:
+            if not future.done():
+                future.set_result(outputs[start:start + len(request)])
+            start += len(request)
+
+    def _evaluate(self, inputs: np.ndarray) -> np.ndarray:
+        return np.column_stack(np.broadcast_arrays(*self.operation.function(*inputs.T)))
+
+
+class PanTiltServer:
+    """
+    Micro-batching server for the operations in OPERATIONS.
+
+    :param window: seconds to wait for more requests after the first one of a batch
+    :param max_batch: rows at which a batch is evaluated without waiting for the window to end
+    """
+
+    def __init__(self, window: float = 0.0005, max_batch: int = 65536):
+        self.window = window
+        self.max_batch = max_batch
+        self.batchers = {code: _Batcher(operation, window, max_batch) for code, operation in OPERATIONS.items()}
+        self.server = None
+        self.requests = 0
+
+    @property
+    def batches(self) -> int:
+        return sum(batcher.calls for batcher in self.batchers.values())
+
+    async def start(self, path=None, host: str = '127.0.0.1', port: int = 0):
+        """
+        Starts listening on the Unix domain socket `path`, or on TCP (host, port) if path is None.
+        """
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self._serve, path)
+        else:
+            self.server = await asyncio.start_server(self._serve, host, port)
+        return self
+
+    @property
+    def address(self):
+        return self.server.sockets[0].getsockname()
+
+    async def serve_forever(self):
+        await self.server.serve_forever()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        tasks = set()
+        drain_lock = asyncio.Lock()
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(HEADER.size)
+                except asyncio.IncompleteReadError:
+                    break
+                request_id, op, _, rows = HEADER.unpack(header)
+                operation = OPERATIONS.get(op)
+                if operation is None or rows > MAX_ROWS:
+                    # The payload size is unknown, so the stream cannot be resynchronized
+                    message = f"unknown op {op}" if operation is None else f"too many rows ({rows} > {MAX_ROWS})"
+                    self._write_error(writer, request_id, message)
+                    break
+                payload = await reader.readexactly(rows * operation.inputs * 8)
+                inputs = np.frombuffer(payload, dtype='<f8').reshape(rows, operation.inputs)
+                self.requests += 1
+                task = asyncio.ensure_future(self._respond(writer, drain_lock, request_id, self.batchers[op].submit(inputs)))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+            await writer.drain()
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, drain_lock: asyncio.Lock, request_id: int, future):
+        try:
+            outputs = await future
+        except Exception as error:
+            self._write_error(writer, request_id, f"{type(error).__name__}: {error}")
+        else:
+            writer.write(HEADER.pack(request_id, STATUS_OK, 0, len(outputs)) + np.ascontiguousarray(outputs, dtype='<f8').tobytes())
+        # Wait while the transport buffer is above its high-water mark, so that a client that
+        # does not read its responses cannot make the server buffer them without bound
+        try:
+            async with drain_lock:
+                await writer.drain()
+        except ConnectionError:
+            pass
+
+    @staticmethod
+    def _write_error(writer, request_id: int, message: str):
+        encoded = message.encode()
+        writer.write(HEADER.pack(request_id, STATUS_ERROR, 0, len(encoded)) + encoded)
+
+
+class ServiceError(RuntimeError):
+    pass
+
+
+class _Connection:
+    """
+    One client connection. Requests may be pipelined; responses are matched by request id.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.waiting = {}  # request id -> (future, outputs per row)
+        self.ids = itertools.count()
+        self.receiver = asyncio.ensure_future(self._receive())
+
+    async def _receive(self):
+        try:
+            while True:
+                request_id, status, _, n = HEADER.unpack(await self.reader.readexactly(HEADER.size))
+                future, outputs = self.waiting.pop(request_id)
+                if status == STATUS_OK:
+                    payload = await self.reader.readexactly(n * outputs * 8)
+                    if not future.done():
+                        future.set_result(np.frombuffer(payload, dtype='<f8').reshape(n, outputs))
+                else:
+                    message = (await self.reader.readexactly(n)).decode()
+                    if not future.done():
+                        future.set_exception(ServiceError(message))
+        except Exception as error:
+            for future, _ in self.waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(f"connection to the service lost: {error!r}"))
+            self.waiting.clear()
+
+    async def request(self, op: int, inputs: np.ndarray) -> np.ndarray:
+        if self.receiver.done():
+            raise ConnectionError("connection to the service is closed")
+        request_id = next(self.ids) & 0xFFFFFFFF
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[request_id] = (future, OPERATIONS[op].outputs)
+        self.writer.write(HEADER.pack(request_id, op, 0, len(inputs)) + np.ascontiguousarray(inputs, dtype='<f8').tobytes())
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        self.receiver.cancel()
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+
+class PanTiltClient:
+    """
+    Async client of a PanTiltServer with a pool of connections.
+
+    Each call takes the least busy connection of the pool (opening a new one while the pool is
+    below pool_size), so concurrent calls from many tasks are spread over the connections and
+    pipelined on each of them.
+
+    :param path: Unix domain socket of the server, or None for TCP
+    :param host: TCP host
+    :param port: TCP port
+    :param pool_size: maximum number of connections
+    """
+
+    def __init__(self, path=None, host: str = '127.0.0.1', port: int = None, pool_size: int = 4):
+        if path is None and port is None:
+            raise ValueError("either a Unix socket path or a TCP port is required")
+        self.path = path
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.connections = []
+        self._connecting = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _connection(self) -> _Connection:
+        self.connections = [connection for connection in self.connections if not connection.receiver.done()]
+        idle = min(self.connections, key=lambda connection: len(connection.waiting), default=None)
+        if idle is not None and (not idle.waiting or len(self.connections) >= self.pool_size):
+            return idle
+        if self._connecting is None:
+            self._connecting = asyncio.ensure_future(self._open())
+        connecting = self._connecting
+        try:
+            return await asyncio.shield(connecting)
+        finally:
+            if self._connecting is connecting and connecting.done():
+                self._connecting = None
+
+    async def _open(self) -> _Connection:
+        if self.path is not None:
+            reader, writer = await asyncio.open_unix_connection(self.path)
+        else:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        connection = _Connection(reader, writer)
+        self.connections.append(connection)
+        return connection
+
+    async def call(self, name: str, *columns) -> tuple:
+        """
+        Evaluates the operation `name` (see OPERATIONS) on the service.
+
+        :param columns: the positional arguments of the operation, scalars or equally long arrays
+        :returns: tuple of output columns; floats for all-scalar arguments, otherwise (N,) arrays
+        """
+        op = OP_CODES[name]
+        if len(columns) != OPERATIONS[op].inputs:
+            raise TypeError(f"{name} takes {OPERATIONS[op].inputs} arguments, got {len(columns)}")
+        scalar = all(np.ndim(column) == 0 for column in columns)
+        inputs = np.column_stack(np.broadcast_arrays(*(np.atleast_1d(np.asarray(column, dtype=float)) for column in columns)))
+        outputs = await (await self._connection()).request(op, inputs)
+        if scalar:
+            return tuple(float(value) for value in outputs[0])
+        return tuple(outputs.T)
+
+    async def geodetic_to_pan_tilt_with_offsets(self, target_lat, target_lon, target_h, origin_lat, origin_lon, origin_h, north_offset, roll_offset, pitch_offset):
+        return await self.call('geodetic_to_pan_tilt_with_offsets', target_lat, target_lon, target_h, origin_lat, origin_lon, origin_h, north_offset, roll_offset, pitch_offset)
+
+    async def geodetic_to_enu(self, lat, lon, h, lat0, lon0, h0):
+        return await self.call('geodetic_to_enu', lat, lon, h, lat0, lon0, h0)
+
+    async def ecef_to_geodetic(self, x, y, z):
+        return await self.call('ecef_to_geodetic', x, y, z)
+
+    async def close(self):
+        connections, self.connections = self.connections, []
+        for connection in connections:
+            await connection.close()
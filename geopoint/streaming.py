@@ -0,0 +1,200 @@
+# Streaming conversion of target fixes (e.g. from a GNSS feed) to pan/tilt commands.
+#
+# Fixes are collected into micro-batches that are converted with a single vectorized
+# PanTiltSolver call. A batch is emitted as soon as it holds `batch_size` fixes, or when its
+# oldest fix has waited `max_latency` seconds. Fixes are buffered in a bounded buffer: when
+# the consumer falls behind, the oldest fixes are dropped, since a stale position is of no use
+# for pointing a camera.
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+import numpy as np
+
+
+class TargetFix(NamedTuple):
+    timestamp: float
+    target_id: object
+    lat: float
+    lon: float
+    h: float
+
+
+class PanTiltBatch(NamedTuple):
+    timestamp: np.ndarray
+    target_id: np.ndarray
+    pan: np.ndarray
+    tilt: np.ndarray
+    range: np.ndarray
+
+
+class DropOldestBuffer:
+    """
+    FIFO buffer of at most `max_size` items that drops its oldest item when a new one does not fit.
+    Items are stored together with their arrival time, so the age of the oldest item is known.
+    Not thread-safe on its own.
+    """
+    __slots__ = ('max_size', 'dropped', '_items')
+
+    def __init__(self, max_size: int):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.dropped = 0
+        self._items = deque()
+
+    def __len__(self):
+        return len(self._items)
+
+    def push(self, item, arrival: float):
+        if len(self._items) >= self.max_size:
+            self._items.popleft()
+            self.dropped += 1
+        self._items.append((arrival, item))
+
+    def oldest_arrival(self) -> float:
+        return self._items[0][0]
+
+    def pop_batch(self, size: int) -> list:
+        items = self._items
+        return [items.popleft()[1] for _ in range(min(size, len(items)))]
+
+
+class PanTiltStream:
+    """
+    Micro-batching pipeline stage from target fixes to pan/tilt commands for one pointing unit.
+
+    Use run() for ordinary iterables (read on a background thread) and arun() for async iterables.
+    Both yield PanTiltBatch tuples of arrays, in arrival order.
+
+    :param solver: PanTiltSolver of the pointing unit
+    :param batch_size: maximum number of fixes converted at once
+    :param max_latency: maximum time in seconds a fix waits for its batch to fill up
+    :param max_buffer: maximum number of buffered fixes before the oldest are dropped
+    """
+
+    def __init__(self, solver, batch_size: int = 256, max_latency: float = 0.005, max_buffer: int = 4096):
+        self.solver = solver
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self.converted = 0
+        self.batches = 0
+
+    def convert(self, fixes) -> PanTiltBatch:
+        """
+        Converts a list of (timestamp, target_id, lat, lon, h) fixes with one vectorized solver call.
+        """
+        timestamps, target_ids, lats, lons, heights = zip(*fixes)
+        positions = np.empty((len(fixes), 3))
+        positions[:, 0] = lats
+        positions[:, 1] = lons
+        positions[:, 2] = heights
+        pan, tilt, r = self.solver.solve_with_range(positions)
+        self.converted += len(fixes)
+        self.batches += 1
+        return PanTiltBatch(np.asarray(timestamps, dtype=float), np.asarray(target_ids), pan, tilt, r)
+
+    def _ready(self, buffer: DropOldestBuffer, done: bool, now: float) -> bool:
+        return len(buffer) >= self.batch_size or done or (len(buffer) > 0 and now - buffer.oldest_arrival() >= self.max_latency)
+
+    def run(self, fixes):
+        """
+        Generator of PanTiltBatch from an iterable of fixes, which is consumed on a background thread.
+        """
+        buffer = DropOldestBuffer(self.max_buffer)
+        condition = threading.Condition()
+        state = {'done': False, 'stop': False, 'error': None}
+
+        def read():
+            try:
+                for fix in fixes:
+                    with condition:
+                        if state['stop']:
+                            return
+                        buffer.push(fix, time.monotonic())
+                        # The consumer waits without a timeout while the buffer is empty
+                        if len(buffer) == 1 or len(buffer) >= self.batch_size:
+                            condition.notify()
+            except BaseException as error:
+                state['error'] = error
+            finally:
+                with condition:
+                    state['done'] = True
+                    condition.notify()
+
+        reader = threading.Thread(target=read, name='PanTiltStream reader', daemon=True)
+        reader.start()
+        try:
+            while True:
+                with condition:
+                    while not self._ready(buffer, state['done'], time.monotonic()):
+                        timeout = buffer.oldest_arrival() + self.max_latency - time.monotonic() if len(buffer) else None
+                        condition.wait(timeout)
+                    self.dropped = buffer.dropped
+                    batch = buffer.pop_batch(self.batch_size)
+                if not batch:
+                    break
+                yield self.convert(batch)
+            if state['error'] is not None:
+                raise state['error']
+        finally:
+            with condition:
+                state['stop'] = True
+
+    async def arun(self, fixes):
+        """
+        Async generator of PanTiltBatch from an async iterable of fixes.
+        """
+        loop = asyncio.get_running_loop()
+        buffer = DropOldestBuffer(self.max_buffer)
+        arrived = asyncio.Event()
+        state = {'done': False}
+
+        async def read():
+            try:
+                async for fix in fixes:
+                    buffer.push(fix, loop.time())
+                    if len(buffer) == 1 or len(buffer) >= self.batch_size:
+                        arrived.set()
+            finally:
+                state['done'] = True
+                arrived.set()
+
+        reader = asyncio.ensure_future(read())
+        try:
+            while True:
+                while not self._ready(buffer, state['done'], loop.time()):
+                    timeout = buffer.oldest_arrival() + self.max_latency - loop.time() if len(buffer) else None
+                    arrived.clear()
+                    try:
+                        await asyncio.wait_for(arrived.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                self.dropped = buffer.dropped
+                batch = buffer.pop_batch(self.batch_size)
+                if not batch:
+                    break
+                yield self.convert(batch)
+            await reader  # Re-raises errors from the source
+        finally:
+            reader.cancel()
+
+
+def stream_pan_tilt(fixes, solver, batch_size: int = 256, max_latency: float = 0.005, max_buffer: int = 4096):
+    """
+    Converts an iterable of (timestamp, target_id, lat, lon, h) fixes to a stream of PanTiltBatch.
+    See PanTiltStream.
+    """
+    return PanTiltStream(solver, batch_size, max_latency, max_buffer).run(fixes)
+
+
+def astream_pan_tilt(fixes, solver, batch_size: int = 256, max_latency: float = 0.005, max_buffer: int = 4096):
+    """
+    Converts an async iterable of (timestamp, target_id, lat, lon, h) fixes to an async stream of PanTiltBatch.
+    See PanTiltStream.
+    """
+    return PanTiltStream(solver, batch_size, max_latency, max_buffer).arun(fixes)
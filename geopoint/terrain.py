@@ -0,0 +1,306 @@
+# Terrain-aware ray casting against gridded elevation models.
+#
+# Elevation tiles are regular lat/lon grids of heights above the WGS-84 ellipsoid, stored as
+# .npy files or raw binary rasters and memory-mapped on first use. Each loaded tile gets a
+# max-height mip pyramid, which lets rays be marched coarse-to-fine: a ray segment is only
+# refined if it could pass below the highest terrain in the cells it spans. Tiles are kept
+# in an LRU cache, so national-scale models work without loading every tile into memory.
+
+from collections import OrderedDict
+from typing import Optional
+import numpy as np
+from geopoint.geo_convert import a, e_sq, ecef_to_geodetic_batch
+
+# Smallest radius of curvature of the ellipsoid (meridional, at the equator). A straight segment
+# of length L sags at most L^2 / (8 R) below the line between its end point heights.
+_MIN_RADIUS_OF_CURVATURE = a * (1 - e_sq)
+
+
+class ElevationTile:
+    """
+    A regular lat/lon grid of heights above the WGS-84 ellipsoid, in meters.
+
+    Row 0 is the northern edge and column 0 the western edge; the outer samples lie exactly on
+    the tile bounds. Heights between samples are interpolated bilinearly.
+
+    :param heights: (rows, cols) array of heights, e.g. a memory-mapped array
+    :param south: latitude of the southern edge in degrees
+    :param west: longitude of the western edge in degrees
+    :param north: latitude of the northern edge in degrees
+    :param east: longitude of the eastern edge in degrees
+    """
+    __slots__ = ('heights', 'south', 'west', 'north', 'east', 'lat_step', 'lon_step', 'pyramid')
+
+    def __init__(self, heights: np.ndarray, south: float, west: float, north: float, east: float):
+        if heights.ndim != 2 or heights.shape[0] < 2 or heights.shape[1] < 2:
+            raise ValueError(f"expected a 2D height grid of at least 2x2 samples, got {heights.shape}")
+        self.heights = heights
+        self.south = south
+        self.west = west
+        self.north = north
+        self.east = east
+        self.lat_step = (north - south) / (heights.shape[0] - 1)
+        self.lon_step = (east - west) / (heights.shape[1] - 1)
+        self.pyramid = build_max_pyramid(heights)
+
+    @classmethod
+    def load(cls, path, south: float, west: float, north: float, east: float, shape=None, dtype='<f4'):
+        """
+        Memory-maps a tile from a .npy file, or from a raw binary file (which needs `shape` and `dtype`).
+        """
+        path = str(path)
+        if path.endswith('.npy'):
+            heights = np.load(path, mmap_mode='r')
+        else:
+            if shape is None:
+                raise ValueError(f"the shape of raw elevation file {path} must be given")
+            heights = np.memmap(path, dtype=dtype, mode='r', shape=tuple(shape))
+        return cls(heights, south, west, north, east)
+
+    def _rows_cols(self, lat, lon):
+        rows = np.clip((self.north - lat) / self.lat_step, 0, self.heights.shape[0] - 1)
+        cols = np.clip((lon - self.west) / self.lon_step, 0, self.heights.shape[1] - 1)
+        return rows, cols
+
+    def sample(self, lat, lon) -> np.ndarray:
+        """
+        Bilinearly interpolated heights at (lat, lon); positions outside the tile are clamped to its edge.
+        """
+        rows, cols = self._rows_cols(np.asarray(lat, dtype=float), np.asarray(lon, dtype=float))
+        i = np.minimum(rows.astype(np.intp), self.heights.shape[0] - 2)
+        j = np.minimum(cols.astype(np.intp), self.heights.shape[1] - 2)
+        di = rows - i
+        dj = cols - j
+        heights = self.heights
+        top = heights[i, j] * (1 - dj) + heights[i, j + 1] * dj
+        bottom = heights[i + 1, j] * (1 - dj) + heights[i + 1, j + 1] * dj
+        return top * (1 - di) + bottom * di
+
+    def max_height(self, lat_lo, lat_hi, lon_lo, lon_hi) -> np.ndarray:
+        """
+        Upper bound of the terrain height inside the boxes [lat_lo, lat_hi] x [lon_lo, lon_hi]
+        (clipped to the tile), read from the coarsest pyramid level at which each box spans
+        at most 2x2 cells.
+        """
+        row_lo, col_lo = self._rows_cols(lat_hi, lon_lo)
+        row_hi, col_hi = self._rows_cols(lat_lo, lon_hi)
+        n_rows, n_cols = self.pyramid[0].shape
+        i0 = np.minimum(row_lo.astype(np.intp), n_rows - 1)
+        i1 = np.minimum(row_hi.astype(np.intp), n_rows - 1)
+        j0 = np.minimum(col_lo.astype(np.intp), n_cols - 1)
+        j1 = np.minimum(col_hi.astype(np.intp), n_cols - 1)
+
+        # Level k cells cover 2^k x 2^k level 0 cells
+        extent = np.maximum(i1 - i0, j1 - j0) + 1
+        levels = np.minimum(np.ceil(np.log2(extent)).astype(np.intp), len(self.pyramid) - 1)
+
+        result = np.empty(np.shape(i0), dtype=float)
+        for level in np.unique(levels):
+            index = levels == level
+            cells = self.pyramid[level]
+            k0, k1 = i0[index] >> level, i1[index] >> level
+            l0, l1 = j0[index] >> level, j1[index] >> level
+            result[index] = np.maximum(np.maximum(cells[k0, l0], cells[k0, l1]), np.maximum(cells[k1, l0], cells[k1, l1]))
+        return result
+
+
+def build_max_pyramid(heights: np.ndarray) -> list:
+    """
+    Builds a max-height mip pyramid. Level 0 holds, for each cell between four neighbouring
+    samples, the highest of those samples (an upper bound of the bilinear surface in the cell).
+    Each following level holds the maximum of 2x2 cells of the previous one, down to a single cell.
+    """
+    heights = np.asarray(heights, dtype=np.float32)
+    level = np.maximum(np.maximum(heights[:-1, :-1], heights[:-1, 1:]), np.maximum(heights[1:, :-1], heights[1:, 1:]))
+    pyramid = [level]
+    while level.shape[0] > 1 or level.shape[1] > 1:
+        rows, cols = level.shape
+        padded = np.full((rows + rows % 2, cols + cols % 2), -np.inf, dtype=np.float32)
+        padded[:rows, :cols] = level
+        level = padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2).max(axis=(1, 3))
+        pyramid.append(level)
+    return pyramid
+
+
+class ElevationModel:
+    """
+    A collection of elevation tiles on a regular grid of `tile_size` x `tile_size` degrees,
+    loaded lazily and kept in an LRU cache of at most `max_cached_tiles` tiles.
+
+    :param tiles: maps a tile index (floor(south / tile_size), floor(west / tile_size)) to either
+        a path of a .npy/raw height file, or an ElevationTile
+    :param tile_size: size of the tiles in degrees
+    :param max_cached_tiles: number of tiles loaded from files that are kept in memory
+    :param fill_height: height used where no tile exists, in meters
+    :param raw_shape: (rows, cols) of raw height files
+    :param raw_dtype: data type of raw height files
+    :param min_step: ray segments are refined until they are at most this long, in meters
+    :param coarse_step: length of the initial ray segments, in meters
+    :param max_ray_length: rays with an unlimited length are cast this far, in meters
+    """
+
+    def __init__(self, tiles: dict, tile_size: float = 1.0, max_cached_tiles: int = 16, fill_height: float = 0.0,
+                 raw_shape=None, raw_dtype='<f4', min_step: float = 5.0, coarse_step: float = 4096.0,
+                 max_ray_length: float = 100e3):
+        self.tiles = dict(tiles)
+        self.tile_size = tile_size
+        self.max_cached_tiles = max_cached_tiles
+        self.fill_height = fill_height
+        self.raw_shape = raw_shape
+        self.raw_dtype = raw_dtype
+        self.min_step = min_step
+        self.coarse_step = coarse_step
+        self.max_ray_length = max_ray_length
+        self.loads = 0
+        self.evictions = 0
+        self._cache = OrderedDict()
+
+    def get_tile(self, key) -> Optional[ElevationTile]:
+        """
+        Returns the tile with the given index, loading it (and evicting the least recently used tile) if needed.
+        """
+        source = self.tiles.get(key)
+        if source is None or isinstance(source, ElevationTile):
+            return source
+        tile = self._cache.get(key)
+        if tile is not None:
+            self._cache.move_to_end(key)
+            return tile
+
+        south, west = key[0] * self.tile_size, key[1] * self.tile_size
+        tile = ElevationTile.load(source, south, west, south + self.tile_size, west + self.tile_size, self.raw_shape, self.raw_dtype)
+        self.loads += 1
+        self._cache[key] = tile
+        while len(self._cache) > self.max_cached_tiles:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+        return tile
+
+    def _tile_groups(self, lat, lon):
+        """
+        Yields (tile or None, index array) for the positions that fall into each tile.
+        """
+        tile_lat = np.floor(lat / self.tile_size).astype(np.int64)
+        tile_lon = np.floor(lon / self.tile_size).astype(np.int64)
+        keys, inverse = np.unique(np.stack([tile_lat, tile_lon], axis=-1), axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.searchsorted(inverse[order], np.arange(len(keys) + 1))
+        for group, (key_lat, key_lon) in enumerate(keys.tolist()):
+            yield self.get_tile((key_lat, key_lon)), order[bounds[group]:bounds[group + 1]]
+
+    def sample(self, lat, lon) -> np.ndarray:
+        """
+        Terrain heights at (lat, lon), in meters.
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        result = np.full(lat.shape, self.fill_height, dtype=float)
+        flat_lat, flat_lon, flat_result = lat.ravel(), lon.ravel(), result.reshape(-1)
+        for tile, index in self._tile_groups(flat_lat, flat_lon):
+            if tile is not None:
+                flat_result[index] = tile.sample(flat_lat[index], flat_lon[index])
+        return result
+
+    def max_height(self, lat_lo, lat_hi, lon_lo, lon_hi) -> np.ndarray:
+        """
+        Upper bound of the terrain height inside each lat/lon box. Boxes may straddle tile borders,
+        but must be smaller than a tile.
+        """
+        result = np.full(np.shape(lat_lo), -np.inf)
+        first_tile = None
+        for corner_lat, corner_lon in ((lat_lo, lon_lo), (lat_lo, lon_hi), (lat_hi, lon_lo), (lat_hi, lon_hi)):
+            corner_tile = np.stack([np.floor(corner_lat / self.tile_size), np.floor(corner_lon / self.tile_size)], axis=-1)
+            if first_tile is None:
+                first_tile = corner_tile
+                queries = np.arange(len(result))
+            else:
+                # Only boxes with a corner in another tile than their first corner need another pass
+                queries = np.flatnonzero(np.any(corner_tile != first_tile, axis=-1))
+            for tile, index in self._tile_groups(corner_lat[queries], corner_lon[queries]):
+                index = queries[index]
+                if tile is None:
+                    heights = self.fill_height
+                else:
+                    heights = tile.max_height(lat_lo[index], lat_hi[index], lon_lo[index], lon_hi[index])
+                result[index] = np.maximum(result[index], heights)
+        return result
+
+    def cast_rays(self, origins, directions, max_distance=np.inf, batch_size: int = 65536) -> np.ndarray:
+        """
+        Distance along each ray to its first intersection with the terrain, or inf if it does not hit
+        the terrain within max_distance (or starts below it). Rays are processed in batches of `batch_size`.
+
+        :param origins: (..., 3) ECEF positions in meters
+        :param directions: (..., 3) ECEF unit vectors
+        :param max_distance: meters, scalar or broadcastable to the rays
+        :returns: (...) distances in meters
+        """
+        directions = np.asarray(directions, dtype=float)
+        shape = directions.shape[:-1]
+        directions = directions.reshape(-1, 3)
+        origins = np.broadcast_to(np.asarray(origins, dtype=float), shape + (3,)).reshape(-1, 3)
+        max_distance = np.broadcast_to(np.asarray(max_distance, dtype=float), shape).ravel()
+
+        result = np.empty(len(directions))
+        for start in range(0, len(directions), batch_size):
+            stop = start + batch_size
+            result[start:stop] = self._cast_batch(origins[start:stop], directions[start:stop], max_distance[start:stop])
+        return result.reshape(shape)
+
+    def _cast_batch(self, origins, directions, max_distance):
+        n_rays = len(directions)
+        max_distance = np.where(np.isfinite(max_distance), max_distance, self.max_ray_length)
+        # Only rays starting above the terrain can hit it
+        origin_points = ecef_to_geodetic_batch(origins)
+        active = origin_points[:, 2] > self.sample(origin_points[:, 0], origin_points[:, 1])
+        counts = np.where(active, np.maximum(np.ceil(max_distance / self.coarse_step).astype(np.intp), 1), 0)
+
+        # Initial coarse segments, as (ray, start, length)
+        ray = np.repeat(np.arange(n_rays), counts)
+        first = np.repeat(np.cumsum(counts) - counts, counts)
+        length = np.repeat(max_distance / np.maximum(counts, 1), counts)
+        start = (np.arange(len(ray)) - first) * length
+
+        # A segment ending below the terrain bounds the first hit of its ray from above
+        bound = np.full(n_rays, np.inf)
+        hit = np.full(n_rays, np.inf)
+        while len(ray):
+            keep = start < bound[ray]
+            ray, start, length = ray[keep], start[keep], length[keep]
+
+            start_points = ecef_to_geodetic_batch(origins[ray] + directions[ray] * start[:, None])
+            end_points = ecef_to_geodetic_batch(origins[ray] + directions[ray] * (start + length)[:, None])
+            lat_lo = np.fmin(start_points[:, 0], end_points[:, 0])
+            lat_hi = np.fmax(start_points[:, 0], end_points[:, 0])
+            lon_lo = np.fmin(start_points[:, 1], end_points[:, 1])
+            lon_hi = np.fmax(start_points[:, 1], end_points[:, 1])
+            lowest = np.fmin(start_points[:, 2], end_points[:, 2]) - length * length / (8 * _MIN_RADIUS_OF_CURVATURE)
+
+            # Drop segments that stay above the highest terrain they pass over
+            candidate = lowest <= self.max_height(lat_lo, lat_hi, lon_lo, lon_hi)
+            ray, start, length = ray[candidate], start[candidate], length[candidate]
+            start_points, end_points = start_points[candidate], end_points[candidate]
+
+            above_end = end_points[:, 2] - self.sample(end_points[:, 0], end_points[:, 1])
+            below = above_end <= 0
+            np.minimum.at(bound, ray[below], start[below] + length[below])
+
+            fine = length <= self.min_step
+            if np.any(fine):
+                above_start = start_points[fine, 2] - self.sample(start_points[fine, 0], start_points[fine, 1])
+                crossing = (above_start > 0) & below[fine]
+                fraction = above_start[crossing] / (above_start[crossing] - above_end[fine][crossing])
+                np.minimum.at(hit, ray[fine][crossing], start[fine][crossing] + fraction * length[fine][crossing])
+
+            # Split the remaining segments in two
+            coarse = ~fine
+            half = length[coarse] / 2
+            ray = np.repeat(ray[coarse], 2)
+            start = np.stack([start[coarse], start[coarse] + half], axis=-1).ravel()
+            length = np.repeat(half, 2)
+
+        return hit
+
+    def __repr__(self):
+        return f"ElevationModel({len(self.tiles)} tiles, tile_size={self.tile_size!r}, cached={len(self._cache)}/{self.max_cached_tiles})"
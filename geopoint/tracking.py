@@ -0,0 +1,160 @@
+# Latency-compensating target tracking for a pointing unit (PU).
+#
+# Each track keeps its position, velocity and (optionally) acceleration in the PU's ENU frame,
+# estimated with a fixed-gain alpha-beta (constant velocity) or alpha-beta-gamma (constant
+# acceleration) filter. The state of all tracks lives in arrays indexed by track number, so
+# thousands of tracks are updated and predicted in one vectorized step. Predictions look ahead
+# by the command latency and come with pan/tilt rates, so the PU can be driven in velocity mode.
+
+from typing import NamedTuple
+import numpy as np
+
+CONSTANT_VELOCITY = 'cv'
+CONSTANT_ACCELERATION = 'ca'
+
+
+class TrackPrediction(NamedTuple):
+    pan: np.ndarray
+    tilt: np.ndarray
+    range: np.ndarray
+    pan_rate: np.ndarray
+    tilt_rate: np.ndarray
+
+
+class TargetTracker:
+    """
+    Array-backed alpha-beta(-gamma) tracker for targets seen by one pointing unit.
+
+    :param solver: PanTiltSolver of the PU; the tracks are kept in its ENU frame
+    :param model: 'cv' (constant velocity) or 'ca' (constant acceleration)
+    :param alpha: position gain
+    :param beta: velocity gain
+    :param gamma: acceleration gain ('ca' only)
+    :param capacity: initial number of track slots (grows as needed)
+    """
+
+    def __init__(self, solver, model: str = CONSTANT_VELOCITY, alpha: float = 0.5, beta: float = 0.2, gamma: float = 0.05, capacity: int = 64):
+        if model not in (CONSTANT_VELOCITY, CONSTANT_ACCELERATION):
+            raise ValueError(f"unknown model {model!r}, expected {CONSTANT_VELOCITY!r} or {CONSTANT_ACCELERATION!r}")
+        self.solver = solver
+        self.model = model
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma if model == CONSTANT_ACCELERATION else 0.0
+
+        self.position = np.zeros((capacity, 3))
+        self.velocity = np.zeros((capacity, 3))
+        self.acceleration = np.zeros((capacity, 3))
+        self.time = np.zeros(capacity)
+        self.count = np.zeros(capacity, dtype=np.int64)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.count))
+
+    @property
+    def body_from_enu(self) -> np.ndarray:
+        """
+        ENU -> body rotation of the PU, read from the solver so that set_offsets() takes effect.
+        """
+        return self.solver.matrix @ self.solver.frame.rotation.T
+
+    def _reserve(self, size: int):
+        capacity = len(self.time)
+        if size <= capacity:
+            return
+        new_capacity = max(size, 2 * capacity)
+        for name in ('position', 'velocity', 'acceleration', 'time', 'count'):
+            old = getattr(self, name)
+            new = np.zeros((new_capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:capacity] = old
+            setattr(self, name, new)
+
+    def update(self, tracks, timestamps, lat, lon, h):
+        """
+        Feeds new fixes to the tracks with the given (unique) indices.
+
+        :param tracks: (N,) integer track indices
+        :param timestamps: (N,) or scalar time of the fixes in seconds
+        :param lat: (N,) latitudes in degrees
+        :param lon: (N,) longitudes in degrees
+        :param h: (N,) heights in meters
+        """
+        tracks = np.atleast_1d(np.asarray(tracks, dtype=np.intp))
+        if len(np.unique(tracks)) != len(tracks):
+            raise ValueError("each track can only be updated once per call")
+        self._reserve(int(tracks.max(initial=-1)) + 1)
+        timestamps = np.broadcast_to(np.asarray(timestamps, dtype=float), tracks.shape)
+        measured = self.solver.frame.geodetic_to_enu(np.atleast_1d(lat), np.atleast_1d(lon), np.atleast_1d(h))
+        count = self.count[tracks]
+
+        # First fix: position only
+        new = count == 0
+        self.position[tracks[new]] = measured[new]
+        self.velocity[tracks[new]] = 0.0
+        self.acceleration[tracks[new]] = 0.0
+
+        # Second fix: velocity from the difference of the two fixes
+        second = count == 1
+        index = tracks[second]
+        dt = (timestamps[second] - self.time[index])[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            velocity = np.where(dt > 0, (measured[second] - self.position[index]) / dt, 0.0)
+        self.velocity[index] = velocity
+        self.position[index] = measured[second]
+
+        # Later fixes: predict, then correct with the residual
+        tracking = count >= 2
+        index = tracks[tracking]
+        dt = (timestamps[tracking] - self.time[index])[:, None]
+        safe_dt = np.where(dt > 0, dt, 1.0)
+        predicted_position = self.position[index] + self.velocity[index] * dt + 0.5 * self.acceleration[index] * dt * dt
+        predicted_velocity = self.velocity[index] + self.acceleration[index] * dt
+        residual = measured[tracking] - predicted_position
+        self.position[index] = predicted_position + self.alpha * residual
+        self.velocity[index] = predicted_velocity + self.beta / safe_dt * residual
+        if self.gamma:
+            self.acceleration[index] += 2.0 * self.gamma / (safe_dt * safe_dt) * residual
+
+        self.time[tracks] = timestamps
+        self.count[tracks] = count + 1
+
+    def remove(self, tracks):
+        """
+        Forgets the given tracks, so that their slots can be reused.
+        """
+        self.count[np.asarray(tracks, dtype=np.intp)] = 0
+
+    def predict(self, tracks, at_time, lookahead: float = 0.0) -> TrackPrediction:
+        """
+        Pan/tilt angles, range and angular rates for the predicted target positions at at_time + lookahead,
+        e.g. the current time plus the command latency of the PU.
+
+        :param tracks: (N,) integer track indices
+        :param at_time: time in seconds, scalar or (N,)
+        :param lookahead: seconds
+        :returns: TrackPrediction of (N,) arrays in [degrees, degrees, meters, degrees/s, degrees/s]
+        """
+        tracks = np.atleast_1d(np.asarray(tracks, dtype=np.intp))
+        dt = (np.asarray(at_time, dtype=float) + lookahead - self.time[tracks])[..., None]
+        position = self.position[tracks] + self.velocity[tracks] * dt + 0.5 * self.acceleration[tracks] * dt * dt
+        velocity = self.velocity[tracks] + self.acceleration[tracks] * dt
+
+        body_from_enu = self.body_from_enu
+        body = position @ body_from_enu.T
+        body_velocity = velocity @ body_from_enu.T
+        x, y, z = body[:, 0], body[:, 1], body[:, 2]
+        vx, vy, vz = body_velocity[:, 0], body_velocity[:, 1], body_velocity[:, 2]
+        horizontal_sq = x * x + y * y
+        horizontal = np.sqrt(horizontal_sq)
+        r = np.hypot(horizontal, z)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pan_rate = (x * vy - y * vx) / horizontal_sq
+            tilt_rate = (horizontal_sq * vz - z * (x * vx + y * vy)) / (horizontal * r * r)
+
+        return TrackPrediction(
+            np.rad2deg(np.arctan2(y, x)),
+            np.rad2deg(np.arctan2(z, horizontal)),
+            r,
+            np.rad2deg(pan_rate),
+            np.rad2deg(tilt_rate),
+        )
@@ -0,0 +1,299 @@
+# Composable coordinate transforms.
+#
+# A Transform is a chain of stages applied to (..., 3) arrays, composed with >>:
+#
+#   handover = enu_frame(camera_a).inverse() >> enu_frame(camera_b)      # ENU(A) -> ENU(B)
+#   to_pan_tilt = sacrs(29) >> geodetic() >> enu_frame(origin) >> body_rotation(north, pitch, roll) >> spherical()
+#
+# Consecutive affine stages (ECEF<->ENU, the body rotations of rotational_matrices, user given
+# affine maps) are multiplied into a single matrix and offset when the chain is built, so the
+# handover above is one matrix product per point instead of two conversions. A non-linear stage
+# directly followed by its own inverse (e.g. geodetic().inverse() >> geodetic()) is removed, and
+# so is an affine stage that ends up as the identity (within 1e-12, and 1e-6 for the offset).
+# The remaining non-linear stages (geodetic, SACRS, spherical) are vectorized, and a chain of any
+# length is applied with at most one scratch array besides the output.
+
+from typing import Optional
+import numpy as np
+from geopoint.geo_convert import (geodetic_to_ecef_batch, ecef_to_geodetic_batch, sacrs_to_geodetic, geodetic_to_sacrs,
+                                  LocalTangentFrame, _is_scalar_triple, _stack_columns, _output_buffer)
+from geopoint.rotational_matrices import rotation_matrices_zyx
+
+_IDENTITY_MATRIX_TOLERANCE = 1e-12
+_IDENTITY_OFFSET_TOLERANCE = 1e-6
+
+
+class _Affine:
+    """
+    points -> points @ matrix.T + offset
+    """
+    __slots__ = ('matrix', 'offset', 'orthonormal')
+
+    def __init__(self, matrix, offset, orthonormal: bool = False):
+        self.matrix = np.array(matrix, dtype=float).reshape(3, 3)
+        self.offset = np.array(offset, dtype=float).reshape(3)
+        self.orthonormal = orthonormal
+
+    def __repr__(self):
+        return f"affine({self.matrix.tolist()!r}, {self.offset.tolist()!r})"
+
+    def inverse(self):
+        # Rotations are inverted exactly by their transpose
+        inverse = self.matrix.T if self.orthonormal else np.linalg.inv(self.matrix)
+        return _Affine(inverse, -(inverse @ self.offset), self.orthonormal)
+
+    def then(self, other):
+        """
+        The single affine stage equivalent to self followed by other.
+        """
+        return _Affine(other.matrix @ self.matrix, other.matrix @ self.offset + other.offset, self.orthonormal and other.orthonormal)
+
+    def is_identity(self) -> bool:
+        return (np.abs(self.matrix - np.eye(3)).max() <= _IDENTITY_MATRIX_TOLERANCE
+                and np.abs(self.offset).max() <= _IDENTITY_OFFSET_TOLERANCE)
+
+    def apply(self, points, out):
+        np.matmul(points, self.matrix.T, out=out)
+        out += self.offset
+        return out
+
+
+class _Geodetic:
+    """
+    (lat, lon, h) -> ECEF (x, y, z), or the reverse when inverted.
+    """
+    __slots__ = ('inverted',)
+
+    def __init__(self, inverted: bool = False):
+        self.inverted = inverted
+
+    def __repr__(self):
+        return "geodetic().inverse()" if self.inverted else "geodetic()"
+
+    def inverse(self):
+        return _Geodetic(not self.inverted)
+
+    def cancels(self, other) -> bool:
+        return type(other) is _Geodetic and other.inverted != self.inverted
+
+    def apply(self, points, out):
+        if self.inverted:
+            return ecef_to_geodetic_batch(points, out=out)
+        return geodetic_to_ecef_batch(points, out=out)
+
+
+class _Spherical:
+    """
+    Cartesian (x, y, z) -> (azimuth, elevation, r) in [degrees, degrees, meters], or the reverse
+    when inverted; the same convention as pan_tilt.cartesian_to_spherical.
+    """
+    __slots__ = ('inverted',)
+
+    def __init__(self, inverted: bool = False):
+        self.inverted = inverted
+
+    def __repr__(self):
+        return "spherical().inverse()" if self.inverted else "spherical()"
+
+    def inverse(self):
+        return _Spherical(not self.inverted)
+
+    def cancels(self, other) -> bool:
+        return type(other) is _Spherical and other.inverted != self.inverted
+
+    def apply(self, points, out):
+        c0, c1, c2 = points[..., 0], points[..., 1], points[..., 2]
+        o0, o1, o2 = out[..., 0], out[..., 1], out[..., 2]
+        if self.inverted:
+            # o2 takes r cos(elevation) first, the horizontal range
+            np.multiply(np.cos(np.radians(c1)), c2, out=o2)
+            azimuth = np.radians(c0)
+            np.multiply(o2, np.cos(azimuth), out=o0)
+            np.multiply(o2, np.sin(azimuth, out=azimuth), out=o1)
+            np.multiply(np.sin(np.radians(c1)), c2, out=o2)
+            return out
+        horizontal = np.hypot(c0, c1)
+        np.degrees(np.arctan2(c1, c0, out=o0), out=o0)
+        np.degrees(np.arctan2(c2, horizontal, out=o1), out=o1)
+        np.hypot(horizontal, c2, out=o2)
+        return out
+
+
+class _Sacrs:
+    """
+    SACRS (yWesting, xSouthing, h) in the zone of central meridian `lo` -> (lat, lon, h), or the
+    reverse when inverted. The height passes through.
+    """
+    __slots__ = ('lo', 'inverted')
+
+    def __init__(self, lo: float, inverted: bool = False):
+        self.lo = lo
+        self.inverted = inverted
+
+    def __repr__(self):
+        return f"sacrs({self.lo!r}).inverse()" if self.inverted else f"sacrs({self.lo!r})"
+
+    def inverse(self):
+        return _Sacrs(self.lo, not self.inverted)
+
+    def cancels(self, other) -> bool:
+        return type(other) is _Sacrs and other.lo == self.lo and other.inverted != self.inverted
+
+    def apply(self, points, out):
+        if self.inverted:
+            x_southing, y_westing = geodetic_to_sacrs(points[..., 0], points[..., 1], self.lo)
+            out[..., 0] = y_westing
+            out[..., 1] = x_southing
+        else:
+            out[..., 0], out[..., 1] = sacrs_to_geodetic(self.lo, points[..., 0], points[..., 1])
+        out[..., 2] = points[..., 2]
+        return out
+
+
+def _fuse(stages) -> list:
+    """
+    Merges consecutive affine stages and removes identities and stages followed by their inverse.
+    """
+    fused = []
+    for stage in stages:
+        if fused and isinstance(stage, _Affine) and isinstance(fused[-1], _Affine):
+            stage = fused.pop().then(stage)
+        elif fused and not isinstance(stage, _Affine) and not isinstance(fused[-1], _Affine) and fused[-1].cancels(stage):
+            fused.pop()
+            continue
+        if isinstance(stage, _Affine) and stage.is_identity():
+            continue
+        fused.append(stage)
+    return fused
+
+
+class Transform:
+    """
+    A chain of coordinate transform stages, applied to points in one pass. Build transforms with
+    the functions of this module and compose them with >> (left to right).
+
+    A Transform is called like the *_batch functions: with an (N, 3) array, three columns, or
+    three scalars (returning a tuple of floats).
+    """
+    __slots__ = ('stages',)
+
+    def __init__(self, stages=()):
+        self.stages = tuple(_fuse(stages))
+
+    def __repr__(self):
+        return " >> ".join(map(repr, self.stages)) if self.stages else "Transform()"
+
+    def __rshift__(self, other):
+        if not isinstance(other, Transform):
+            return NotImplemented
+        return Transform(self.stages + other.stages)
+
+    def inverse(self):
+        return Transform(stage.inverse() for stage in reversed(self.stages))
+
+    @property
+    def is_affine(self) -> bool:
+        return all(isinstance(stage, _Affine) for stage in self.stages)
+
+    def as_affine(self):
+        """
+        The (3, 3) matrix and (3,) offset of an affine transform, such that y = matrix @ x + offset.
+        """
+        if not self.is_affine:
+            raise ValueError(f"{self!r} is not affine")
+        if not self.stages:
+            return np.eye(3), np.zeros(3)
+        return self.stages[0].matrix.copy(), self.stages[0].offset.copy()
+
+    def __call__(self, c0, c1=None, c2=None, out: Optional[np.ndarray] = None):
+        """
+        :param c0: first coordinate, or an (N, 3) array of points
+        :param c1: second coordinate
+        :param c2: third coordinate
+        :param out: optional (N, 3) float64 buffer that receives the result (array inputs only)
+        :returns: tuple of floats for scalars, otherwise an (N, 3) array
+        """
+        if _is_scalar_triple(c0, c1, c2):
+            return tuple(self(np.array([c0, c1, c2], dtype=float)).tolist())
+
+        points = _stack_columns(c0, c1, c2)
+        out = _output_buffer(out, points[..., 0])
+        if np.shares_memory(points, out):
+            points = points.copy()
+        if not self.stages:
+            out[...] = points
+            return out
+
+        # Alternate between out and one scratch array, such that the last stage writes into out
+        buffers = (out, np.empty_like(out))
+        current = points
+        for index, stage in enumerate(self.stages):
+            current = stage.apply(current, buffers[(len(self.stages) - 1 - index) % 2])
+        return out
+
+
+def identity() -> Transform:
+    """
+    The empty chain; points are copied unchanged.
+    """
+    return Transform()
+
+
+def affine(matrix, offset=(0.0, 0.0, 0.0)) -> Transform:
+    """
+    points -> matrix @ points + offset.
+
+    :param matrix: (3, 3) array; must be invertible for inverse()
+    :param offset: (3,) array
+    """
+    return Transform([_Affine(matrix, offset)])
+
+
+def geodetic() -> Transform:
+    """
+    Geodetic WGS-84 (lat, lon, h) in [degrees, degrees, meters] -> ECEF (x, y, z) in meters.
+    """
+    return Transform([_Geodetic()])
+
+
+def enu_frame(origin) -> Transform:
+    """
+    ECEF (x, y, z) -> East-North-Up coordinates of the Local Tangent Plane at `origin`.
+
+    :param origin: (lat0, lon0, h0) in [degrees, degrees, meters], or a LocalTangentFrame
+    """
+    frame = origin if isinstance(origin, LocalTangentFrame) else LocalTangentFrame(*origin)
+    return Transform([_Affine(frame.rotation, -(frame.rotation @ frame.origin), orthonormal=True)])
+
+
+def body_rotation(north: float = 0, pitch: float = 0, roll: float = 0) -> Transform:
+    """
+    ENU -> body coordinates of a pointing unit with the given offsets in degrees, as
+    rotational_matrices.offset_north_pitch_roll.
+    """
+    return Transform([_Affine(rotation_matrices_zyx(north, pitch, roll), np.zeros(3), orthonormal=True)])
+
+
+def spherical() -> Transform:
+    """
+    Cartesian (x, y, z) -> (azimuth, elevation, r) in [degrees, degrees, meters]. After
+    body_rotation these are (pan, tilt, range).
+    """
+    return Transform([_Spherical()])
+
+
+def sacrs(lo: float) -> Transform:
+    """
+    SACRS (yWesting, xSouthing, h) in the zone of central meridian `lo` -> geodetic (lat, lon, h).
+
+    :param lo: central meridian (Lo.) in degrees, see geo_convert.sacrs_central_meridian
+    """
+    return Transform([_Sacrs(lo)])
+
+
+def pan_tilt(origin, north: float = 0, pitch: float = 0, roll: float = 0) -> Transform:
+    """
+    Geodetic (lat, lon, h) -> (pan, tilt, range) of a pointing unit at `origin`; the same angles as
+    PanTiltSolver(origin, north, pitch, roll).solve_with_range.
+    """
+    return geodetic() >> enu_frame(origin) >> body_rotation(north, pitch, roll) >> spherical()
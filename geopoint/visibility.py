@@ -0,0 +1,187 @@
+# Visibility culling of camera/target pairs.
+#
+# Most targets are out of range, or outside the pan/tilt limits, of most cameras. A
+# VisibilityIndex keeps a uniform grid over ECEF space in which every camera is registered in the
+# cells its range sphere touches. A target only has to be tested against the cameras registered
+# in its own cell, and only when it is inserted or moves, so the work per tick scales with the
+# number of movers rather than with cameras x targets. The surviving (camera, target) pairs are
+# the candidates to hand to the pan/tilt solvers.
+
+import math
+import numpy as np
+from geopoint.geo_convert import geodetic_to_ecef_batch
+
+_NO_CAMERAS = np.empty(0, dtype=np.intp)
+
+
+class VisibilityIndex:
+    """
+    Uniform-grid index of cameras and their visibility limits, with incrementally updated targets.
+
+    :param cell_size: edge length of the grid cells in meters; about half the typical camera range works well
+    """
+
+    def __init__(self, cell_size: float = 10e3):
+        self.cell_size = cell_size
+        self.cells = {}          # (i, j, k) -> array of camera indices
+        self.solvers = []
+        self.origins = np.empty((0, 3))
+        self.matrices = np.empty((0, 3, 3))
+        self.max_ranges = np.empty(0)
+        self.pan_limits = np.empty((0, 2))
+        self.tilt_limits = np.empty((0, 2))
+        self.positions = {}      # target id -> ECEF position
+        self.visible = {}        # target id -> array of camera indices
+        self.tested = 0          # camera/target pairs tested so far
+
+    def __len__(self):
+        return len(self.positions)
+
+    def add_camera(self, solver, max_range: float, pan_limits=(-180.0, 180.0), tilt_limits=(-90.0, 90.0)) -> int:
+        """
+        Registers a camera. Existing targets are tested against it. The index keeps a copy of the
+        solver's rotation; call update_camera() after changing its offsets.
+
+        :param solver: PanTiltSolver of the camera
+        :param max_range: meters
+        :param pan_limits: (min, max) pan in degrees; min > max wraps through +-180
+        :param tilt_limits: (min, max) tilt in degrees
+        :returns: index of the camera
+        """
+        camera = len(self.solvers)
+        self.solvers.append(solver)
+        self.origins = np.vstack([self.origins, solver.frame.origin])
+        self.matrices = np.concatenate([self.matrices, solver.matrix[None]])
+        self.max_ranges = np.append(self.max_ranges, float(max_range))
+        self.pan_limits = np.vstack([self.pan_limits, pan_limits])
+        self.tilt_limits = np.vstack([self.tilt_limits, tilt_limits])
+        for cell in self._cells_in_range(camera):
+            cameras = self.cells.get(cell)
+            self.cells[cell] = np.append(cameras, camera) if cameras is not None else np.array([camera], dtype=np.intp)
+        self._retest_camera(camera)
+        return camera
+
+    def update_camera(self, camera: int, max_range: float = None, pan_limits=None, tilt_limits=None):
+        """
+        Re-reads the rotation of a camera's solver, e.g. after set_offsets(), optionally changes its
+        limits, and re-tests the existing targets against it.
+
+        :param camera: index returned by add_camera
+        :param max_range: meters, or None to keep the current range
+        :param pan_limits: (min, max) pan in degrees, or None to keep the current limits
+        :param tilt_limits: (min, max) tilt in degrees, or None to keep the current limits
+        """
+        self.matrices[camera] = self.solvers[camera].matrix
+        if pan_limits is not None:
+            self.pan_limits[camera] = pan_limits
+        if tilt_limits is not None:
+            self.tilt_limits[camera] = tilt_limits
+        if max_range is not None and float(max_range) != self.max_ranges[camera]:
+            for cell in self._cells_in_range(camera):
+                cameras = self.cells[cell][self.cells[cell] != camera]
+                if len(cameras):
+                    self.cells[cell] = cameras
+                else:
+                    del self.cells[cell]
+            self.max_ranges[camera] = float(max_range)
+            for cell in self._cells_in_range(camera):
+                cameras = self.cells.get(cell)
+                self.cells[cell] = np.append(cameras, camera) if cameras is not None else np.array([camera], dtype=np.intp)
+        for target, cameras in self.visible.items():
+            self.visible[target] = cameras[cameras != camera]
+        self._retest_camera(camera)
+
+    def _cells_in_range(self, camera: int):
+        """
+        Cells whose box is within the max_range of the camera.
+        """
+        origin, max_range, size = self.origins[camera], self.max_ranges[camera], self.cell_size
+        low = np.floor((origin - max_range) / size).astype(int)
+        high = np.floor((origin + max_range) / size).astype(int)
+        axes = [np.arange(lo, hi + 1) for lo, hi in zip(low, high)]
+        cells = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, 3)
+        nearest = np.clip(origin, cells * size, (cells + 1) * size)
+        cells = cells[np.einsum('ij,ij->i', nearest - origin, nearest - origin) <= max_range * max_range]
+        return list(map(tuple, cells.tolist()))
+
+    def _retest_camera(self, camera: int):
+        """
+        Tests all targets against one camera that none of them lists as visible.
+        """
+        if not self.positions:
+            return
+        ids = list(self.positions)
+        positions = np.array([self.positions[target] for target in ids])
+        keep = self._test(np.full(len(ids), camera, dtype=np.intp), positions)
+        for target, visible in zip(ids, keep):
+            if visible:
+                self.visible[target] = np.append(self.visible[target], camera)
+
+    def _cell(self, position):
+        return tuple(math.floor(coordinate / self.cell_size) for coordinate in position)
+
+    def _test(self, cameras, positions):
+        """
+        Range and pan/tilt limit tests of the (camera, position) pairs.
+        """
+        self.tested += len(cameras)
+        delta = positions - self.origins[cameras]
+        distance_sq = np.einsum('ij,ij->i', delta, delta)
+        body = np.einsum('nij,nj->ni', self.matrices[cameras], delta)
+        x, y, z = body[:, 0], body[:, 1], body[:, 2]
+        pan = np.rad2deg(np.arctan2(y, x))
+        tilt = np.rad2deg(np.arctan2(z, np.hypot(x, y)))
+        pan_min, pan_max = self.pan_limits[cameras].T
+        tilt_min, tilt_max = self.tilt_limits[cameras].T
+        in_pan = np.where(pan_min <= pan_max, (pan >= pan_min) & (pan <= pan_max), (pan >= pan_min) | (pan <= pan_max))
+        return (distance_sq <= self.max_ranges[cameras] ** 2) & in_pan & (tilt >= tilt_min) & (tilt <= tilt_max)
+
+    def update(self, target_ids, lat, lon, h):
+        """
+        Inserts or moves targets, and re-tests them against the cameras registered in their cells.
+
+        :param target_ids: sequence of hashable target ids
+        :param lat: degrees
+        :param lon: degrees
+        :param h: meters
+        """
+        target_ids = list(target_ids)
+        positions = geodetic_to_ecef_batch(np.atleast_1d(lat), np.atleast_1d(lon), np.atleast_1d(h))
+        cell_cameras = [self.cells.get(self._cell(position), _NO_CAMERAS) for position in positions.tolist()]
+        counts = np.array([len(cameras) for cameras in cell_cameras], dtype=np.intp)
+        cameras = np.concatenate(cell_cameras) if cell_cameras else _NO_CAMERAS
+        visible = self._test(cameras, np.repeat(positions, counts, axis=0))
+        splits = np.cumsum(counts)[:-1]
+        for target, position, target_cameras, keep in zip(target_ids, positions, np.split(cameras, splits), np.split(visible, splits)):
+            self.positions[target] = position
+            self.visible[target] = target_cameras[keep]
+
+    def remove(self, target_ids):
+        """
+        Forgets targets. Unknown ids are ignored.
+        """
+        for target in target_ids:
+            self.positions.pop(target, None)
+            self.visible.pop(target, None)
+
+    def cameras_for(self, target_id) -> np.ndarray:
+        """
+        Indices of the cameras that can see the target.
+        """
+        return self.visible.get(target_id, _NO_CAMERAS)
+
+    def pairs(self):
+        """
+        All visible (camera, target) pairs.
+
+        :returns: (camera indices, target ids) arrays of the same length
+        """
+        if not self.visible:
+            return _NO_CAMERAS, np.empty(0, dtype=object)
+        cameras = list(self.visible.values())
+        counts = [len(visible) for visible in cameras]
+        # Element by element, so that tuple ids stay single objects
+        target_ids = np.empty(len(self.visible), dtype=object)
+        for index, target in enumerate(self.visible):
+            target_ids[index] = target
+        return np.concatenate(cameras), np.repeat(target_ids, counts)
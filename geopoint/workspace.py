@@ -0,0 +1,221 @@
+# Allocation-free kernels for steady-state loops, writing into caller-owned workspaces.
+#
+# A Workspace owns every scratch array a kernel needs, allocated once. The kernels run entirely
+# on in-place ufuncs (out=) and return views into the workspace, so a tracking loop that calls
+# them every frame with the same number of points performs no array allocations at all.
+#
+# The kernels compute the target's ECEF position relative to the origin directly from the
+# lat/lon/height differences (with half-angle forms of the sine and cosine differences), instead
+# of subtracting two ~6.4e6 m ECEF positions. That keeps float32 workspaces accurate to about a
+# centimeter and 1e-5 degrees at camera ranges, where float32 ECEF coordinates would be rounded to
+# half a meter. Inputs of a different dtype than the workspace go through NumPy's fixed-size
+# casting buffers (about 128 KiB, independent of N); float32 lat/lon themselves resolve ~0.2 m.
+
+import math
+import numpy as np
+from geopoint.geo_convert import a, e_sq
+
+_BUFFERS = ('dphi', 'dlambda', 'sin_half_phi', 'sin_half_lambda', 'd_sin_phi', 'd_cos_phi', 'd_sin_lambda', 'd_cos_lambda',
+            'cos_phi', 'radius', 'tmp', 'x', 'y', 'z', 'c0', 'c1', 'c2')
+
+
+class Workspace:
+    """
+    Preallocated scratch and result buffers for up to `capacity` points.
+
+    Kernel results are views into the workspace and are overwritten by the next kernel call.
+
+    :param capacity: maximum number of points per call
+    :param dtype: np.float32 or np.float64
+    """
+    __slots__ = ('capacity', 'dtype', 'data', '_size', '_views')
+
+    def __init__(self, capacity: int, dtype=np.float64):
+        dtype = np.dtype(dtype)
+        if dtype not in (np.float32, np.float64):
+            raise ValueError(f"unsupported dtype {dtype}, expected float32 or float64")
+        self.capacity = capacity
+        self.dtype = dtype
+        self.data = np.empty((len(_BUFFERS), capacity), dtype=dtype)
+        self._size = None
+        self._views = None
+
+    def __repr__(self):
+        return f"Workspace({self.capacity}, {self.dtype.name})"
+
+    def views(self, size: int) -> dict:
+        """
+        Named buffers of length `size`; the same view objects are reused while the size stays the same.
+        """
+        if size != self._size:
+            if size > self.capacity:
+                raise ValueError(f"{size} points do not fit in a workspace of capacity {self.capacity}")
+            self._views = {name: self.data[index, :size] for index, name in enumerate(_BUFFERS)}
+            self._views['xyz'] = (self._views['x'], self._views['y'], self._views['z'])
+            self._views['result'] = (self._views['c0'], self._views['c1'], self._views['c2'])
+            self._size = size
+        return self._views
+
+
+def ecef_delta_into(lat, lon, h, frame, workspace: Workspace):
+    """
+    ECEF position of (lat, lon, h) relative to the origin of `frame`, without allocating.
+
+    :param lat: (N,) degrees
+    :param lon: (N,) degrees
+    :param h: (N,) meters
+    :param frame: LocalTangentFrame whose origin is subtracted
+    :param workspace: Workspace with capacity >= N
+    :returns: (x, y, z) views into the workspace, meters
+    """
+    buffers = workspace.views(len(lat))
+    phi0 = math.radians(frame.lat0)
+    lambda0 = math.radians(frame.lon0)
+    sin_phi0, cos_phi0 = math.sin(phi0), math.cos(phi0)
+    sin_lambda0, cos_lambda0 = math.sin(lambda0), math.cos(lambda0)
+    w0 = math.sqrt(1.0 - e_sq * sin_phi0 * sin_phi0)
+    n0 = a / w0
+
+    dphi, dlambda, tmp = buffers['dphi'], buffers['dlambda'], buffers['tmp']
+    sin_half_phi, sin_half_lambda = buffers['sin_half_phi'], buffers['sin_half_lambda']
+    d_sin_phi, d_cos_phi = buffers['d_sin_phi'], buffers['d_cos_phi']
+    d_sin_lambda, d_cos_lambda = buffers['d_sin_lambda'], buffers['d_cos_lambda']
+    cos_phi, radius = buffers['cos_phi'], buffers['radius']
+    x, y, z = buffers['xyz']
+
+    # Half angle differences, in radians
+    np.subtract(lat, frame.lat0, out=dphi)
+    np.multiply(dphi, math.pi / 360.0, out=dphi)
+    np.subtract(lon, frame.lon0, out=dlambda)
+    np.multiply(dlambda, math.pi / 360.0, out=dlambda)
+    np.sin(dphi, out=sin_half_phi)
+    np.sin(dlambda, out=sin_half_lambda)
+
+    # sin(a + 2d) - sin(a) = 2 cos(a + d) sin(d),  cos(a + 2d) - cos(a) = -2 sin(a + d) sin(d)
+    np.add(dphi, phi0, out=tmp)
+    np.cos(tmp, out=d_sin_phi)
+    np.multiply(d_sin_phi, sin_half_phi, out=d_sin_phi)
+    np.multiply(d_sin_phi, 2.0, out=d_sin_phi)
+    np.sin(tmp, out=d_cos_phi)
+    np.multiply(d_cos_phi, sin_half_phi, out=d_cos_phi)
+    np.multiply(d_cos_phi, -2.0, out=d_cos_phi)
+    np.add(dlambda, lambda0, out=tmp)
+    np.cos(tmp, out=d_sin_lambda)
+    np.multiply(d_sin_lambda, sin_half_lambda, out=d_sin_lambda)
+    np.multiply(d_sin_lambda, 2.0, out=d_sin_lambda)
+    np.sin(tmp, out=d_cos_lambda)
+    np.multiply(d_cos_lambda, sin_half_lambda, out=d_cos_lambda)
+    np.multiply(d_cos_lambda, -2.0, out=d_cos_lambda)
+    np.add(d_cos_phi, cos_phi0, out=cos_phi)
+
+    # N - N0 = a (w0^2 - w^2) / (w w0 (w + w0)), with w^2 - w0^2 = e^2 (sin phi0^2 - sin phi^2);
+    # sin_half_phi and sin_half_lambda are free from here on and hold w and N - N0
+    w, d_n = sin_half_phi, sin_half_lambda
+    np.add(d_sin_phi, 2.0 * sin_phi0, out=tmp)             # sin phi + sin phi0
+    np.multiply(tmp, d_sin_phi, out=d_n)                   # sin^2 phi - sin^2 phi0
+    np.add(d_sin_phi, sin_phi0, out=w)
+    np.multiply(w, w, out=w)
+    np.multiply(w, -e_sq, out=w)
+    np.add(w, 1.0, out=w)
+    np.sqrt(w, out=w)
+    np.multiply(d_n, a * e_sq / w0, out=d_n)
+    np.add(w, w0, out=tmp)
+    np.multiply(tmp, w, out=tmp)
+    np.divide(d_n, tmp, out=d_n)
+
+    # R = N + h and its difference from the origin's
+    np.add(d_n, n0, out=radius)
+    np.add(radius, h, out=radius)
+    d_radius = dphi  # free from here on
+    np.subtract(h, frame.h0, out=d_radius)
+    np.add(d_radius, d_n, out=d_radius)
+
+    # x - x0 = R (cos phi dcos lambda + cos lambda0 dcos phi) + dR cos phi0 cos lambda0
+    np.multiply(cos_phi, d_cos_lambda, out=x)
+    np.multiply(d_cos_phi, cos_lambda0, out=tmp)
+    np.add(x, tmp, out=x)
+    np.multiply(x, radius, out=x)
+    np.multiply(d_radius, cos_phi0 * cos_lambda0, out=tmp)
+    np.add(x, tmp, out=x)
+
+    # y - y0 = R (cos phi dsin lambda + sin lambda0 dcos phi) + dR cos phi0 sin lambda0
+    np.multiply(cos_phi, d_sin_lambda, out=y)
+    np.multiply(d_cos_phi, sin_lambda0, out=tmp)
+    np.add(y, tmp, out=y)
+    np.multiply(y, radius, out=y)
+    np.multiply(d_radius, cos_phi0 * sin_lambda0, out=tmp)
+    np.add(y, tmp, out=y)
+
+    # z - z0 = (R - e^2 N) dsin phi + (dR - e^2 dN) sin phi0
+    np.multiply(d_n, e_sq, out=tmp)
+    np.subtract(d_radius, tmp, out=d_radius)
+    np.subtract(radius, tmp, out=z)
+    np.add(z, -e_sq * n0, out=z)
+    np.multiply(z, d_sin_phi, out=z)
+    np.multiply(d_radius, sin_phi0, out=tmp)
+    np.add(z, tmp, out=z)
+    return buffers['xyz']
+
+
+def _rotate_into(coeffs, vectors, out, tmp):
+    """
+    out = M @ vectors for the row-major 3x3 matrix coefficients `coeffs`; `out` must not alias `vectors`.
+    """
+    for row, target in enumerate(out):
+        np.multiply(vectors[0], coeffs[3 * row], out=target)
+        for column in (1, 2):
+            np.multiply(vectors[column], coeffs[3 * row + column], out=tmp)
+            np.add(target, tmp, out=target)
+    return out
+
+
+def geodetic_to_enu_into(lat, lon, h, frame, workspace: Workspace):
+    """
+    Allocation-free geodetic_to_enu against the origin of a LocalTangentFrame.
+
+    :param lat: (N,) degrees
+    :param lon: (N,) degrees
+    :param h: (N,) meters
+    :param frame: LocalTangentFrame
+    :param workspace: Workspace with capacity >= N
+    :returns: (east, north, up) views into the workspace, meters
+    """
+    delta = ecef_delta_into(lat, lon, h, frame, workspace)
+    buffers = workspace.views(len(lat))
+    return _rotate_into(frame._coeffs[3:], delta, buffers['result'], buffers['tmp'])
+
+
+def cartesian_to_spherical_into(x, y, z, workspace: Workspace):
+    """
+    Allocation-free cartesian_to_spherical. The inputs may be the result views of a previous
+    kernel call on the same workspace.
+
+    :returns: (azimuth, elevation, r) views into the workspace, in [degrees, degrees, meters]
+    """
+    buffers = workspace.views(len(x))
+    horizontal = buffers['tmp']
+    azimuth, elevation, r = buffers['result']
+    np.hypot(x, y, out=horizontal)
+    np.arctan2(y, x, out=azimuth)
+    np.arctan2(z, horizontal, out=elevation)
+    np.hypot(horizontal, z, out=r)
+    np.degrees(azimuth, out=azimuth)
+    np.degrees(elevation, out=elevation)
+    return buffers['result']
+
+
+def pan_tilt_into(lat, lon, h, solver, workspace: Workspace):
+    """
+    Allocation-free PanTiltSolver.solve_with_range: geodetic -> ECEF offset -> body -> spherical.
+
+    :param lat: (N,) degrees
+    :param lon: (N,) degrees
+    :param h: (N,) meters
+    :param solver: PanTiltSolver
+    :param workspace: Workspace with capacity >= N
+    :returns: (pan, tilt, range) views into the workspace, in [degrees, degrees, meters]
+    """
+    delta = ecef_delta_into(lat, lon, h, solver.frame, workspace)
+    buffers = workspace.views(len(lat))
+    body = _rotate_into(solver._coeffs, delta, buffers['result'], buffers['tmp'])
+    return cartesian_to_spherical_into(*body, workspace)
@@ -0,0 +1,65 @@
+import copy
+import json
+import os
+import subprocess
+import sys
+
+SUITE = os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'suite.py')
+
+BASELINE = {
+    'meta': {},
+    'results': {
+        'geodetic_to_ecef': {
+            'scalar_ns': 1000.0,
+            'batch': {
+                '1': {'ns_per_point': 2000.0, 'points_per_s': 5e5, 'peak_bytes': 2000},
+                '1000': {'ns_per_point': 20.0, 'points_per_s': 5e7, 'peak_bytes': 100000},
+            },
+        },
+    },
+}
+
+# Helper functions
+def compare(tmp_path, current, *options):
+    (tmp_path / 'baseline.json').write_text(json.dumps(BASELINE))
+    (tmp_path / 'current.json').write_text(json.dumps(current))
+    return subprocess.run([sys.executable, SUITE, 'compare', str(tmp_path / 'baseline.json'), str(tmp_path / 'current.json'), *options],
+                          capture_output=True, text=True)
+
+def test_compare_within_tolerance(tmp_path):
+    current = copy.deepcopy(BASELINE)
+    current['results']['geodetic_to_ecef']['scalar_ns'] = 1150.0
+    current['results']['geodetic_to_ecef']['batch']['1000']['peak_bytes'] = 104000
+    # 150% more, but growth of tiny peaks below 4 KiB is ignored whatever the ratio
+    current['results']['geodetic_to_ecef']['batch']['1']['peak_bytes'] = 5000
+    result = compare(tmp_path, current)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'REGRESSION' not in result.stdout
+
+def test_compare_regressed(tmp_path):
+    current = copy.deepcopy(BASELINE)
+    current['results']['geodetic_to_ecef']['batch']['1000']['ns_per_point'] = 30.0
+    result = compare(tmp_path, current)
+    assert result.returncode == 1
+    assert result.stdout.count('REGRESSION') == 1
+    assert 'batch[1000].ns_per_point' in [line.split()[1] for line in result.stdout.splitlines() if 'REGRESSION' in line]
+    # A looser threshold accepts the same slowdown
+    assert compare(tmp_path, current, '--threshold', '0.6').returncode == 0
+
+def test_compare_small_peak_growing_by_4_kib_regressed(tmp_path):
+    current = copy.deepcopy(BASELINE)
+    current['results']['geodetic_to_ecef']['batch']['1']['peak_bytes'] = 2000 + 4096
+    result = compare(tmp_path, current)
+    assert result.returncode == 1
+    assert [line.split()[1] for line in result.stdout.splitlines() if 'REGRESSION' in line] == ['batch[1].peak_bytes']
+
+def test_compare_skips_benchmarks_missing_from_baseline(tmp_path):
+    current = copy.deepcopy(BASELINE)
+    current['results']['ecef_to_geodetic'] = {
+        'scalar_ns': 5000.0,
+        'batch': {'1000': {'ns_per_point': 100.0, 'points_per_s': 1e7, 'peak_bytes': 200000}},
+    }
+    result = compare(tmp_path, current)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'ecef_to_geodetic' not in result.stdout
+    assert 'geodetic_to_ecef' in result.stdout
@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+from geopoint.geo_convert import geodetic_to_ecef_batch, geodetic_to_sacrs, LocalTangentFrame
+from geopoint.bulk import convert_points, convert_file, read_chunks
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+ORIGIN = (-25.7, 28.2, 1400.0)
+RNG = np.random.default_rng(7)
+GEODETIC = np.column_stack([RNG.uniform(-34, -22, 5000), RNG.uniform(17, 33, 5000), RNG.uniform(0, 3000, 5000)])
+
+def test_convert_points_round_trips():
+    for system in ('ecef', 'enu', 'sacrs'):
+        converted = convert_points(GEODETIC, 'geodetic', system, ORIGIN)
+        np.testing.assert_allclose(convert_points(converted, system, 'geodetic', ORIGIN), GEODETIC, rtol=0, atol=1e-6)
+    ecef = geodetic_to_ecef_batch(GEODETIC)
+    np.testing.assert_allclose(convert_points(ecef, 'ecef', 'enu', ORIGIN), LocalTangentFrame(*ORIGIN).to_enu(ecef), rtol=0, atol=1e-9)
+
+def test_convert_points_sacrs_columns():
+    sacrs = convert_points(GEODETIC[:3], 'geodetic', 'sacrs')
+    x, y = geodetic_to_sacrs(GEODETIC[:3, 0], GEODETIC[:3, 1])
+    np.testing.assert_array_equal(sacrs[:, 0] % 2, 1)
+    np.testing.assert_allclose(sacrs[:, 1:], np.column_stack([y, x, GEODETIC[:3, 2]]))
+
+def test_convert_points_validates_arguments():
+    with pytest.raises(ValueError):
+        convert_points(GEODETIC, 'geodetic', 'utm')
+    with pytest.raises(ValueError):
+        convert_points(GEODETIC, 'geodetic', 'enu')
+    with pytest.raises(ValueError):
+        convert_points(GEODETIC[:, :2], 'geodetic', 'ecef')
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_convert_file_keeps_input_order(tmp_path, workers):
+    np.save(tmp_path / 'in.npy', GEODETIC)
+    report = convert_file(tmp_path / 'in.npy', tmp_path / 'out.npy', 'geodetic', 'ecef', input_format='npy', output_format='npy', chunk_size=700, workers=workers)
+    assert report.rows == len(GEODETIC) and report.chunks == 8
+    np.testing.assert_array_equal(np.load(tmp_path / 'out.npy'), geodetic_to_ecef_batch(GEODETIC))
+
+def test_convert_file_csv_to_raw(tmp_path):
+    np.savetxt(tmp_path / 'in.csv', GEODETIC[:1000], delimiter=';', fmt='%.15g', header='lat;lon;h')
+    convert_file(tmp_path / 'in.csv', tmp_path / 'out.f32', 'geodetic', 'enu', ORIGIN, output_format='raw', chunk_size=128,
+                 workers=2, delimiter=';', output_dtype='<f4')
+    enu = np.fromfile(tmp_path / 'out.f32', dtype='<f4').reshape(-1, 3)
+    np.testing.assert_allclose(enu, LocalTangentFrame(*ORIGIN).geodetic_to_enu(GEODETIC[:1000]), rtol=1e-6, atol=0.1)
+
+def test_read_chunks_memory_maps_raw_input(tmp_path):
+    GEODETIC.tofile(tmp_path / 'in.raw')
+    chunks = list(read_chunks(tmp_path / 'in.raw', 'raw', 3, 2048))
+    assert [len(chunk) for chunk in chunks] == [2048, 2048, 904]
+    assert isinstance(chunks[0], np.memmap)
+    GEODETIC.ravel()[:-1].tofile(tmp_path / 'truncated.raw')
+    with pytest.raises(ValueError):
+        list(read_chunks(tmp_path / 'truncated.raw', 'raw', 3, 2048))
+
+def test_command_line(tmp_path):
+    np.save(tmp_path / 'in.npy', GEODETIC[:100])
+    result = subprocess.run([sys.executable, '-m', 'geopoint', 'convert', str(tmp_path / 'in.npy'), str(tmp_path / 'out.csv'),
+                             '--from', 'geodetic', '--to', 'ecef', '--workers', '1'], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert 'rows/s' in result.stderr
+    np.testing.assert_allclose(np.loadtxt(tmp_path / 'out.csv', delimiter=','), geodetic_to_ecef_batch(GEODETIC[:100]), rtol=1e-11)
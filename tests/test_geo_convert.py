@@ -1,4 +1,8 @@
+import numpy as np
+import pytest
 from geopoint.geo_convert import geodetic_to_ecef, geodetic_to_enu, ecef_to_geodetic, ecef_to_enu, enu_to_ecef
+from geopoint.geo_convert import geodetic_to_ecef_batch, ecef_to_geodetic_batch, ecef_to_enu_batch, enu_to_ecef_batch, geodetic_to_enu_batch
+from geopoint.geo_convert import LocalTangentFrame, sacrs_to_geodetic, geodetic_to_sacrs, sacrs_central_meridian
 
 # Helper functions
 def are_close(x0, x1):
@@ -118,3 +122,182 @@ def test_geodetic_to_enu_quadrant_3():
 def test_geodetic_to_enu_quadrant_4():
     enu_x, enu_y, enu_z = geodetic_to_enu(90,-90,0,0,0,0)
     assert enu_x < 0 and enu_y > 0 and enu_z < 0
+
+
+################################################
+# Batch versions                               #
+################################################
+rng = np.random.default_rng(0)
+N_BATCH = 200
+lats = rng.uniform(-89, 89, N_BATCH)
+lons = rng.uniform(-180, 180, N_BATCH)
+hs = rng.uniform(-100, 5000, N_BATCH)
+lats0 = lats + rng.uniform(-0.1, 0.1, N_BATCH)
+lons0 = lons + rng.uniform(-0.1, 0.1, N_BATCH)
+hs0 = rng.uniform(0, 100, N_BATCH)
+
+def scalar_rows(func, *columns):
+    return np.array([func(*row) for row in zip(*columns)], dtype=float)
+
+def test_geodetic_to_ecef_batch_matches_scalar():
+    expected = scalar_rows(geodetic_to_ecef, lats, lons, hs)
+    assert np.array_equal(geodetic_to_ecef_batch(lats, lons, hs), expected)
+    assert np.array_equal(geodetic_to_ecef_batch(np.column_stack([lats, lons, hs])), expected)
+
+def test_ecef_to_geodetic_batch_matches_scalar():
+    # The scalar path uses math.atan2, which may differ from numpy.arctan2 in the last bit;
+    # p / cos(phi) amplifies that to ~1e-8 m in height
+    ecef = geodetic_to_ecef_batch(lats, lons, hs)
+    expected = scalar_rows(ecef_to_geodetic, ecef[:, 0], ecef[:, 1], ecef[:, 2])
+    np.testing.assert_allclose(ecef_to_geodetic_batch(ecef), expected, rtol=1e-15, atol=1e-7)
+
+def test_ecef_to_enu_batch_matches_scalar_with_per_row_origin():
+    ecef = geodetic_to_ecef_batch(lats, lons, hs)
+    expected = scalar_rows(ecef_to_enu, ecef[:, 0], ecef[:, 1], ecef[:, 2], lats0, lons0, hs0)
+    assert np.array_equal(ecef_to_enu_batch(ecef, lat0=lats0, lon0=lons0, h0=hs0), expected)
+
+def test_ecef_to_enu_batch_matches_scalar_with_scalar_origin():
+    ecef = geodetic_to_ecef_batch(lats, lons, hs)
+    expected = scalar_rows(ecef_to_enu, ecef[:, 0], ecef[:, 1], ecef[:, 2], [latLA] * N_BATCH, [lonLA] * N_BATCH, [hLA] * N_BATCH)
+    assert np.array_equal(ecef_to_enu_batch(ecef[:, 0], ecef[:, 1], ecef[:, 2], lat0=latLA, lon0=lonLA, h0=hLA), expected)
+
+def test_enu_to_ecef_batch_matches_scalar():
+    enu = rng.uniform(-1000, 1000, (N_BATCH, 3))
+    expected = scalar_rows(enu_to_ecef, enu[:, 0], enu[:, 1], enu[:, 2], lats0, lons0, hs0)
+    assert np.array_equal(enu_to_ecef_batch(enu, lat0=lats0, lon0=lons0, h0=hs0), expected)
+
+def test_geodetic_to_enu_batch_matches_scalar():
+    expected = scalar_rows(geodetic_to_enu, lats, lons, hs, lats0, lons0, hs0)
+    assert np.array_equal(geodetic_to_enu_batch(lats, lons, hs, lat0=lats0, lon0=lons0, h0=hs0), expected)
+
+def test_batch_writes_into_out_buffer():
+    out = np.empty((N_BATCH, 3))
+    result = geodetic_to_ecef_batch(lats, lons, hs, out=out)
+    assert result is out
+    assert result.flags['C_CONTIGUOUS']
+    assert np.array_equal(out, scalar_rows(geodetic_to_ecef, lats, lons, hs))
+
+def test_batch_rejects_wrong_out_shape():
+    with pytest.raises(ValueError):
+        geodetic_to_ecef_batch(lats, lons, hs, out=np.empty((N_BATCH, 2)))
+
+def test_batch_rejects_wrong_point_shape():
+    with pytest.raises(ValueError):
+        geodetic_to_ecef_batch(np.zeros((N_BATCH, 2)))
+
+
+################################################
+# LocalTangentFrame                            #
+################################################
+def test_local_tangent_frame_to_enu_matches_ecef_to_enu():
+    frame = LocalTangentFrame(latLA, lonLA, hLA)
+    x, y, z = geodetic_to_ecef(latLA + 0.01, lonLA - 0.02, hLA + 30)
+    expected = ecef_to_enu(x, y, z, latLA, lonLA, hLA)
+    np.testing.assert_allclose(frame.to_enu(x, y, z), expected, rtol=0, atol=1e-6)
+
+def test_local_tangent_frame_LA_dz():
+    frame = LocalTangentFrame(latLA, lonLA, hLA)
+    x, y, z = frame.origin
+    x_east, y_north, z_up = frame.to_enu(x, y, z + 1)
+    assert are_close(x_east,  0.00000000)
+    assert are_close(y_north, 0.82903757)
+    assert are_close(z_up,    0.55919291)
+
+def test_local_tangent_frame_round_trip_scalar():
+    frame = LocalTangentFrame(latLA, lonLA, hLA)
+    lat, lon, h = frame.enu_to_geodetic(*frame.geodetic_to_enu(34.1, -117.2, 100.0))
+    np.testing.assert_allclose((lat, lon, h), (34.1, -117.2, 100.0), rtol=0, atol=1e-6)
+
+def test_local_tangent_frame_arrays_match_batch():
+    frame = LocalTangentFrame(latLA, lonLA, hLA)
+    expected = geodetic_to_enu_batch(lats, lons, hs, lat0=latLA, lon0=lonLA, h0=hLA)
+    np.testing.assert_allclose(frame.geodetic_to_enu(lats, lons, hs), expected, rtol=1e-12, atol=1e-6)
+    np.testing.assert_allclose(frame.geodetic_to_enu(np.column_stack([lats, lons, hs])), expected, rtol=1e-12, atol=1e-6)
+
+def test_local_tangent_frame_array_round_trip():
+    frame = LocalTangentFrame(latLA, lonLA, hLA)
+    enu = rng.uniform(-5000, 5000, (N_BATCH, 3))
+    out = np.empty((N_BATCH, 3))
+    assert frame.from_enu(enu, out=out) is out
+    np.testing.assert_allclose(frame.to_enu(out), enu, rtol=0, atol=1e-6)
+    geodetic = frame.enu_to_geodetic(enu)
+    np.testing.assert_allclose(frame.geodetic_to_enu(geodetic), enu, rtol=0, atol=1e-6)
+
+def test_local_tangent_frame_has_no_instance_dict():
+    assert not hasattr(LocalTangentFrame(0, 0, 0), '__dict__')
+
+
+################################################
+# Scalar/array dispatch                        #
+################################################
+def test_scalar_inputs_return_plain_floats():
+    for value in geodetic_to_ecef(latLA, lonLA, hLA) + ecef_to_geodetic(-2430601.8, -4702442.7, 3546587.4) + geodetic_to_enu(latLA, lonLA, hLA, 34.0, -117.3, 0.0):
+        assert type(value) is float
+
+def test_array_inputs_match_scalar_inputs():
+    x, y, z = geodetic_to_enu(lats, lons, hs, latLA, lonLA, hLA)
+    expected = scalar_rows(geodetic_to_enu, lats, lons, hs, [latLA] * N_BATCH, [lonLA] * N_BATCH, [hLA] * N_BATCH)
+    np.testing.assert_allclose(np.column_stack([x, y, z]), expected, rtol=1e-15, atol=1e-9)
+
+
+################################################
+# SACRS (Hartebeesthoek94)                     #
+################################################
+def test_geodetic_to_sacrs_johannesburg():
+    x_southing, y_westing = geodetic_to_sacrs(-26.2, 28.05)
+    assert are_close(x_southing, 2899340.048)
+    assert are_close(y_westing, 94952.872)
+
+def test_sacrs_to_geodetic_cape_town():
+    lat, lon = sacrs_to_geodetic(19, 55496.128, 3752731.365)
+    assert abs(lat - -33.9) < 1e-7
+    assert abs(lon - 18.4) < 1e-7
+
+def test_sacrs_central_meridian():
+    assert [sacrs_central_meridian(lon) for lon in (0.0, 1.5, -1.5, 28.05, -28.05)] == [0, 1, -1, 29, -29]
+    assert np.array_equal(sacrs_central_meridian(np.array([0.0, 1.5, -1.5, 28.05, -28.05])), [0, 1, -1, 29, -29])
+
+def test_sacrs_arrays_match_scalars_across_meridians():
+    sa_lats = rng.uniform(-35, -22, N_BATCH)
+    sa_lons = rng.uniform(16, 33, N_BATCH)
+    x_southing, y_westing = geodetic_to_sacrs(sa_lats, sa_lons)
+    meridians = sacrs_central_meridian(sa_lons)
+    lat, lon = sacrs_to_geodetic(meridians, y_westing, x_southing)
+    for i in range(N_BATCH):
+        np.testing.assert_allclose((x_southing[i], y_westing[i]), geodetic_to_sacrs(sa_lats[i], sa_lons[i]), rtol=1e-15, atol=1e-8)
+        np.testing.assert_allclose((lat[i], lon[i]), sacrs_to_geodetic(int(meridians[i]), y_westing[i], x_southing[i]), rtol=1e-15, atol=1e-12)
+    np.testing.assert_allclose(lat, sa_lats, rtol=0, atol=1e-8)
+    np.testing.assert_allclose(lon, sa_lons, rtol=0, atol=1e-8)
+
+
+################################################
+# ecef_to_geodetic methods                     #
+################################################
+def global_grid(heights):
+    lat, lon, h = np.meshgrid(np.linspace(-90, 90, 61), np.linspace(-180, 180, 25), heights, indexing='ij')
+    return np.column_stack([lat.ravel(), lon.ravel(), h.ravel()])
+
+@pytest.mark.parametrize('method', ['iterative', 'heikkinen'])
+def test_ecef_to_geodetic_accurate_methods_on_global_grid(method):
+    geodetic = global_grid([-1000, 0, 1e4, 1e6, 1e7])
+    result = ecef_to_geodetic_batch(geodetic_to_ecef_batch(geodetic), method=method)
+    np.testing.assert_allclose(result[:, 0], geodetic[:, 0], rtol=0, atol=1e-10)
+    np.testing.assert_allclose(result[:, 2], geodetic[:, 2], rtol=0, atol=1e-6)
+
+def test_ecef_to_geodetic_bowring_near_surface():
+    geodetic = global_grid([-1000, 0, 1000])
+    geodetic = geodetic[np.abs(geodetic[:, 0]) < 90]
+    result = ecef_to_geodetic_batch(geodetic_to_ecef_batch(geodetic), method='bowring')
+    np.testing.assert_allclose(result[:, 0], geodetic[:, 0], rtol=0, atol=1e-10)
+    np.testing.assert_allclose(result[:, 2], geodetic[:, 2], rtol=0, atol=1e-6)
+
+@pytest.mark.parametrize('method', ['bowring', 'iterative', 'heikkinen'])
+def test_ecef_to_geodetic_methods_scalar_matches_batch(method):
+    lat, lon, h = ecef_to_geodetic(-2430601.8, -4702442.7, 3546587.4, method=method)
+    assert type(lat) is float
+    np.testing.assert_allclose((lat, lon, h), ecef_to_geodetic_batch([[-2430601.8, -4702442.7, 3546587.4]], method=method)[0], rtol=1e-15, atol=1e-7)
+    assert are_close(lat, latLA) and are_close(lon, lonLA) and are_close(h, hLA)
+
+def test_ecef_to_geodetic_unknown_method():
+    with pytest.raises(ValueError):
+        ecef_to_geodetic(-2430601.8, -4702442.7, 3546587.4, method='newton')
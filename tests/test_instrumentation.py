@@ -0,0 +1,108 @@
+import threading
+import numpy as np
+import pytest
+import geopoint.geo_convert as geo_convert
+import geopoint.pan_tilt as pan_tilt
+from geopoint import instrumentation
+from geopoint.instrumentation import enable, disable, is_enabled, reset, snapshot, profiling
+
+GEO = 'geopoint.geo_convert.'
+PT = 'geopoint.pan_tilt.'
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    disable()
+    reset()
+    yield
+    disable()
+    reset()
+
+def test_disabled_runs_original_functions():
+    original = pan_tilt.geodetic_to_pan_tilt_with_offsets
+    enable()
+    assert is_enabled()
+    assert pan_tilt.geodetic_to_pan_tilt_with_offsets is not original
+    assert pan_tilt.geodetic_to_enu is geo_convert.geodetic_to_enu  # the name imported into pan_tilt is wrapped too
+    disable()
+    assert not is_enabled()
+    assert pan_tilt.geodetic_to_pan_tilt_with_offsets is original
+    assert not hasattr(pan_tilt.geodetic_to_enu, '__wrapped__')
+    assert not hasattr(pan_tilt.PanTiltSolver.solve, '__wrapped__')
+
+    geo_convert.geodetic_to_ecef(-25.7, 28.2, 1400.0)
+    assert snapshot() == {}
+
+def test_counts_calls_and_batch_sizes():
+    enable()
+    geo_convert.geodetic_to_ecef(-25.7, 28.2, 1400.0)
+    geo_convert.geodetic_to_ecef_batch(np.zeros((1000, 3)))
+    geo_convert.geodetic_to_ecef_batch(np.zeros(10), np.zeros(10), np.zeros(10))
+    pan_tilt.geodetic_to_pan_tilt_with_offsets(-25.6, 28.3, 1500.0, -25.7, 28.2, 1400.0, 12, 0, 0)
+    stats = snapshot()
+
+    assert stats[GEO + 'geodetic_to_ecef_batch']['calls'] == 2
+    assert stats[GEO + 'geodetic_to_ecef_batch']['points'] == 1010
+    # Inclusive: the nested conversions made by the pan/tilt function are counted as well
+    assert stats[PT + 'geodetic_to_pan_tilt_with_offsets']['calls'] == 1
+    assert stats[GEO + 'geodetic_to_enu']['calls'] == 1
+    assert stats[GEO + 'geodetic_to_ecef']['calls'] == 2
+    assert stats[GEO + 'geodetic_to_ecef']['points'] == 2
+    assert stats['geopoint.rotational_matrices.offset_north_pitch_roll']['calls'] == 1
+    assert stats[PT + 'geodetic_to_pan_tilt_with_offsets']['total_s'] >= stats[GEO + 'geodetic_to_enu']['total_s']
+
+def test_methods_count_points_after_self():
+    solver = pan_tilt.PanTiltSolver((-25.7, 28.2, 1400.0), 12)
+    with profiling() as profile:
+        solver.solve(np.full(50, -25.6), np.full(50, 28.3), np.full(50, 1500.0))
+    assert profile.stats[PT + 'PanTiltSolver.solve']['points'] == 50
+    assert profile.stats[PT + 'PanTiltSolver.solve_ecef']['calls'] == 1
+    assert not is_enabled()
+
+def test_wrapped_results_are_unchanged():
+    args = (np.linspace(-25.8, -25.6, 7), 28.3, 1500.0, -25.7, 28.2, 1400.0, 12, 1.0, -2.0)
+    expected = pan_tilt.geodetic_to_pan_tilt_with_offsets(*args)
+    with profiling():
+        result = pan_tilt.geodetic_to_pan_tilt_with_offsets(*args)
+    np.testing.assert_array_equal(result, expected)
+
+def test_exceptions_are_recorded_and_propagated():
+    enable()
+    with pytest.raises(ValueError):
+        geo_convert.ecef_to_geodetic(6378137.0, 0.0, 0.0, method='unknown')
+    assert snapshot()[GEO + 'ecef_to_geodetic']['calls'] == 1
+
+def test_percentiles_are_ordered():
+    enable()
+    for size in (1, 10, 100, 1000, 100000):
+        geo_convert.geodetic_to_ecef_batch(np.zeros((size, 3)))
+    stats = snapshot()[GEO + 'geodetic_to_ecef_batch']
+    assert stats['calls'] == 5
+    assert 0 < stats['p50_s'] <= stats['p90_s'] <= stats['p99_s'] <= stats['max_s'] <= stats['total_s']
+    assert stats['mean_s'] == pytest.approx(stats['total_s'] / 5)
+
+def test_threads_have_their_own_counters():
+    enable()
+    def work():
+        for _ in range(100):
+            geo_convert.geodetic_to_ecef(-25.7, 28.2, 1400.0)
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert snapshot()[GEO + 'geodetic_to_ecef']['calls'] == 400
+    reset()
+    assert snapshot() == {}
+
+def test_profiling_keeps_enabled_state():
+    enable()
+    with profiling():
+        geo_convert.geodetic_to_ecef(-25.7, 28.2, 1400.0)
+    assert is_enabled()
+
+def test_bucket_upper_bound_contains_value():
+    for ns in (0, 1, 7, 8, 9, 15, 16, 100, 12345, 10**9, 10**12):
+        bucket = instrumentation._bucket(ns)
+        assert ns < instrumentation._bucket_upper_ns(bucket) <= max(1.0, ns * 1.125 + 1)
+        if bucket:
+            assert instrumentation._bucket_upper_ns(bucket - 1) <= ns
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from geopoint.pan_tilt import PanTiltSolver
+from geopoint.moving_platform import frame_keys, moving_platform_pan_tilt, PlatformTrajectory
+
+# A vessel steaming north-east at ~10 m/s, sampled at 10 Hz, with a rolling deck
+N = 500
+T = np.arange(N) * 0.1
+ORIGIN_LAT = 59.9 + T * 6e-5
+ORIGIN_LON = 10.7 + T * 1.2e-4
+ORIGIN_H = 15.0 + 0.5 * np.sin(T)
+NORTH = 45.0 + 2.0 * np.sin(0.3 * T)
+PITCH = 1.5 * np.sin(0.7 * T)
+ROLL = 4.0 * np.sin(0.5 * T)
+TARGET_LAT = np.full(N, 59.93)
+TARGET_LON = np.full(N, 10.72)
+TARGET_H = np.full(N, 30.0)
+
+def expected(i, target=(TARGET_LAT, TARGET_LON, TARGET_H), origin=(ORIGIN_LAT, ORIGIN_LON, ORIGIN_H, NORTH, PITCH, ROLL)):
+    lat, lon, h, north, pitch, roll = (np.broadcast_to(c, (N,))[i] for c in origin)
+    return PanTiltSolver((lat, lon, h), north, pitch, roll).solve_with_range(*(c[i] for c in target))
+
+def test_moving_platform_pan_tilt_matches_per_sample_solver():
+    pan, tilt, r = moving_platform_pan_tilt(TARGET_LAT, TARGET_LON, TARGET_H, ORIGIN_LAT, ORIGIN_LON, ORIGIN_H, NORTH, PITCH, ROLL, max_frame_error=0)
+    for i in range(0, N, 37):
+        np.testing.assert_allclose((pan[i], tilt[i], r[i]), expected(i), rtol=0, atol=1e-9)
+
+def test_moving_platform_frame_reuse_error_is_bounded():
+    max_frame_error = 1e-3
+    keys = frame_keys(ORIGIN_LAT, ORIGIN_LON, max_frame_error)
+    assert len(np.unique(keys)) < N // 10
+    pan, tilt, r = moving_platform_pan_tilt(TARGET_LAT, TARGET_LON, TARGET_H, ORIGIN_LAT, ORIGIN_LON, ORIGIN_H, NORTH, PITCH, ROLL, max_frame_error)
+    exact = moving_platform_pan_tilt(TARGET_LAT, TARGET_LON, TARGET_H, ORIGIN_LAT, ORIGIN_LON, ORIGIN_H, NORTH, PITCH, ROLL, 0)
+    assert np.max(np.abs(pan - exact[0])) < max_frame_error
+    assert np.max(np.abs(tilt - exact[1])) < max_frame_error
+    np.testing.assert_allclose(r, exact[2], rtol=1e-12)
+
+def test_frame_keys():
+    lat = np.array([0.0, 0.4, 0.8, 1.2, 1.2, 5.0, 5.1])
+    lon = np.zeros(7)
+    np.testing.assert_array_equal(frame_keys(lat, lon, 1.0), [0, 0, 0, 3, 3, 5, 5])
+    np.testing.assert_array_equal(frame_keys(lat, lon, 0), np.arange(7))
+    # Crossing the antimeridian is a small step
+    np.testing.assert_array_equal(frame_keys([0, 0], [179.9, -179.9], 1.0), [0, 0])
+
+def test_platform_trajectory_interpolates_poses():
+    trajectory = PlatformTrajectory([0.0, 1.0, 2.0], [10.0, 11.0, 12.0], [179.5, -179.5, -178.5], [0.0, 10.0, 20.0], north=[170.0, -170.0, -150.0], pitch=1.0)
+    pose = trajectory.interpolate([0.5, 1.5, -1.0, 3.0])
+    np.testing.assert_allclose(pose.lat, [10.5, 11.5, 10.0, 12.0])
+    np.testing.assert_allclose(pose.lon, [-180.0, -179.0, 179.5, -178.5])
+    np.testing.assert_allclose(pose.h, [5.0, 15.0, 0.0, 20.0])
+    np.testing.assert_allclose(pose.north, [-180.0, -160.0, 170.0, -150.0])
+    np.testing.assert_allclose(pose.pitch, 1.0)
+    np.testing.assert_allclose(pose.roll, 0.0)
+
+def test_platform_trajectory_pan_tilt_at_target_timestamps():
+    # INS samples at 10 Hz, targets observed in between
+    trajectory = PlatformTrajectory(T, ORIGIN_LAT, ORIGIN_LON, ORIGIN_H, NORTH, PITCH, ROLL)
+    timestamps = np.array([0.05, 12.34, 40.0])
+    pose = trajectory.interpolate(timestamps)
+    pan, tilt, r = trajectory.pan_tilt(timestamps, 59.93, 10.72, 30.0, max_frame_error=0)
+    for i in range(len(timestamps)):
+        solver = PanTiltSolver((pose.lat[i], pose.lon[i], pose.h[i]), pose.north[i], pose.pitch[i], pose.roll[i])
+        np.testing.assert_allclose((pan[i], tilt[i], r[i]), solver.solve_with_range(59.93, 10.72, 30.0), rtol=0, atol=1e-9)
+
+def test_platform_trajectory_rejects_unordered_times():
+    with pytest.raises(ValueError):
+        PlatformTrajectory([0.0, 0.0], [0, 0], [0, 0], [0, 0])
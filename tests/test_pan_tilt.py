@@ -1,5 +1,6 @@
+import numpy as np
 from numpy import tan, sqrt, pi
-from geopoint.pan_tilt import xyz_to_pan_tilt
+from geopoint.pan_tilt import xyz_to_pan_tilt, geodetic_to_pan_tilt_with_offsets, geodetic_to_pan_tilt_pairwise, pan_tilt_to_target_geodetic, PanTiltSolver, IncrementalPanTilt
 
 # Test decomposition
 def test_rotation_matrices_decomposition_vector_1_0_0():
@@ -30,4 +31,139 @@ def test_rotation_matrices_decomposition_vector_0_0_n1():
     assert xyz_to_pan_tilt(0,0,-1) == (0, -90)
 
 def test_rotation_matrices_decomposition_vector_0_n1_n1():
-    assert xyz_to_pan_tilt(0,-1,-1) == (-90, -45)
\ No newline at end of file
+    assert xyz_to_pan_tilt(0,-1,-1) == (-90, -45)
+
+################################################
+# PanTiltSolver                                #
+################################################
+ORIGIN = (59.9, 10.7, 40.0)
+TARGETS = [(59.91, 10.71, 0.0), (59.89, 10.69, 120.0), (59.9, 10.75, 5.0), (59.95, 10.6, -3.0)]
+OFFSETS = [(0, 0, 0), (90, 10, 10), (-35.5, 2.5, -4.0)]
+
+def test_pan_tilt_solver_matches_geodetic_to_pan_tilt_with_offsets():
+    for north, pitch, roll in OFFSETS:
+        solver = PanTiltSolver(ORIGIN, north, pitch, roll)
+        for target in TARGETS:
+            expected = geodetic_to_pan_tilt_with_offsets(*target, *ORIGIN, north, pitch, roll)
+            np.testing.assert_allclose(solver.solve(*target), expected, rtol=0, atol=1e-9)
+
+def test_pan_tilt_solver_batch_matches_scalar():
+    solver = PanTiltSolver(ORIGIN, 12, 3, -2)
+    pan, tilt, r = solver.solve_with_range(np.array(TARGETS))
+    for i, target in enumerate(TARGETS):
+        np.testing.assert_allclose((pan[i], tilt[i], r[i]), solver.solve_with_range(*target), rtol=1e-12, atol=1e-9)
+
+def test_pan_tilt_solver_set_offsets_in_place():
+    solver = PanTiltSolver(ORIGIN)
+    matrix = solver.matrix
+    solver.set_offsets(north=90, pitch=10, roll=10)
+    assert solver.matrix is matrix
+    expected = geodetic_to_pan_tilt_with_offsets(*TARGETS[0], *ORIGIN, 90, 10, 10)
+    np.testing.assert_allclose(solver.solve(*TARGETS[0]), expected, rtol=0, atol=1e-9)
+
+def test_geodetic_to_pan_tilt_returns_plain_floats_for_scalars():
+    pan, tilt = geodetic_to_pan_tilt_with_offsets(*TARGETS[0], *ORIGIN, 90, 10, 10)
+    assert type(pan) is float and type(tilt) is float
+
+def test_geodetic_to_pan_tilt_accepts_arrays():
+    lat, lon, h = np.array(TARGETS).T
+    pan, tilt = geodetic_to_pan_tilt_with_offsets(lat, lon, h, *ORIGIN, 90, 10, 10)
+    for i, target in enumerate(TARGETS):
+        np.testing.assert_allclose((pan[i], tilt[i]), geodetic_to_pan_tilt_with_offsets(*target, *ORIGIN, 90, 10, 10), rtol=0, atol=1e-9)
+
+################################################
+# Pairwise cameras x targets                   #
+################################################
+CAMERAS = [(59.9, 10.7, 40.0, 0, 0, 0), (59.92, 10.72, 10.0, 90, 10, 10), (59.88, 10.65, 5.0, -35.5, 2.5, -4.0)]
+
+def test_geodetic_to_pan_tilt_pairwise_matches_scalar():
+    target_lat, target_lon, target_h = np.array(TARGETS).T
+    pan, tilt, r = geodetic_to_pan_tilt_pairwise(target_lat, target_lon, target_h, *np.array(CAMERAS).T)
+    assert pan.shape == tilt.shape == r.shape == (len(CAMERAS), len(TARGETS))
+    for m, (lat0, lon0, h0, north, pitch, roll) in enumerate(CAMERAS):
+        for n, target in enumerate(TARGETS):
+            expected = geodetic_to_pan_tilt_with_offsets(*target, lat0, lon0, h0, north, pitch, roll)
+            np.testing.assert_allclose((pan[m, n], tilt[m, n]), expected, rtol=0, atol=1e-9)
+            np.testing.assert_allclose(r[m, n], PanTiltSolver((lat0, lon0, h0), north, pitch, roll).solve_with_range(*target)[2], rtol=1e-12)
+
+def test_geodetic_to_pan_tilt_pairwise_chunking_does_not_change_results():
+    rng = np.random.default_rng(2)
+    target_lat, target_lon, target_h = 59.9 + rng.uniform(-0.1, 0.1, 37), 10.7 + rng.uniform(-0.1, 0.1, 37), rng.uniform(0, 50, 37)
+    cameras = np.array(CAMERAS).T
+    unchunked = geodetic_to_pan_tilt_pairwise(target_lat, target_lon, target_h, *cameras)
+    for budget in (1, 100, 56 * 10, 56 * 40):
+        chunked = geodetic_to_pan_tilt_pairwise(target_lat, target_lon, target_h, *cameras, memory_budget=budget)
+        for expected, actual in zip(unchunked, chunked):
+            assert np.array_equal(expected, actual)
+
+################################################
+# pan_tilt_to_target_geodetic                  #
+################################################
+def test_pan_tilt_to_target_geodetic_straight_down_hits_ground_below():
+    lat, lon, h = pan_tilt_to_target_geodetic(0, -90, None, 1000, *ORIGIN)
+    np.testing.assert_allclose((lat, lon, h), (ORIGIN[0], ORIGIN[1], 0), rtol=0, atol=1e-6)
+
+def test_pan_tilt_to_target_geodetic_ground_hit_round_trip():
+    solver = PanTiltSolver(ORIGIN, 30, 2, -1)
+    for pan, tilt in [(40, -10), (-120, -5), (179, -45)]:
+        target = solver.pan_tilt_to_geodetic(pan, tilt)
+        assert abs(target[2]) < 1e-6
+        np.testing.assert_allclose(solver.solve(*target), (pan, tilt), rtol=0, atol=1e-8)
+
+def test_pan_tilt_to_target_geodetic_terrain_height():
+    lat, lon, h = pan_tilt_to_target_geodetic(0, -30, None, 10000, *ORIGIN, terrain_height=25.0)
+    assert abs(h - 25.0) < 0.01
+
+def test_pan_tilt_to_target_geodetic_dome_and_dist():
+    solver = PanTiltSolver(ORIGIN, 30, 2, -1)
+    _, _, r = solver.solve_with_range(*solver.pan_tilt_to_geodetic(40, 5, max_view_distance=1000))
+    assert abs(r - 1000) < 1e-6
+    _, _, r = solver.solve_with_range(*solver.pan_tilt_to_geodetic(40, -10, dist=50.0, max_view_distance=1000))
+    assert abs(r - 50) < 1e-6
+
+def test_pan_tilt_to_target_geodetic_sky_without_dome_is_nan():
+    assert all(np.isnan(pan_tilt_to_target_geodetic(0, 10, None, np.inf, *ORIGIN)))
+
+def test_pan_tilt_to_target_geodetic_ray_grid():
+    solver = PanTiltSolver(ORIGIN, 12, 3, -2)
+    pans, tilts = np.meshgrid(np.linspace(-60, 60, 16), np.linspace(-40, 10, 9))
+    lat, lon, h = solver.pan_tilt_to_geodetic(pans, tilts, max_view_distance=2000)
+    assert lat.shape == pans.shape
+    pan, tilt, r = solver.solve_with_range(lat, lon, h)
+    np.testing.assert_allclose(pan, pans, rtol=0, atol=1e-8)
+    np.testing.assert_allclose(tilt, tilts, rtol=0, atol=1e-8)
+    assert np.all(r <= 2000 + 1e-6)
+
+################################################
+# IncrementalPanTilt                           #
+################################################
+def test_incremental_pan_tilt_stays_within_tolerance():
+    solver = PanTiltSolver(ORIGIN, 12, 3, -2)
+    incremental = IncrementalPanTilt(solver, tolerance=0.01)
+    lat, lon, h = TARGETS[0]
+    for step in range(200):
+        # A target moving ~1 m per tick, about 1.1 km from the PU
+        lat_t, lon_t, h_t = lat + step * 5e-6, lon + step * 1e-5, h + 0.01 * step
+        pan, tilt = incremental(lat_t, lon_t, h_t)
+        expected = solver.solve(lat_t, lon_t, h_t)
+        assert abs(pan - expected[0]) < 0.01 and abs(tilt - expected[1]) < 0.01
+    assert incremental.hits + incremental.reanchors == 200
+    assert incremental.hits > incremental.reanchors > 1
+
+def test_incremental_pan_tilt_reanchors_on_jumps():
+    solver = PanTiltSolver(ORIGIN)
+    incremental = IncrementalPanTilt(solver)
+    incremental(*TARGETS[0])
+    pan, tilt = incremental(*TARGETS[1])
+    assert incremental.reanchors == 2 and incremental.hits == 0
+    np.testing.assert_allclose((pan, tilt), solver.solve(*TARGETS[1]), rtol=0, atol=1e-12)
+
+def test_incremental_pan_tilt_jacobian_matches_finite_differences():
+    solver = PanTiltSolver(ORIGIN, 40, -5, 7)
+    incremental = IncrementalPanTilt(solver, tolerance=1.0)
+    lat, lon, h = TARGETS[2]
+    incremental.reanchor(lat, lon, h)
+    for delta in [(1e-6, 0, 0), (0, 1e-6, 0), (0, 0, 0.1)]:
+        moved = (lat + delta[0], lon + delta[1], h + delta[2])
+        np.testing.assert_allclose(incremental(*moved), solver.solve(*moved), rtol=0, atol=1e-8)
+    assert incremental.hits == 3
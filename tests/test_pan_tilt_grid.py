@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from geopoint.pan_tilt import PanTiltSolver
+from geopoint.pan_tilt_grid import PanTiltGrid
+
+# A camera on a mast at the edge of a port basin, looking over the water to the north-east
+SOLVER = PanTiltSolver((51.95, 4.05, 30.0), 12, 1, -0.5)
+BOUNDS = (51.96, 4.0, 52.0, 4.1)
+
+def random_queries(n, bounds=BOUNDS, seed=0):
+    rng = np.random.default_rng(seed)
+    south, west, north, east = bounds
+    return rng.uniform(south, north, n), rng.uniform(west, east, n)
+
+def test_geodetic_grid_interpolation_error_is_bounded_by_max_error():
+    grid = PanTiltGrid.build(SOLVER, *BOUNDS, resolution=0.00025, height=2.0)
+    assert grid.table.dtype == np.float32
+    assert grid.max_error['pan'] < 0.005 and grid.max_error['tilt'] < 0.005 and grid.max_error['range'] < 0.5
+    lat, lon = random_queries(2000)
+    pan, tilt, r = grid.pan_tilt_range(lat, lon)
+    exact_pan, exact_tilt, exact_r = SOLVER.solve_with_range(lat, lon, np.full_like(lat, 2.0))
+    # Plus the float32 rounding of the samples
+    assert np.max(np.abs(pan - exact_pan)) <= grid.max_error['pan'] + 1e-4
+    assert np.max(np.abs(tilt - exact_tilt)) <= grid.max_error['tilt'] + 1e-4
+    assert np.max(np.abs(r - exact_r)) <= grid.max_error['range'] + 1e-2
+
+def test_grid_samples_are_exact():
+    grid = PanTiltGrid.build(SOLVER, *BOUNDS, resolution=0.01)
+    pan, tilt = grid.pan_tilt([52.0, 51.96], [4.0, 4.1])
+    exact = SOLVER.solve([52.0, 51.96], [4.0, 4.1], [0.0, 0.0])
+    np.testing.assert_allclose((pan, tilt), exact, rtol=0, atol=1e-5)
+
+def test_enu_grid_across_the_pan_seam():
+    # An area south of the camera, where the pan wraps from 180 to -180 (north offset 0)
+    solver = PanTiltSolver((51.95, 4.05, 30.0))
+    grid = PanTiltGrid.build(solver, -6000.0, -2000.0, -3000.0, 2000.0, resolution=20.0, frame='enu', height=-28.0)
+    assert grid.max_error['pan'] < 0.01
+    rng = np.random.default_rng(1)
+    east, north = rng.uniform(-2000, 2000, 1000), rng.uniform(-6000, -3000, 1000)
+    pan, tilt, r = grid.pan_tilt_range(east, north)
+    geodetic = solver.frame.enu_to_geodetic(east, north, np.full_like(east, -28.0))
+    exact_pan, exact_tilt, exact_r = solver.solve_with_range(geodetic)
+    assert np.any(exact_pan > 170) and np.any(exact_pan < -170)
+    assert np.max(np.abs((pan - exact_pan + 180) % 360 - 180)) < grid.max_error['pan'] + 1e-4
+    np.testing.assert_allclose(tilt, exact_tilt, rtol=0, atol=grid.max_error['tilt'] + 1e-4)
+    np.testing.assert_allclose(r, exact_r, rtol=0, atol=grid.max_error['range'] + 1e-2)
+
+def test_queries_outside_the_grid_are_nan():
+    grid = PanTiltGrid.build(SOLVER, *BOUNDS, resolution=0.01)
+    pan, tilt = grid.pan_tilt([51.95, 51.98], [4.05, 4.2])
+    assert np.all(np.isnan(pan)) and np.all(np.isnan(tilt))
+
+def test_save_and_load_memory_maps_the_table(tmp_path):
+    grid = PanTiltGrid.build(SOLVER, *BOUNDS, resolution=0.002, height=2.0)
+    grid.save(tmp_path / 'port.npy')
+    loaded = PanTiltGrid.load(tmp_path / 'port.npy')
+    assert isinstance(loaded.table, np.memmap)
+    assert loaded.max_error == grid.max_error
+    assert loaded.pose == (51.95, 4.05, 30.0, 12, 1, -0.5)
+    lat, lon = random_queries(100)
+    np.testing.assert_array_equal(loaded.pan_tilt_range(lat, lon), grid.pan_tilt_range(lat, lon))
+
+def test_build_rejects_empty_bounds():
+    with pytest.raises(ValueError):
+        PanTiltGrid.build(SOLVER, 52.0, 4.0, 51.96, 4.1, resolution=0.01)
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+from geopoint.geo_convert import geodetic_to_ecef_batch, ecef_to_geodetic_batch
+from geopoint.point_store import PointStore, RECORD
+
+rng = np.random.default_rng(11)
+
+# Helper functions
+def random_geodetic(n, south=-34.0, north=-22.0, west=16.0, east=33.0):
+    return np.column_stack([rng.uniform(south, north, n), rng.uniform(west, east, n), rng.uniform(-100.0, 12000.0, n)])
+
+def test_round_trip_error_is_within_bound():
+    store = PointStore()
+    geodetic = random_geodetic(200000)
+    ecef = geodetic_to_ecef_batch(geodetic)
+    assert store.append_ecef(ecef) == 0
+    assert len(store.tile_keys) > 100
+
+    assert store.max_error == pytest.approx(np.sqrt(3) * 2.0 ** -9)
+    error = np.linalg.norm(store.to_ecef() - ecef, axis=1)
+    assert error.max() <= store.max_error
+    assert error.max() > store.max_error / 4  # the bound is not loose
+    # Per ENU axis: half a float32 ulp below 2^16 m
+    enu_error = np.einsum('nij,nj->ni', store.rotations[store.tiles], store.to_ecef() - ecef)
+    assert np.abs(enu_error).max() <= 2.0 ** -9 + 1e-8
+
+    decoded = store.to_geodetic()
+    np.testing.assert_allclose(decoded[:, 2], geodetic[:, 2], rtol=0, atol=store.max_error)
+    np.testing.assert_allclose(decoded[:, :2], geodetic[:, :2], rtol=0, atol=1e-7)
+
+def test_smaller_tiles_have_smaller_error():
+    store = PointStore(tile_size=1000.0)
+    ecef = geodetic_to_ecef_batch(random_geodetic(10000, -25.8, -25.6, 28.1, 28.3))
+    store.append_ecef(ecef)
+    assert store.max_error < 1e-4
+    assert np.linalg.norm(store.to_ecef() - ecef, axis=1).max() <= store.max_error
+
+def test_append_geodetic_and_columns():
+    geodetic = random_geodetic(1000)
+    store = PointStore(capacity=4)
+    assert store.append_geodetic(geodetic[:10]) == 0
+    assert store.append_geodetic(*geodetic[10:].T) == 10
+    assert store.append_geodetic(*geodetic[0]) == 1000
+    assert len(store) == 1001 and store.nbytes == 1001 * 16
+    np.testing.assert_allclose(store.to_geodetic()[:1000, :2], geodetic[:, :2], rtol=0, atol=1e-7)
+    np.testing.assert_allclose(store.to_geodetic()[1000], geodetic[0], rtol=0, atol=1e-2)
+
+def test_slicing():
+    ecef = geodetic_to_ecef_batch(random_geodetic(500))
+    store = PointStore()
+    store.append_ecef(ecef)
+    expected = store.to_ecef()
+
+    view = store[100:200]
+    assert len(view) == 100 and np.shares_memory(view.records, store.records)
+    np.testing.assert_array_equal(view.to_ecef(), expected[100:200])
+    np.testing.assert_array_equal(store[::7].to_ecef(), expected[::7])
+    np.testing.assert_array_equal(store[np.array([5, 3, 499])].to_ecef(), expected[[5, 3, 499]])
+    np.testing.assert_array_equal(store[-1].to_ecef(), expected[-1:])
+
+    # Appending to a view does not touch the parent store
+    view.append_ecef(ecef[:10])
+    np.testing.assert_array_equal(store.to_ecef(), expected)
+    np.testing.assert_allclose(view.to_ecef()[100:], ecef[:10], rtol=0, atol=view.max_error)
+
+    # A view and its parent that both add tiles keep their own tile numbers
+    far = geodetic_to_ecef_batch(np.array([[10.0, -60.0, 0.0], [-60.0, 120.0, 500.0]]))
+    view.append_ecef(far[:1])
+    store.append_ecef(far[1:])
+    store.append_ecef(far[:1])
+    np.testing.assert_allclose(view.to_ecef()[-1], far[0], rtol=0, atol=view.max_error)
+    np.testing.assert_allclose(store.to_ecef()[-2:], far[::-1], rtol=0, atol=store.max_error)
+    np.testing.assert_array_equal(store.to_ecef()[:500], expected)
+
+def test_out_buffer():
+    store = PointStore()
+    store.append_ecef(geodetic_to_ecef_batch(random_geodetic(50)))
+    out = np.empty((50, 3))
+    assert store.to_geodetic(out=out) is out
+    np.testing.assert_allclose(out, ecef_to_geodetic_batch(store.to_ecef()))
+    with pytest.raises(ValueError):
+        store.to_ecef(out=np.empty((49, 3)))
+
+def test_save_and_load_memory_maps(tmp_path):
+    ecef = geodetic_to_ecef_batch(random_geodetic(3000))
+    store = PointStore()
+    store.append_ecef(ecef)
+    store.save(tmp_path / 'history')
+
+    loaded = PointStore.load(tmp_path / 'history.npy')
+    assert isinstance(loaded.records, np.memmap) and loaded.records.dtype == RECORD
+    assert (tmp_path / 'history.npy').stat().st_size < 3000 * 16 + 256
+    np.testing.assert_array_equal(loaded.to_ecef(), store.to_ecef())
+
+    # Appending to a loaded store reuses its tiles and copies the points to memory
+    tiles = len(loaded.tile_keys)
+    loaded.append_ecef(ecef[:100])
+    assert len(loaded.tile_keys) == tiles
+    np.testing.assert_array_equal(loaded.to_ecef()[3000:], store.to_ecef()[:100])
+
+def test_empty_store():
+    store = PointStore()
+    assert store.to_ecef().shape == (0, 3)
+    assert store.to_geodetic().shape == (0, 3)
+    assert store.append_ecef(np.empty((0, 3))) == 0
@@ -1,5 +1,6 @@
+import numpy as np
 from numpy import array, array_equal
-from geopoint.rotational_matrices import Rx, Ry, Rz
+from geopoint.rotational_matrices import Rx, Ry, Rz, rotate_frame_zyx, rotation_matrices_zyx, rotate_frame_zyx_batch
 
 # Test rotation matrices
 def test_rotation_matrices_1():
@@ -24,4 +25,25 @@ def test_rotation_matrices_5():
 
 def test_rotation_matrices_6():
     v = array([[1],[0],[0]])
-    assert array_equal( Ry(-90).dot(Rx(-90).dot(Rz(-90).dot(v))).round(9), array([[1],[0],[0]]) )
\ No newline at end of file
+    assert array_equal( Ry(-90).dot(Rx(-90).dot(Rz(-90).dot(v))).round(9), array([[1],[0],[0]]) )
+
+# Test batched rotations
+def test_rotation_matrices_zyx_matches_reduced_product():
+    offsets = [(0, 0, 0), (30, -10, 5), (-135, 45, 80)]
+    matrices = rotation_matrices_zyx(*np.array(offsets).T)
+    for matrix, (z, y, x) in zip(matrices, offsets):
+        np.testing.assert_allclose(matrix, Rx(x).dot(Ry(y)).dot(Rz(z + 90)), rtol=0, atol=1e-15)
+
+def test_rotate_frame_zyx_batch_matches_scalar():
+    rng = np.random.default_rng(1)
+    vectors = rng.uniform(-100, 100, (50, 3))
+    north, pitch, roll = rng.uniform(-180, 180, 50), rng.uniform(-20, 20, 50), rng.uniform(-20, 20, 50)
+    rotated = rotate_frame_zyx_batch(vectors, north, pitch, roll)
+    for i in range(50):
+        np.testing.assert_allclose(rotated[i], rotate_frame_zyx(*vectors[i], north[i], pitch[i], roll[i]), rtol=0, atol=1e-12)
+
+def test_rotate_frame_zyx_batch_broadcasts_offsets():
+    vectors = np.eye(3)
+    out = np.empty((3, 3))
+    assert rotate_frame_zyx_batch(vectors, 0, 0, 0, out=out) is out
+    np.testing.assert_allclose(out, vectors.dot(Rz(90).T), rtol=0, atol=1e-15)
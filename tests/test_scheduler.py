@@ -0,0 +1,145 @@
+import itertools
+import numpy as np
+import pytest
+from geopoint.pan_tilt import PanTiltSolver
+from geopoint.scheduler import SlewScheduler, axis_move_time, pan_distance, slew_times, nearest_neighbour_cycle, two_opt
+
+SOLVER = PanTiltSolver((-25.7, 28.2, 1400.0), 12)
+RATES = (60.0, 30.0, 120.0, 60.0)  # pan rate, tilt rate, pan acceleration, tilt acceleration
+
+rng = np.random.default_rng(5)
+
+# Helper functions
+def random_targets(n):
+    return rng.uniform(-25.8, -25.6, n), rng.uniform(28.1, 28.3, n), rng.uniform(1000.0, 2000.0, n)
+
+def cycle_time(times, order):
+    return times[order, np.roll(order, -1)].sum()
+
+def has_improving_two_opt_move(times, order):
+    n = len(order)
+    for i in range(n):
+        for j in range(i + 2, n):
+            if i == 0 and j == n - 1:
+                continue
+            a, b, c, d = order[i], order[i + 1], order[j], order[(j + 1) % n]
+            if times[a, c] + times[b, d] < times[a, b] + times[c, d] - 1e-9:
+                return True
+    return False
+
+def test_axis_move_time_profiles():
+    # Triangular: 2 sqrt(d / a) below the ramp distance rate^2 / acceleration = 30 degrees
+    assert axis_move_time(7.5, 60.0, 120.0) == pytest.approx(0.5)
+    # Trapezoidal: d / rate + rate / acceleration
+    assert axis_move_time(90.0, 60.0, 120.0) == pytest.approx(2.0)
+    # Continuous at the ramp distance, and symmetric
+    assert axis_move_time(30.0, 60.0, 120.0) == pytest.approx(2 * np.sqrt(30.0 / 120.0))
+    np.testing.assert_allclose(axis_move_time(np.array([-90.0, 0.0]), 60.0, 120.0), [2.0, 0.0])
+
+def test_pan_wraps_around():
+    assert pan_distance(170.0, -170.0) == pytest.approx(20.0)
+    assert pan_distance(170.0, -170.0, continuous_pan=False) == pytest.approx(340.0)
+    assert slew_times(170.0, 0.0, -170.0, 0.0, *RATES) == pytest.approx(axis_move_time(20.0, 60.0, 120.0))
+    # The slower axis sets the slew time
+    assert slew_times(0.0, 0.0, 10.0, 40.0, *RATES) == pytest.approx(axis_move_time(40.0, 30.0, 60.0))
+
+def test_two_opt_leaves_no_improving_move():
+    pan = rng.uniform(-180.0, 180.0, 40)
+    tilt = rng.uniform(-30.0, 10.0, 40)
+    times = slew_times(pan[:, None], tilt[:, None], pan[None, :], tilt[None, :], *RATES)
+    np.testing.assert_array_equal(times, times.T)
+    start = nearest_neighbour_cycle(times)
+    assert sorted(start.tolist()) == list(range(40))
+    improved = two_opt(times, start)
+    assert sorted(improved.tolist()) == list(range(40))
+    assert cycle_time(times, improved) <= cycle_time(times, start)
+    assert not has_improving_two_opt_move(times, improved)
+
+def test_small_cycle_is_optimal():
+    pan = rng.uniform(-180.0, 180.0, 7)
+    tilt = rng.uniform(-30.0, 10.0, 7)
+    times = slew_times(pan[:, None], tilt[:, None], pan[None, :], tilt[None, :], *RATES)
+    best = min(cycle_time(times, np.array((0,) + rest)) for rest in itertools.permutations(range(1, 7)))
+    assert cycle_time(times, two_opt(times, nearest_neighbour_cycle(times))) <= 1.1 * best
+
+def test_plan_visits_every_target_once():
+    scheduler = SlewScheduler(SOLVER, *RATES, dwell=0.5)
+    ids = [f"target-{index}" for index in range(50)]
+    scheduler.update(ids, *random_targets(50))
+    plan = scheduler.plan()
+    assert sorted(plan.order) == sorted(ids)
+
+    target_ids, times = scheduler.slew_time_matrix()
+    positions = [target_ids.index(target) for target in plan.order]
+    assert plan.cycle_time == pytest.approx(cycle_time(times, np.array(positions)) + 50 * 0.5)
+    np.testing.assert_allclose(plan.slew_times[1:], times[positions[:-1], positions[1:]])
+    assert not has_improving_two_opt_move(times, np.array(positions))
+
+def test_plan_starts_closest_to_current_pointing():
+    scheduler = SlewScheduler(SOLVER, *RATES)
+    lat, lon, h = random_targets(20)
+    scheduler.update(range(20), lat, lon, h)
+    pan, tilt = SOLVER.solve(lat[7], lon[7], h[7])
+    plan = scheduler.plan(pan + 0.01, tilt)
+    assert plan.order[0] == 7
+    assert plan.slew_times[0] == pytest.approx(float(axis_move_time(0.01, 60.0, 120.0)))
+
+def test_incremental_updates_match_rebuild():
+    scheduler = SlewScheduler(SOLVER, *RATES, capacity=4)
+    lat, lon, h = random_targets(30)
+    scheduler.update(range(30), lat, lon, h)
+    scheduler.plan()
+
+    # Move some, remove some, add some
+    lat[:10] += 0.01
+    scheduler.update(range(10), lat[:10], lon[:10], h[:10])
+    scheduler.remove([20, 21, 22, 'unknown'])
+    new_lat, new_lon, new_h = random_targets(5)
+    scheduler.update(range(100, 105), new_lat, new_lon, new_h, dwell=2.0)
+    plan = scheduler.plan()
+
+    expected_ids = [index for index in range(30) if index not in (20, 21, 22)] + list(range(100, 105))
+    assert sorted(plan.order) == expected_ids
+    rebuilt = SlewScheduler(SOLVER, *RATES)
+    keep = np.array([index for index in range(30) if index not in (20, 21, 22)])
+    rebuilt.update(list(keep) + list(range(100, 105)), np.append(lat[keep], new_lat), np.append(lon[keep], new_lon), np.append(h[keep], new_h))
+    target_ids, times = scheduler.slew_time_matrix()
+    rebuilt_ids, rebuilt_times = rebuilt.slew_time_matrix()
+    order = [rebuilt_ids.index(target) for target in target_ids]
+    np.testing.assert_allclose(times, rebuilt_times[np.ix_(order, order)], rtol=1e-12)
+    assert scheduler.dwells[[scheduler.slots[target] for target in range(100, 105)]].tolist() == [2.0] * 5
+
+    _, plan_times = scheduler.slew_time_matrix()
+    positions = np.array([target_ids.index(target) for target in plan.order])
+    assert not has_improving_two_opt_move(plan_times, positions)
+
+def test_empty_and_tiny_plans():
+    scheduler = SlewScheduler(SOLVER, *RATES)
+    assert scheduler.plan().order == []
+    scheduler.update(['a'], *random_targets(1))
+    plan = scheduler.plan()
+    assert plan.order == ['a'] and plan.cycle_time == 0.0
+    with pytest.raises(ValueError):
+        scheduler.update(['b', 'b'], *random_targets(2))
+
+def test_incremental_plan_only_evaluates_moves_near_changes():
+    scheduler = SlewScheduler(SOLVER, *RATES)
+    lat, lon, h = random_targets(300)
+    scheduler.update(range(300), lat, lon, h)
+    scheduler.plan()
+    # Built from scratch: every iteration evaluates all n x n moves
+    assert scheduler.evaluated >= 300 * 300
+
+    lat[:3] += 0.01
+    scheduler.update(range(3), lat[:3], lon[:3], h[:3])
+    previous = scheduler.cycle.copy()
+    evaluated = scheduler.evaluated
+    plan = scheduler.plan()
+    assert scheduler.evaluated - evaluated < 300 * 300 / 2
+    full = two_opt(scheduler.times, previous)
+    assert plan.cycle_time <= 1.01 * cycle_time(scheduler.times, full)
+
+    # Nothing changed, nothing to evaluate
+    evaluated = scheduler.evaluated
+    scheduler.plan()
+    assert scheduler.evaluated == evaluated
@@ -0,0 +1,90 @@
+import asyncio
+import struct
+import numpy as np
+import pytest
+from geopoint.geo_convert import geodetic_to_enu, ecef_to_geodetic
+from geopoint.pan_tilt import geodetic_to_pan_tilt_with_offsets
+from geopoint.service import PanTiltServer, PanTiltClient, ServiceError, HEADER
+
+ORIGIN = (-25.7, 28.2, 1400.0)
+OFFSETS = (90.0, 1.5, -0.5)
+
+def run_with_server(scenario, tmp_path=None, window=0.002):
+    async def main():
+        server = PanTiltServer(window=window)
+        if tmp_path is not None:
+            await server.start(str(tmp_path / 'geopoint.sock'))
+            client = PanTiltClient(str(tmp_path / 'geopoint.sock'), pool_size=2)
+        else:
+            await server.start(port=0)
+            client = PanTiltClient(port=server.address[1], pool_size=2)
+        try:
+            async with client:
+                return await scenario(server, client)
+        finally:
+            await server.close()
+    return asyncio.run(main())
+
+def test_concurrent_requests_are_coalesced(tmp_path):
+    rng = np.random.default_rng(0)
+    targets = np.column_stack([rng.uniform(-26.0, -25.4, 100), rng.uniform(27.9, 28.5, 100), rng.uniform(1000, 2000, 100)])
+
+    async def scenario(server, client):
+        results = await asyncio.gather(*(client.geodetic_to_pan_tilt_with_offsets(*target, *ORIGIN, *OFFSETS) for target in targets.tolist()))
+        return results, server.requests, server.batches
+
+    results, requests, batches = run_with_server(scenario, tmp_path)
+    assert requests == 100 and batches < 10
+    for target, (pan, tilt) in zip(targets.tolist(), results):
+        assert isinstance(pan, float)
+        np.testing.assert_allclose((pan, tilt), geodetic_to_pan_tilt_with_offsets(*target, *ORIGIN, *OFFSETS), rtol=0, atol=1e-9)
+
+def test_array_requests_over_tcp():
+    lat, lon, h = np.array([-25.6, -25.8]), np.array([28.1, 28.3]), np.array([1500.0, 1300.0])
+
+    async def scenario(server, client):
+        enu = await client.geodetic_to_enu(lat, lon, h, *ORIGIN)
+        geodetic = await client.ecef_to_geodetic(6378137.0, 0.0, 0.0)
+        return enu, geodetic
+
+    enu, geodetic = run_with_server(scenario)
+    np.testing.assert_allclose(enu, geodetic_to_enu(lat, lon, h, *ORIGIN), rtol=0, atol=1e-6)
+    np.testing.assert_allclose(geodetic, ecef_to_geodetic(6378137.0, 0.0, 0.0), rtol=0, atol=1e-9)
+
+def test_errors_are_reported_per_request(tmp_path):
+    async def scenario(server, client):
+        with pytest.raises(TypeError):
+            await client.call('ecef_to_geodetic', 1.0, 2.0)
+        # An unknown op from a misbehaving client closes only its own connection
+        reader, writer = await asyncio.open_unix_connection(str(tmp_path / 'geopoint.sock'))
+        writer.write(HEADER.pack(7, 99, 0, 1) + struct.pack('<d', 0.0))
+        request_id, status, _, n = HEADER.unpack(await reader.readexactly(HEADER.size))
+        message = (await reader.readexactly(n)).decode()
+        assert await reader.read() == b''
+        writer.close()
+        return request_id, status, message, await client.ecef_to_geodetic(6378137.0, 0.0, 0.0)
+
+    request_id, status, message, geodetic = run_with_server(scenario, tmp_path)
+    assert request_id == 7 and status != 0 and 'unknown op' in message
+    np.testing.assert_allclose(geodetic, (0.0, 0.0, 0.0), atol=1e-9)
+
+def test_bad_request_fails_alone_in_its_batch(tmp_path):
+    def checked_ecef_to_geodetic(x, y, z):
+        if not np.all(np.isfinite(x)):
+            raise ValueError("non-finite coordinate")
+        return ecef_to_geodetic(x, y, z)
+
+    async def scenario(server, client):
+        batcher = server.batchers[3]
+        batcher.operation = batcher.operation._replace(function=checked_ecef_to_geodetic)
+        xs = [6378137.0 + 10.0 * index for index in range(20)]
+        xs[7] = float('nan')
+        results = await asyncio.gather(*(client.ecef_to_geodetic(x, 0.0, 0.0) for x in xs), return_exceptions=True)
+        return results, batcher.calls
+
+    results, calls = run_with_server(scenario, tmp_path, window=0.05)
+    assert calls < 5
+    assert isinstance(results[7], ServiceError) and 'non-finite coordinate' in str(results[7])
+    for index, result in enumerate(results):
+        if index != 7:
+            np.testing.assert_allclose(result, (0.0, 0.0, 10.0 * index), atol=1e-6)
@@ -0,0 +1,124 @@
+import asyncio
+import time
+import numpy as np
+import pytest
+from geopoint.pan_tilt import PanTiltSolver
+from geopoint.streaming import DropOldestBuffer, PanTiltStream, TargetFix, stream_pan_tilt, astream_pan_tilt
+
+SOLVER = PanTiltSolver((59.9, 10.7, 40.0), 12, 3, -2)
+
+def make_fixes(n):
+    rng = np.random.default_rng(4)
+    return [TargetFix(float(i), i % 7, 59.9 + rng.uniform(-0.01, 0.01), 10.7 + rng.uniform(-0.01, 0.01), rng.uniform(0, 50)) for i in range(n)]
+
+def check_batches(batches, fixes, batch_size):
+    assert all(len(batch.pan) <= batch_size for batch in batches)
+    timestamps = np.concatenate([batch.timestamp for batch in batches])
+    assert np.array_equal(timestamps, [fix.timestamp for fix in fixes])
+    pan = np.concatenate([batch.pan for batch in batches])
+    tilt = np.concatenate([batch.tilt for batch in batches])
+    for i, fix in enumerate(fixes):
+        np.testing.assert_allclose((pan[i], tilt[i]), SOLVER.solve(fix.lat, fix.lon, fix.h), rtol=0, atol=1e-9)
+
+################################################
+# DropOldestBuffer                             #
+################################################
+def test_drop_oldest_buffer():
+    buffer = DropOldestBuffer(3)
+    for i in range(5):
+        buffer.push(i, arrival=float(i))
+    assert len(buffer) == 3 and buffer.dropped == 2
+    assert buffer.oldest_arrival() == 2.0
+    assert buffer.pop_batch(2) == [2, 3]
+    assert buffer.pop_batch(5) == [4]
+
+def test_drop_oldest_buffer_rejects_zero_size():
+    with pytest.raises(ValueError):
+        DropOldestBuffer(0)
+
+################################################
+# Synchronous stream                           #
+################################################
+def test_stream_pan_tilt_converts_all_fixes_in_order():
+    fixes = make_fixes(1000)
+    check_batches(list(stream_pan_tilt(iter(fixes), SOLVER, batch_size=64, max_buffer=10000)), fixes, 64)
+
+def test_stream_pan_tilt_flushes_after_max_latency():
+    def source():
+        yield from make_fixes(3)
+        time.sleep(0.3)
+        yield from make_fixes(6)[3:]
+    batches = list(stream_pan_tilt(source(), SOLVER, batch_size=100, max_latency=0.02))
+    assert [len(batch.pan) for batch in batches] == [3, 3]
+
+def test_stream_pan_tilt_emits_first_fix_of_sparse_feed_within_max_latency():
+    sent = {}
+    def source():
+        time.sleep(0.05)
+        fixes = make_fixes(2)
+        sent['first'] = time.monotonic()
+        yield fixes[0]
+        time.sleep(1.0)
+        yield fixes[1]
+    stream = stream_pan_tilt(source(), SOLVER, batch_size=100, max_latency=0.01)
+    first = next(stream)
+    assert time.monotonic() - sent['first'] < 0.25
+    assert len(first.pan) == 1
+    stream.close()
+
+def test_stream_pan_tilt_propagates_source_errors():
+    def source():
+        yield from make_fixes(3)
+        raise RuntimeError("GPS disconnected")
+    with pytest.raises(RuntimeError):
+        list(stream_pan_tilt(source(), SOLVER, batch_size=2))
+
+def test_pan_tilt_stream_drops_oldest_when_consumer_is_slow():
+    stream = PanTiltStream(SOLVER, batch_size=10, max_latency=0.001, max_buffer=20)
+    batches = []
+    for batch in stream.run(iter(make_fixes(5000))):
+        batches.append(batch)
+        time.sleep(0.01)
+    assert stream.dropped > 0
+    assert stream.converted + stream.dropped == 5000
+    timestamps = np.concatenate([batch.timestamp for batch in batches])
+    assert np.all(np.diff(timestamps) > 0)
+
+################################################
+# Async stream                                 #
+################################################
+def test_astream_pan_tilt():
+    fixes = make_fixes(300)
+
+    async def source():
+        for i, fix in enumerate(fixes):
+            if i % 50 == 0:
+                await asyncio.sleep(0.01)
+            yield fix
+
+    async def collect():
+        return [batch async for batch in astream_pan_tilt(source(), SOLVER, batch_size=32, max_latency=0.002)]
+
+    check_batches(asyncio.run(collect()), fixes, 32)
+
+def test_astream_pan_tilt_emits_first_fix_of_sparse_feed_within_max_latency():
+    fixes = make_fixes(2)
+
+    async def source():
+        await asyncio.sleep(0.05)
+        yield fixes[0]
+        await asyncio.sleep(1.0)
+        yield fixes[1]
+
+    async def first_batch_delay():
+        loop = asyncio.get_running_loop()
+        stream = astream_pan_tilt(source(), SOLVER, batch_size=100, max_latency=0.01)
+        start = loop.time()
+        first = await stream.__anext__()
+        delay = loop.time() - start - 0.05
+        await stream.aclose()
+        return first, delay
+
+    first, delay = asyncio.run(first_batch_delay())
+    assert len(first.pan) == 1
+    assert delay < 0.25
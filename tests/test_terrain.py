@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+from geopoint.terrain import ElevationTile, ElevationModel, build_max_pyramid
+from geopoint.pan_tilt import PanTiltSolver, pan_tilt_to_target_geodetic
+
+# Helper functions
+def flat_tile(height, south=59, west=10, samples=101):
+    return ElevationTile(np.full((samples, samples), height, dtype=np.float32), south, west, south + 1, west + 1)
+
+def ridge_heights(samples=401):
+    # A north-south ridge, 200 m high, at lon 10.75
+    lons = np.linspace(10, 11, samples)
+    ridge = 200 * np.exp(-((lons - 10.75) / 0.01) ** 2)
+    return np.tile(ridge, (samples, 1)).astype(np.float32)
+
+ORIGIN = (59.5, 10.7, 50.0)
+
+################################################
+# Tiles and pyramid                            #
+################################################
+def test_max_pyramid_is_conservative():
+    rng = np.random.default_rng(3)
+    heights = rng.uniform(0, 100, (37, 53)).astype(np.float32)
+    tile = ElevationTile(heights, 0, 0, 1, 1)
+    assert build_max_pyramid(heights)[-1].shape == (1, 1)
+    for _ in range(200):
+        lat_lo, lat_hi = np.sort(rng.uniform(0, 1, 2))
+        lon_lo, lon_hi = np.sort(rng.uniform(0, 1, 2))
+        lats, lons = np.meshgrid(np.linspace(lat_lo, lat_hi, 20), np.linspace(lon_lo, lon_hi, 20))
+        bound = tile.max_height(np.array([lat_lo]), np.array([lat_hi]), np.array([lon_lo]), np.array([lon_hi]))[0]
+        assert bound >= tile.sample(lats, lons).max() - 1e-4
+
+def test_tile_sample_is_bilinear():
+    heights = np.array([[0, 10], [20, 30]], dtype=np.float32)  # row 0 is north
+    tile = ElevationTile(heights, 0, 0, 1, 1)
+    assert tile.sample(1.0, 0.0) == 0
+    assert tile.sample(0.0, 1.0) == 30
+    assert tile.sample(0.5, 0.5) == 15
+
+def test_tile_load_npy_and_raw(tmp_path):
+    heights = ridge_heights(11)
+    np.save(tmp_path / 'tile.npy', heights)
+    heights.tofile(tmp_path / 'tile.raw')
+    from_npy = ElevationTile.load(tmp_path / 'tile.npy', 59, 10, 60, 11)
+    from_raw = ElevationTile.load(tmp_path / 'tile.raw', 59, 10, 60, 11, shape=heights.shape)
+    assert isinstance(from_npy.heights, np.memmap) and isinstance(from_raw.heights, np.memmap)
+    assert np.array_equal(from_npy.heights, from_raw.heights)
+    with pytest.raises(ValueError):
+        ElevationTile.load(tmp_path / 'tile.raw', 59, 10, 60, 11)
+
+################################################
+# Tile cache                                   #
+################################################
+def test_elevation_model_lru_cache(tmp_path):
+    tiles = {}
+    for i, west in enumerate((10, 11, 12)):
+        np.save(tmp_path / f'{west}.npy', np.full((11, 11), i, dtype=np.float32))
+        tiles[(59, west)] = tmp_path / f'{west}.npy'
+    model = ElevationModel(tiles, max_cached_tiles=2)
+    assert np.array_equal(model.sample(np.full(3, 59.5), np.array([10.5, 11.5, 12.5])), [0, 1, 2])
+    assert model.loads == 3 and model.evictions == 1
+    model.sample(59.5, 12.5)
+    assert model.loads == 3
+    model.sample(59.5, 10.5)
+    assert model.loads == 4 and model.evictions == 2
+
+def test_elevation_model_fill_height_outside_tiles():
+    model = ElevationModel({(59, 10): flat_tile(100)}, fill_height=-5)
+    assert np.array_equal(model.sample([59.5, 20.5], [10.5, 10.5]), [100, -5])
+    assert np.array_equal(model.max_height(np.array([59.5, 20.5]), np.array([59.6, 20.6]), np.array([10.5, 10.5]), np.array([10.6, 10.6])), [100, -5])
+
+def test_elevation_model_max_height_across_tile_border():
+    model = ElevationModel({(59, 10): flat_tile(100), (59, 11): flat_tile(300, west=11)})
+    assert model.max_height(np.array([59.5]), np.array([59.6]), np.array([10.9]), np.array([11.1]))[0] == 300
+
+################################################
+# Ray casting                                  #
+################################################
+def test_cast_rays_flat_terrain():
+    model = ElevationModel({(59, 10): flat_tile(20)}, min_step=0.5)
+    solver = PanTiltSolver(ORIGIN)
+    lat, lon, h = solver.pan_tilt_to_geodetic(30, -45, terrain=model)
+    assert abs(h - 20) < 0.01
+    _, _, r = solver.solve_with_range(lat, lon, h)
+    assert abs(r - 30 * np.sqrt(2)) < 0.05
+
+def test_cast_rays_hits_ridge_before_ellipsoid():
+    model = ElevationModel({(59, 10): ElevationTile(ridge_heights(), 59, 10, 60, 11)}, min_step=1.0)
+    solver = PanTiltSolver(ORIGIN)
+    # Looking east (pan -90 with north offset 0), slightly downwards, towards the ridge ~2.8 km away
+    pans, tilts = np.full(5, -90.0), np.array([-0.2, -0.4, -0.6, -0.8, -1.0])
+    lat, lon, h = solver.pan_tilt_to_geodetic(pans, tilts, max_view_distance=20e3, terrain=model)
+    assert np.all((lon > 10.7) & (lon < 10.76))
+    np.testing.assert_allclose(h, model.sample(lat, lon), rtol=0, atol=0.5)
+    # Brute force: the first densely sampled point below the terrain
+    for k, tilt in enumerate(tilts):
+        distances = np.arange(0, 20e3, 0.5)
+        points = solver.pan_tilt_to_geodetic(np.full(distances.shape, -90.0), np.full(distances.shape, tilt), dist=distances, max_view_distance=20e3)
+        below = np.flatnonzero(points[2] <= model.sample(points[0], points[1]))
+        _, _, r = solver.solve_with_range(lat[k], lon[k], h[k])
+        assert abs(r - distances[below[0]]) < 1.0
+
+def test_cast_rays_miss_gives_dome():
+    model = ElevationModel({(59, 10): flat_tile(0)})
+    _, _, r = PanTiltSolver(ORIGIN).solve_with_range(*pan_tilt_to_target_geodetic(0, 5, None, 1000, *ORIGIN, terrain=model))
+    assert abs(r - 1000) < 1e-6
+
+def test_cast_rays_in_batches():
+    model = ElevationModel({(59, 10): ElevationTile(ridge_heights(), 59, 10, 60, 11)})
+    solver = PanTiltSolver(ORIGIN)
+    directions = solver.pan_tilt_to_ecef_direction(*np.meshgrid(np.linspace(-120, -60, 7), np.linspace(-3, -0.2, 5)))
+    expected = model.cast_rays(solver.frame.origin, directions, 20e3)
+    assert expected.shape == (5, 7) and np.all(np.isfinite(expected))
+    assert np.array_equal(model.cast_rays(solver.frame.origin, directions, 20e3, batch_size=4), expected)
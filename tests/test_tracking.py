@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from geopoint.pan_tilt import PanTiltSolver
+from geopoint.tracking import TargetTracker
+
+SOLVER = PanTiltSolver((59.9, 10.7, 40.0), 12, 3, -2)
+
+# Helper functions
+def trajectory(t, acceleration=0.0):
+    # ENU position of a target passing the PU, at 15 m/s east and 5 m/s north
+    t = np.asarray(t, dtype=float)
+    return np.stack([-300 + 15 * t + 0.5 * acceleration * t * t, 200 + 5 * t, 2 + 0 * t], axis=-1)
+
+def geodetic(enu):
+    return SOLVER.frame.enu_to_geodetic(np.atleast_2d(enu)).T
+
+def expected_pan_tilt(enu):
+    lat, lon, h = geodetic(enu)
+    return SOLVER.solve(lat, lon, h)
+
+def test_constant_velocity_prediction_compensates_latency():
+    tracker = TargetTracker(SOLVER)
+    for t in np.arange(0, 2, 0.1):
+        tracker.update([0], t, *geodetic(trajectory(t)))
+    prediction = tracker.predict([0], 1.9, lookahead=0.3)
+    pan, tilt = expected_pan_tilt(trajectory(2.2))
+    np.testing.assert_allclose((prediction.pan, prediction.tilt), (pan, tilt), rtol=0, atol=1e-6)
+
+def test_constant_acceleration_prediction():
+    tracker = TargetTracker(SOLVER, model='ca', alpha=0.8, beta=0.5, gamma=0.1)
+    for t in np.arange(0, 10, 0.1):
+        tracker.update([0], t, *geodetic(trajectory(t, acceleration=2.0)))
+    prediction = tracker.predict([0], 9.9, lookahead=0.2)
+    pan, tilt = expected_pan_tilt(trajectory(10.1, acceleration=2.0))
+    np.testing.assert_allclose((prediction.pan, prediction.tilt), (pan, tilt), rtol=0, atol=0.01)
+
+def test_prediction_rates_match_finite_differences():
+    tracker = TargetTracker(SOLVER)
+    for t in (0.0, 0.1, 0.2):
+        tracker.update([0], t, *geodetic(trajectory(t)))
+    prediction = tracker.predict([0], 0.2, lookahead=0.25)
+    before, after = tracker.predict([0], 0.2, lookahead=0.25 - 1e-4), tracker.predict([0], 0.2, lookahead=0.25 + 1e-4)
+    np.testing.assert_allclose(prediction.pan_rate, (after.pan - before.pan) / 2e-4, rtol=1e-5)
+    np.testing.assert_allclose(prediction.tilt_rate, (after.tilt - before.tilt) / 2e-4, rtol=1e-5)
+
+def test_many_tracks_in_one_step():
+    n_tracks = 2000
+    tracker = TargetTracker(SOLVER, capacity=16)
+    offsets = np.linspace(-500, 500, n_tracks)[:, None]
+    for t in np.arange(0, 1, 0.1):
+        tracker.update(np.arange(n_tracks), t, *geodetic(trajectory(t) + offsets))
+    assert len(tracker) == n_tracks
+    prediction = tracker.predict(np.arange(n_tracks), 0.9, lookahead=0.1)
+    pan, tilt = expected_pan_tilt(trajectory(1.0) + offsets)
+    np.testing.assert_allclose(prediction.pan, pan, rtol=0, atol=1e-6)
+    np.testing.assert_allclose(prediction.tilt, tilt, rtol=0, atol=1e-6)
+
+def test_prediction_follows_solver_offset_changes():
+    solver = PanTiltSolver((59.9, 10.7, 40.0), 12, 3, -2)
+    tracker = TargetTracker(solver)
+    for t in np.arange(0, 1, 0.1):
+        tracker.update([0], t, *geodetic(trajectory(t)))
+    solver.set_offsets(north=40, pitch=-1, roll=2)
+    prediction = tracker.predict([0], 0.9, lookahead=0.1)
+    pan, tilt = solver.solve(*geodetic(trajectory(1.0)))
+    np.testing.assert_allclose((prediction.pan, prediction.tilt), (pan, tilt), rtol=0, atol=1e-6)
+
+def test_remove_and_reuse_track():
+    tracker = TargetTracker(SOLVER)
+    tracker.update([3], 0.0, *geodetic(trajectory(0.0)))
+    tracker.remove([3])
+    assert len(tracker) == 0
+    tracker.update([3], 5.0, *geodetic(trajectory(1.0)))
+    np.testing.assert_allclose(tracker.predict([3], 6.0).pan, expected_pan_tilt(trajectory(1.0))[0], rtol=0, atol=1e-9)
+
+def test_duplicate_tracks_and_unknown_model_are_rejected():
+    with pytest.raises(ValueError):
+        TargetTracker(SOLVER, model='imm')
+    with pytest.raises(ValueError):
+        TargetTracker(SOLVER).update([1, 1], 0.0, *geodetic(trajectory([0.0, 0.1])))
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+from geopoint.geo_convert import LocalTangentFrame, geodetic_to_ecef_batch, geodetic_to_sacrs, sacrs_to_geodetic
+from geopoint.pan_tilt import PanTiltSolver, geodetic_to_pan_tilt_with_offsets
+from geopoint.transforms import Transform, identity, affine, geodetic, enu_frame, body_rotation, spherical, sacrs, pan_tilt
+
+CAMERA_A = (-25.7, 28.2, 1400.0)
+CAMERA_B = (-25.9, 28.5, 1550.0)
+N = 1000
+
+rng = np.random.default_rng(3)
+targets = np.column_stack([rng.uniform(-26.0, -25.5, N), rng.uniform(28.0, 28.6, N), rng.uniform(1000.0, 2500.0, N)])
+
+def test_enu_handover_is_one_affine_stage():
+    handover = enu_frame(CAMERA_A).inverse() >> enu_frame(CAMERA_B)
+    assert handover.is_affine and len(handover.stages) == 1
+
+    enu_a = LocalTangentFrame(*CAMERA_A).geodetic_to_enu(targets)
+    expected = LocalTangentFrame(*CAMERA_B).geodetic_to_enu(targets)
+    np.testing.assert_allclose(handover(enu_a), expected, rtol=0, atol=1e-7)
+
+def test_pan_tilt_matches_solver_and_fuses_affine_steps():
+    transform = pan_tilt(CAMERA_A, 12.0, 1.5, -0.5)
+    assert len(transform.stages) == 3  # geodetic, fused ENU+rotation, spherical
+
+    pan, tilt, r = PanTiltSolver(CAMERA_A, 12.0, 1.5, -0.5).solve_with_range(targets)
+    result = transform(targets)
+    np.testing.assert_allclose(result[:, 0], pan, rtol=0, atol=1e-10)
+    np.testing.assert_allclose(result[:, 1], tilt, rtol=0, atol=1e-10)
+    np.testing.assert_allclose(result[:, 2], r, rtol=1e-12)
+
+    # geodetic_to_pan_tilt_with_offsets applies its 8th argument about the Y-axis, like the solver's pitch
+    expected_pan, expected_tilt = geodetic_to_pan_tilt_with_offsets(*targets.T, *CAMERA_A, 12.0, 1.5, -0.5)
+    np.testing.assert_allclose(result[:, 0], expected_pan, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(result[:, 1], expected_tilt, rtol=0, atol=1e-9)
+
+def test_sacrs_to_pan_tilt():
+    x_southing, y_westing = geodetic_to_sacrs(targets[:, 0], targets[:, 1], 29)
+    points = np.column_stack([y_westing, x_southing, targets[:, 2]])
+    transform = sacrs(29) >> pan_tilt(CAMERA_A)
+    # The SACRS series round trip is good to about 1e-10 degrees
+    np.testing.assert_allclose(transform(points), pan_tilt(CAMERA_A)(targets), rtol=0, atol=1e-5)
+
+    lat, lon = sacrs_to_geodetic(29, y_westing, x_southing)
+    np.testing.assert_allclose(sacrs(29)(points)[:, :2], np.column_stack([lat, lon]), rtol=0, atol=0)
+    np.testing.assert_allclose(sacrs(29).inverse()(targets), points, rtol=0, atol=1e-9)
+
+def test_inverse_pairs_cancel():
+    round_trip = geodetic() >> enu_frame(CAMERA_A) >> enu_frame(CAMERA_A).inverse() >> geodetic().inverse()
+    assert round_trip.stages == ()
+    assert (spherical() >> spherical().inverse()).stages == ()
+    assert len((sacrs(29) >> sacrs(31).inverse()).stages) == 2
+    np.testing.assert_array_equal(round_trip(targets), targets)
+
+def test_inverse_round_trips():
+    transform = pan_tilt(CAMERA_B, -40.0, 2.0, 1.0)
+    np.testing.assert_allclose(transform.inverse()(transform(targets)), targets, rtol=0, atol=1e-7)
+
+    matrix = np.array([[2.0, 0.5, 0.0], [0.0, 1.0, 0.0], [1.0, 0.0, 3.0]])
+    general = affine(matrix, (1.0, 2.0, 3.0))
+    points = rng.normal(size=(10, 3))
+    np.testing.assert_allclose(general(points), points @ matrix.T + (1.0, 2.0, 3.0))
+    np.testing.assert_allclose(general.inverse()(general(points)), points, atol=1e-12)
+
+def test_as_affine():
+    matrix, offset = (geodetic().inverse() >> geodetic() >> enu_frame(CAMERA_A) >> body_rotation(30.0)).as_affine()
+    ecef = geodetic_to_ecef_batch(targets)
+    np.testing.assert_allclose(ecef @ matrix.T + offset, (enu_frame(CAMERA_A) >> body_rotation(30.0))(ecef))
+    np.testing.assert_array_equal(identity().as_affine()[0], np.eye(3))
+    with pytest.raises(ValueError):
+        geodetic().as_affine()
+
+def test_input_layouts():
+    transform = pan_tilt(CAMERA_A, 5.0)
+    expected = transform(targets)
+    np.testing.assert_array_equal(transform(*targets.T), expected)
+    scalar = transform(*targets[0])
+    assert isinstance(scalar, tuple) and all(isinstance(value, float) for value in scalar)
+    np.testing.assert_allclose(scalar, expected[0], rtol=1e-12)
+
+    out = np.empty_like(targets)
+    assert transform(targets, out=out) is out
+    np.testing.assert_array_equal(out, expected)
+    # In place
+    in_place = targets.copy()
+    transform(in_place, out=in_place)
+    np.testing.assert_array_equal(in_place, expected)
+    np.testing.assert_array_equal(identity()(targets), targets)
+
+def test_repr():
+    assert repr(geodetic() >> spherical()) == "geodetic() >> spherical()"
+    assert repr(Transform()) == "Transform()"
@@ -0,0 +1,102 @@
+import numpy as np
+from geopoint.pan_tilt import PanTiltSolver
+from geopoint.visibility import VisibilityIndex
+
+# Cameras along a coastline, some with limited pan/tilt ranges
+CAMERAS = [
+    (PanTiltSolver((-33.90, 18.40, 50.0), 0, 0, 0), 8e3, (-180.0, 180.0), (-90.0, 90.0)),
+    (PanTiltSolver((-33.95, 18.45, 20.0), 30, 1, 0), 5e3, (-60.0, 60.0), (-30.0, 5.0)),
+    (PanTiltSolver((-34.05, 18.35, 80.0), -45, 0, 2), 12e3, (120.0, -120.0), (-45.0, 45.0)),
+    (PanTiltSolver((-33.50, 18.90, 10.0)), 3e3, (-180.0, 180.0), (-90.0, 90.0)),
+]
+
+def random_targets(n, seed):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-34.15, -33.85, n), rng.uniform(18.25, 18.55, n), rng.uniform(0.0, 200.0, n)
+
+def brute_force(lat, lon, h):
+    pairs = set()
+    for camera, (solver, max_range, pan_limits, tilt_limits) in enumerate(CAMERAS):
+        pan, tilt, r = solver.solve_with_range(lat, lon, h)
+        if pan_limits[0] <= pan_limits[1]:
+            in_pan = (pan >= pan_limits[0]) & (pan <= pan_limits[1])
+        else:
+            in_pan = (pan >= pan_limits[0]) | (pan <= pan_limits[1])
+        visible = (r <= max_range) & in_pan & (tilt >= tilt_limits[0]) & (tilt <= tilt_limits[1])
+        pairs.update((camera, int(target)) for target in np.flatnonzero(visible))
+    return pairs
+
+def make_index(cell_size=4e3):
+    index = VisibilityIndex(cell_size)
+    for camera in CAMERAS:
+        index.add_camera(*camera)
+    return index
+
+def pair_set(index):
+    cameras, targets = index.pairs()
+    return set(zip(cameras.tolist(), targets.tolist()))
+
+def test_visibility_index_matches_brute_force():
+    lat, lon, h = random_targets(3000, 0)
+    index = make_index()
+    index.update(range(3000), lat, lon, h)
+    expected = brute_force(lat, lon, h)
+    assert len(expected) > 100
+    assert pair_set(index) == expected
+    # The camera far up the coast is never tested
+    assert index.tested < 3000 * len(CAMERAS)
+
+def test_visibility_index_moves_and_removes_targets_incrementally():
+    lat, lon, h = random_targets(1000, 1)
+    index = make_index()
+    index.update(range(1000), lat, lon, h)
+    moved = np.arange(0, 1000, 10)
+    new_lat, new_lon, new_h = random_targets(len(moved), 2)
+    tested = index.tested
+    index.update(moved.tolist(), new_lat, new_lon, new_h)
+    assert index.tested - tested <= len(moved) * len(CAMERAS)
+    lat[moved], lon[moved], h[moved] = new_lat, new_lon, new_h
+    assert pair_set(index) == brute_force(lat, lon, h)
+
+    index.remove(range(500))
+    assert len(index) == 500
+    assert pair_set(index) == {(camera, target) for camera, target in brute_force(lat, lon, h) if target >= 500}
+    assert len(index.cameras_for(10)) == 0
+
+def test_cameras_added_after_targets_see_them():
+    lat, lon, h = random_targets(500, 3)
+    index = VisibilityIndex(4e3)
+    index.update(range(500), lat, lon, h)
+    assert pair_set(index) == set()
+    for camera in CAMERAS:
+        index.add_camera(*camera)
+    assert pair_set(index) == brute_force(lat, lon, h)
+
+def test_update_camera_follows_solver_offsets_and_limits():
+    lat, lon, h = random_targets(2000, 4)
+    solver = PanTiltSolver((-33.95, 18.45, 20.0), 30, 1, 0)
+    index = VisibilityIndex(4e3)
+    camera = index.add_camera(solver, 5e3, (-60.0, 60.0), (-30.0, 5.0))
+    index.update(range(2000), lat, lon, h)
+
+    def expected(max_range, pan_limits, tilt_limits):
+        pan, tilt, r = solver.solve_with_range(lat, lon, h)
+        visible = (r <= max_range) & (pan >= pan_limits[0]) & (pan <= pan_limits[1]) & (tilt >= tilt_limits[0]) & (tilt <= tilt_limits[1])
+        return {(camera, int(target)) for target in np.flatnonzero(visible)}
+
+    before = pair_set(index)
+    assert before == expected(5e3, (-60.0, 60.0), (-30.0, 5.0))
+    solver.set_offsets(120, 1, 0)
+    # Stale until the camera is updated
+    assert pair_set(index) == before
+    index.update_camera(camera)
+    assert pair_set(index) == expected(5e3, (-60.0, 60.0), (-30.0, 5.0)) != before
+
+    index.update_camera(camera, max_range=9e3, pan_limits=(-90.0, 90.0))
+    assert pair_set(index) == expected(9e3, (-90.0, 90.0), (-30.0, 5.0))
+    # Targets that move are tested against the cells of the new range
+    index.update(range(2000), lat, lon, h)
+    assert pair_set(index) == expected(9e3, (-90.0, 90.0), (-30.0, 5.0))
+    index.update_camera(camera, max_range=2e3)
+    index.update(range(2000), lat, lon, h)
+    assert pair_set(index) == expected(2e3, (-90.0, 90.0), (-30.0, 5.0))
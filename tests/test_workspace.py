@@ -0,0 +1,73 @@
+import tracemalloc
+import numpy as np
+import pytest
+from geopoint.pan_tilt import PanTiltSolver, cartesian_to_spherical
+from geopoint.workspace import Workspace, ecef_delta_into, geodetic_to_enu_into, cartesian_to_spherical_into, pan_tilt_into
+
+SOLVER = PanTiltSolver((-25.7, 28.2, 1400.0), 12, 1.5, -0.5)
+N = 100000
+
+def targets(dtype=np.float64):
+    rng = np.random.default_rng(0)
+    return tuple(column.astype(dtype) for column in (rng.uniform(-26.0, -25.4, N), rng.uniform(27.9, 28.5, N), rng.uniform(1000.0, 2000.0, N)))
+
+def traced_growth(func, repeat=5):
+    func()  # Warm-up: creates the cached views
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(repeat):
+            func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - start
+
+def test_pan_tilt_into_matches_solver():
+    lat, lon, h = targets()
+    pan, tilt, r = pan_tilt_into(lat, lon, h, SOLVER, Workspace(N))
+    expected = SOLVER.solve_with_range(lat, lon, h)
+    np.testing.assert_allclose(pan, expected[0], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(tilt, expected[1], rtol=0, atol=1e-9)
+    # The reference subtracts ECEF positions, which loses ~1e-9 m to cancellation
+    np.testing.assert_allclose(r, expected[2], rtol=0, atol=1e-6)
+
+def test_float32_workspace_accuracy():
+    lat, lon, h = targets()
+    workspace = Workspace(N, np.float32)
+    pan, tilt, r = pan_tilt_into(lat, lon, h, SOLVER, workspace)
+    assert pan.dtype == np.float32
+    expected = SOLVER.solve_with_range(lat, lon, h)
+    np.testing.assert_allclose(pan, expected[0], rtol=0, atol=1e-4)
+    np.testing.assert_allclose(tilt, expected[1], rtol=0, atol=1e-4)
+    np.testing.assert_allclose(r, expected[2], rtol=1e-6)
+    enu = geodetic_to_enu_into(lat, lon, h, SOLVER.frame, workspace)
+    np.testing.assert_allclose(np.column_stack(enu), SOLVER.frame.geodetic_to_enu(lat, lon, h), rtol=0, atol=0.05)
+
+def test_kernels_chain_on_one_workspace():
+    lat, lon, h = targets()
+    workspace = Workspace(N)
+    delta = ecef_delta_into(lat, lon, h, SOLVER.frame, workspace)
+    np.testing.assert_allclose(np.column_stack(delta), SOLVER.frame.geodetic_to_enu(lat, lon, h) @ SOLVER.frame.rotation, rtol=0, atol=1e-6)
+    enu = geodetic_to_enu_into(lat, lon, h, SOLVER.frame, workspace)
+    expected = cartesian_to_spherical(*(column.copy() for column in enu))
+    for value, reference in zip(cartesian_to_spherical_into(*enu, workspace), expected):
+        np.testing.assert_allclose(value, reference, rtol=1e-12, atol=1e-12)
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_steady_state_loop_does_not_allocate(dtype):
+    lat, lon, h = targets(dtype)
+    workspace = Workspace(N, dtype)
+    # One float64 array of N points is 800 KB; the loop may only allocate a few small Python objects
+    assert traced_growth(lambda: pan_tilt_into(lat, lon, h, SOLVER, workspace)) < 1024
+    assert traced_growth(lambda: geodetic_to_enu_into(lat, lon, h, SOLVER.frame, workspace)) < 1024
+
+def test_workspace_capacity_and_dtype():
+    with pytest.raises(ValueError):
+        Workspace(10, np.int32)
+    lat, lon, h = targets()
+    with pytest.raises(ValueError):
+        pan_tilt_into(lat, lon, h, SOLVER, Workspace(N - 1))
+    pan, _, _ = pan_tilt_into(lat[:10], lon[:10], h[:10], SOLVER, Workspace(N))
+    assert len(pan) == 10